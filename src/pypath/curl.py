@@ -28,6 +28,7 @@ from past.builtins import xrange, range
 
 import imp
 import sys
+import atexit
 import os
 import shutil
 import struct
@@ -44,6 +45,12 @@ except:
         from io import BytesIO
         from io import StringIO
 
+try:
+    import fcntl
+except ImportError:
+    # not available on Windows
+    fcntl = None
+
 try:
     import cPickle as pickle
 except:
@@ -81,6 +88,12 @@ import gzip
 import zipfile
 import tarfile
 import hashlib
+import json
+import time
+import re
+import sqlite3
+import threading
+from collections import Counter, deque
 
 try:
     from fabric.network import connect, HostConnectionCache
@@ -109,6 +122,10 @@ CACHEDEL = False
 CACHEPRINT = False
 DRYRUN = False
 PRESERVE = False
+REVALIDATE = False
+# maximum size of the cache directory in bytes;
+# the least recently used files are deleted above this
+CACHE_MAX_SIZE = None
 
 LASTCURL = None
 
@@ -416,6 +433,47 @@ class preserve_off(_global_context_off):
         super(preserve_off, self).__init__('PRESERVE')
 
 
+class revalidate_on(_global_context_on):
+    """
+    This is a context handler which makes pypath.curl.Curl() check
+    with the server whether the cached files are still up to date,
+    by conditional requests (`If-None-Match` and `If-Modified-Since`).
+    If the server responds `304 Not Modified` the cached file is used,
+    otherwise the new version is downloaded. Files without ETag or
+    Last-Modified in the cache manifest are used without checking.
+
+    Behind the scenes it sets the value of the `pypath.curl.REVALIDATE`
+    module level variable to `True` (by default it is `False`).
+
+    Example: ::
+
+        import pypath
+        from pypath import curl, data_formats
+
+        pa = pypath.PyPath()
+
+        with curl.revalidate_on():
+            pa.load_resources({'signor': data_formats.pathway['signor']})
+    """
+
+    def __init__(self):
+        super(revalidate_on, self).__init__('REVALIDATE')
+
+
+class revalidate_off(_global_context_off):
+    """
+    This is a context handler which makes pypath.curl.Curl() use the
+    cached files without checking them with the server. This is the
+    default behaviour, so this context only restores the default.
+
+    Behind the scenes it sets the value of the `pypath.curl.REVALIDATE`
+    module level variable to `False`.
+    """
+
+    def __init__(self):
+        super(revalidate_off, self).__init__('REVALIDATE')
+
+
 class RemoteFile(object):
     def __init__(self,
                  filename,
@@ -565,6 +623,59 @@ class FileOpener(object):
             self.result = self.fileobj.read()
             self.fileobj.close()
 
+    def iterlines(self, encoding=None, member=None,
+                  buffer_size=1048576, errors='strict'):
+        """
+        Iterates the lines of the file, or of the extracted members
+        of an archive, decoded and without the line endings. The file
+        is read in large chunks and decoded incrementally, so the memory
+        use does not depend on the size of the file. The file is read
+        from its current position, and closed at the end.
+
+        :param str encoding: By default the `encoding` attribute,
+            or utf-8.
+        :param str member: Name of one member of an archive. By default
+            the lines of all extracted members are iterated.
+        :param int buffer_size: Number of bytes read at once.
+        :param str errors: Error handling of the decoder.
+        """
+        encoding = encoding or getattr(self, 'encoding', None) or 'utf-8'
+        if type(self.result) is dict:
+            names = [member] if member is not None else \
+                [m if type(m) in common.charTypes else m.name
+                 for m in self.members]
+            sources = [self.result[name] for name in names
+                       if name in self.result]
+        else:
+            sources = [self.result]
+        for source in sources:
+            if source is None:
+                continue
+            if isinstance(source, (bytes, unicode)):
+                if isinstance(source, bytes):
+                    source = source.decode(encoding, errors)
+                lines = source.split(u'\n')
+                if not lines[-1]:
+                    lines.pop()
+                for line in lines:
+                    yield line[:-1] if line.endswith(u'\r') else line
+                continue
+            decoder = codecs.getincrementaldecoder(encoding)(errors)
+            rest = u''
+            while True:
+                chunk = source.read(buffer_size)
+                text = decoder.decode(chunk, final=not chunk)
+                if text:
+                    lines = (rest + text).split(u'\n')
+                    rest = lines.pop()
+                    for line in lines:
+                        yield line[:-1] if line.endswith(u'\r') else line
+                if not chunk:
+                    break
+            if rest:
+                yield rest[:-1] if rest.endswith(u'\r') else rest
+            source.close()
+
     def get_type(self):
         self.multifile = False
         if self.fname[-3:].lower() == 'zip' or self.compr == 'zip':
@@ -581,6 +692,344 @@ class FileOpener(object):
             self.type = 'plain'
 
 
+class CacheLock(object):
+    """
+    Lock of one cache file, held while the file is downloaded and moved
+    into the cache, so threads and processes using the same cache
+    directory do not download the same file at the same time. Between
+    processes it relies on `fcntl.flock()` on a ``.lock`` file next to
+    the cache file, hence on Windows it works only between threads.
+    """
+
+    _locks = {}
+    _pid = None
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path):
+        """
+        :param str path: Path of the cache file.
+        """
+        self.path = '%s.lock' % path
+        self.fp = None
+        with CacheLock._registry_lock:
+            if CacheLock._pid != os.getpid():
+                # the locks inherited from the parent process
+                # might be held by threads not existing here
+                CacheLock._locks = {}
+                CacheLock._pid = os.getpid()
+            self.lock = CacheLock._locks.setdefault(self.path,
+                                                    threading.Lock())
+
+    def acquire(self, blocking=True):
+        """
+        Returns `True` if the lock has been acquired, `False` if not
+        and ``blocking`` is `False`.
+        """
+        if not self.lock.acquire(blocking):
+            return False
+        if fcntl is not None:
+            self.fp = open(self.path, 'a')
+            try:
+                fcntl.flock(self.fp.fileno(), fcntl.LOCK_EX |
+                            (0 if blocking else fcntl.LOCK_NB))
+            except (IOError, OSError):
+                self.fp.close()
+                self.fp = None
+                self.lock.release()
+                return False
+        return True
+
+    def release(self):
+        if self.fp is not None:
+            fcntl.flock(self.fp.fileno(), fcntl.LOCK_UN)
+            self.fp.close()
+            self.fp = None
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.release()
+
+
+def _replace(src, dst):
+    """
+    Moves ``src`` to ``dst``, replacing ``dst`` in one step
+    where the platform allows.
+    """
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+class CacheManifest(object):
+    """
+    An index of the files in the cache directory of `Curl()`, kept in
+    an SQLite database in the cache directory. For each file it records
+    the URL, the md5 of the POST parameters, the size, the time of
+    download and of the last access, the content type, and the ETag
+    and Last-Modified validators of the response. Using this the cache
+    can be limited in size by deleting the least recently used files
+    (see `CacheManifest.evict()` and `CACHE_MAX_SIZE`).
+
+    Files downloaded before the manifest existed are added by
+    `CacheManifest.sync()`, with the time of their last modification.
+
+    The times of access are written in batches (see `touch()`), as
+    most `Curl()` calls read the cache. Use `get_manifest()` to get the
+    instance shared by all `Curl()` calls of the process.
+    """
+
+    refile = re.compile(r'^[0-9a-f]{32}-')
+    # the times of access are written after this many accesses,
+    # or this many seconds
+    touch_batch = 100
+    touch_interval = 10.0
+
+    def __init__(self, cache_dir='cache'):
+        """
+        :param str cache_dir: The cache directory, relative to the
+            working directory or absolute.
+        """
+        self.cache_dir = os.path.join(os.getcwd(), cache_dir)
+        self.path = os.path.join(self.cache_dir, 'cache-manifest.sqlite')
+        self.touched = {}
+        self.touches = 0
+        self.touched_lock = threading.Lock()
+        self.last_flush = time.time()
+        if not os.path.exists(self.cache_dir):
+            os.mkdir(self.cache_dir)
+        with closing(self.connect()) as con:
+            with con:
+                con.execute(
+                    'CREATE TABLE IF NOT EXISTS files ('
+                    'name TEXT PRIMARY KEY, url TEXT, post_md5 TEXT, '
+                    'size INTEGER, fetched REAL, accessed REAL, '
+                    'content_type TEXT, etag TEXT, last_modified TEXT)')
+                columns = set(row[1] for row in
+                               con.execute('PRAGMA table_info(files)'))
+                # manifests written before the validators were stored
+                for column in ('etag', 'last_modified'):
+                    if column not in columns:
+                        con.execute('ALTER TABLE files ADD COLUMN %s TEXT' %
+                                    column)
+        atexit.register(self.flush)
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    def record(self, name, url, post_md5=None, content_type=None,
+               etag=None, last_modified=None):
+        """
+        Adds or updates the entry of a file just downloaded.
+
+        :param str name: Name of the file in the cache directory.
+        """
+        path = os.path.join(self.cache_dir, name)
+        if not os.path.exists(path):
+            return None
+        now = time.time()
+        with self.touched_lock:
+            self.touched.pop(name, None)
+        with closing(self.connect()) as con:
+            with con:
+                con.execute(
+                    'INSERT OR REPLACE INTO files (name, url, post_md5, '
+                    'size, fetched, accessed, content_type, etag, '
+                    'last_modified) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (name, url, post_md5, os.path.getsize(path),
+                     now, now, content_type, etag, last_modified))
+
+    def touch(self, name):
+        """
+        Sets the time of the last access of a file to now. The time is
+        written to the database together with the other accesses, after
+        `touch_batch` accesses or `touch_interval` seconds, before any
+        query, and at exit.
+        """
+        now = time.time()
+        with self.touched_lock:
+            self.touched[name] = now
+            self.touches += 1
+            due = (self.touches >= self.touch_batch or
+                   now - self.last_flush >= self.touch_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the times of access recorded by `touch()`.
+        """
+        with self.touched_lock:
+            touched = self.touched
+            self.touched = {}
+            self.touches = 0
+            self.last_flush = time.time()
+        # the cache directory might have been deleted
+        if touched and os.path.exists(self.path):
+            with closing(self.connect()) as con:
+                with con:
+                    con.executemany(
+                        'UPDATE files SET accessed = ? WHERE name = ?',
+                        [(accessed, name)
+                         for name, accessed in iteritems(touched)])
+
+    def remove(self, name):
+        """
+        Removes the entry of a file.
+        """
+        with self.touched_lock:
+            self.touched.pop(name, None)
+        with closing(self.connect()) as con:
+            with con:
+                con.execute('DELETE FROM files WHERE name = ?', (name, ))
+
+    def sync(self):
+        """
+        Adds the files missing from the manifest, and removes the
+        entries of the files which do not exist any more.
+        """
+        files = set(f for f in os.listdir(self.cache_dir)
+                    if self.refile.match(f) and
+                    not f.endswith(('.part', '.part.info', '.lock',
+                                    '.transcoding')))
+        with closing(self.connect()) as con:
+            with con:
+                known = set(row[0] for row in
+                            con.execute('SELECT name FROM files'))
+                con.executemany('DELETE FROM files WHERE name = ?',
+                                [(name, ) for name in known - files])
+                new = []
+                for name in files - known:
+                    path = os.path.join(self.cache_dir, name)
+                    mtime = os.path.getmtime(path)
+                    new.append((name, None, None, os.path.getsize(path),
+                                mtime, mtime, None))
+                con.executemany(
+                    'INSERT INTO files (name, url, post_md5, size, '
+                    'fetched, accessed, content_type) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', new)
+
+    def entries(self):
+        """
+        Returns the list of entries as dicts, the least recently
+        used first.
+        """
+        fields = ['name', 'url', 'post_md5', 'size', 'fetched',
+                  'accessed', 'content_type', 'etag', 'last_modified']
+        self.flush()
+        with closing(self.connect()) as con:
+            return [dict(zip(fields, row)) for row in con.execute(
+                'SELECT %s FROM files ORDER BY accessed' % ', '.join(fields))]
+
+    def validators(self, name):
+        """
+        Returns the ETag and Last-Modified header values recorded
+        for a file, or None if neither of them is known.
+        """
+        with closing(self.connect()) as con:
+            row = con.execute(
+                'SELECT etag, last_modified FROM files WHERE name = ?',
+                (name, )).fetchone()
+        if row is None or not any(row):
+            return None
+        return {'etag': row[0], 'last_modified': row[1]}
+
+    def total_size(self):
+        """
+        Returns the total size of the files in the cache in bytes.
+        """
+        self.flush()
+        with closing(self.connect()) as con:
+            return con.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM files').fetchone()[0]
+
+    def evict(self, max_size, keep=()):
+        """
+        Deletes the least recently used files until the total size
+        of the cache is not larger than ``max_size`` bytes.
+        Returns the list of the names of the deleted files.
+        Files being downloaded or read from the cache by other threads
+        or processes (i.e. their `CacheLock` is held) are skipped.
+
+        :param int max_size: The size limit in bytes.
+        :param keep: Names of files which should not be deleted.
+        """
+        deleted = []
+        keep = set(keep)
+        self.flush()
+        with closing(self.connect()) as con:
+            total = con.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM files').fetchone()[0]
+            if total <= max_size:
+                return deleted
+            for name, size in list(con.execute(
+                    'SELECT name, size FROM files ORDER BY accessed')):
+                if total <= max_size:
+                    break
+                if name in keep:
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                lock = CacheLock(path)
+                if not lock.acquire(False):
+                    continue
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                finally:
+                    lock.release()
+                total -= size
+                deleted.append(name)
+            with con:
+                con.executemany('DELETE FROM files WHERE name = ?',
+                                [(name, ) for name in deleted])
+        return deleted
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def get_manifest(cache_dir='cache'):
+    """
+    Returns the `CacheManifest` of a cache directory, one instance
+    for each directory in a process.
+    """
+    key = (os.getpid(), os.path.join(os.getcwd(), cache_dir))
+    with _manifests_lock:
+        # created again if the cache directory has been deleted
+        if key not in _manifests or not os.path.exists(_manifests[key].path):
+            _manifests[key] = CacheManifest(cache_dir)
+        return _manifests[key]
+
+
+def cache_manifest(cache_dir='cache'):
+    """
+    Returns the `CacheManifest` of a cache directory, after adding
+    the files not in the manifest yet.
+    """
+    manifest = get_manifest(cache_dir)
+    manifest.sync()
+    return manifest
+
+
+def cache_evict(max_size=None, cache_dir='cache'):
+    """
+    Deletes the least recently used files from the cache until its
+    size is not larger than ``max_size`` bytes, by default
+    `CACHE_MAX_SIZE`. Returns the names of the deleted files.
+    """
+    max_size = CACHE_MAX_SIZE if max_size is None else max_size
+    if max_size is None:
+        return []
+    return cache_manifest(cache_dir).evict(max_size)
+
+
 class Curl(FileOpener):
     """
     This class is a wrapper around pycurl.
@@ -628,7 +1077,10 @@ class Curl(FileOpener):
                  call=True,
                  process=True,
                  retries=3,
-                 cache_dir='cache'):
+                 cache_dir='cache',
+                 revalidate=False,
+                 expected_size=None,
+                 expected_md5=None):
 
         self.result = None
         self.download_failed = False
@@ -661,6 +1113,11 @@ class Curl(FileOpener):
 
         self.cache_dir = cache_dir
         self.cache = cache
+        self.revalidate = revalidate
+        self.expected_size = expected_size
+        self.expected_md5 = expected_md5
+        # the partial file has been written by this instance
+        self.partial_own = False
         self.init_cache()
         self.write_cache = write_cache
         self.outfile = outf
@@ -681,24 +1138,46 @@ class Curl(FileOpener):
         if CACHEDEL:
             self.delete_cache_file()
 
-        if not self.use_cache and not DRYRUN:
-            self.title = None
-            self.set_title()
-            if self.sftp_host is not None:
-                self.sftp_url()
-                self.sftp_call()
-            else:
-                self.progress_setup()
-                if setup:
-                    self.curl_setup()
-                if call:
+        lock = None
+        if call and self.sftp_host is None and not DRYRUN:
+            # held until the file is downloaded and opened, so it is not
+            # downloaded by other threads or processes at the same time,
+            # and not deleted by `CacheManifest.evict()` meanwhile
+            lock = CacheLock(self.cache_file_name)
+            lock.acquire()
+            # the file might have been downloaded meanwhile
+            self.select_cache_file()
+        try:
+            if not self.use_cache and not DRYRUN:
+                self.title = None
+                self.set_title()
+                if self.sftp_host is not None:
+                    self.sftp_url()
+                    self.sftp_call()
+                elif call:
+                    self.progress_setup()
+                    if setup:
+                        self.curl_setup()
                     self.curl_call()
-        elif not self.silent:
-            sys.stdout.write('\t:: Loading data from cache '
-                             'previously downloaded from %s\n' % self.domain)
-            sys.stdout.flush()
+                    if not self.download_failed:
+                        self.get_type()
+                        self.transcode()
+                else:
+                    self.progress_setup()
+                    if setup:
+                        self.curl_setup()
+            elif not self.silent:
+                sys.stdout.write('\t:: Loading data from cache '
+                                 'previously downloaded from %s\n' %
+                                 self.domain)
+                sys.stdout.flush()
+            if process and not self.download_failed and not DRYRUN:
+                self.process_file()
+        finally:
+            if lock is not None:
+                lock.release()
         if process and not self.download_failed and not DRYRUN:
-            self.process_file()
+            self.update_manifest()
 
         if DRYRUN:
             self.print_debug_info('INFO', 'DRYRUN PERFORMED, RETURNING NONE')
@@ -833,13 +1312,201 @@ class Curl(FileOpener):
         self.curl.setopt(self.curl.URL, url or self.url)
 
     def set_target(self):
-        self.target = open(self.cache_file_name, 'wb')
-        self.curl.setopt(self.curl.WRITEFUNCTION, self.target.write)
+        self.target = open(self.target_file_name,
+                           'ab' if self.resumable() else 'wb')
+        self.curl.setopt(self.curl.WRITEFUNCTION, self.write_target)
+
+    def resumable(self):
+        """
+        Tells if an interrupted download can be continued: only
+        plain GET requests are resumed, and the downloads of new
+        versions of cached files are always started again.
+        """
+        return (self.post is None and not self.binary_data and
+                self.validators is None)
+
+    def partial_info(self):
+        """
+        Returns the ETag, the Last-Modified and the size of the file
+        being downloaded into the partial file, as recorded from the
+        response which started the download, or None if unknown.
+        """
+        if os.path.exists(self.partial_info_file_name):
+            try:
+                with open(self.partial_info_file_name, 'r') as fp:
+                    return json.load(fp)
+            except ValueError:
+                pass
+        return None
+
+    def save_partial_info(self, headers):
+        size = headers.get('content-length')
+        info = {
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'size': int(size) if size and size.isdigit() else None
+        }
+        with open(self.partial_info_file_name, 'w') as fp:
+            json.dump(info, fp)
+
+    @staticmethod
+    def if_range(info):
+        """
+        Returns the value of the If-Range header for continuing the
+        download described by ``info`` (see `partial_info()`), or
+        None if there is no strong validator.
+        """
+        if info is None:
+            return None
+        if info['etag'] and not info['etag'].startswith('W/'):
+            return info['etag']
+        return info['last_modified']
+
+    def set_resume(self):
+        """
+        Before each attempt, sets the download to continue from the
+        end of the partial file left by the previous attempts, or
+        to start again if it can not be resumed.
+        A partial file left by an earlier run is continued only if
+        the validators of its download are known: these are sent in
+        If-Range, hence if the file has changed on the server, the
+        download starts again.
+        """
+        self.target.flush()
+        offset = os.path.getsize(self.target_file_name)
+        if_range = None
+        if offset:
+            info = self.partial_info()
+            if_range = self.if_range(info)
+            if (
+                not self.resumable() or
+                (info is not None and info['size'] is not None and
+                 offset >= info['size']) or
+                # the origin of the partial file is unknown
+                (if_range is None and not self.partial_own)
+            ):
+                self.truncate_target()
+                offset = 0
+                if_range = None
+        if offset and not self.silent:
+            self.print_status('Resuming download from %.02f%s' %
+                              self.bytes_prefix(offset))
+        self.resume_from = offset
+        self.resume_check = True
+        self.curl.setopt(pycurl.RESUME_FROM_LARGE, offset)
+        self.set_req_headers(
+            ['If-Range: %s' % if_range] if if_range is not None else [])
+
+    def truncate_target(self):
+        self.target.seek(0)
+        self.target.truncate()
+        self.partial_own = False
+        if os.path.exists(self.partial_info_file_name):
+            os.remove(self.partial_info_file_name)
+
+    def remove_partial(self):
+        """
+        Deletes the partial file and the information about it.
+        """
+        for path in (self.target_file_name, self.partial_info_file_name):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def last_resp_headers(self):
+        """
+        Returns the HTTP code and the headers of the last response,
+        as the headers of redirects are collected as well.
+        """
+        code = 0
+        headers = {}
+        for h in self.resp_headers:
+            if h[:5] == b'HTTP/':
+                code = int(h.split()[1])
+                headers = {}
+            elif b':' in h:
+                name, value = self.bytes2unicode(h).split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return code, headers
+
+    def write_target(self, data):
+        """
+        Writes the data received into the partial file. The body of
+        unsuccessful HTTP responses is discarded.
+        """
+        if self.resume_check:
+            self.resume_check = False
+            self.write_body = True
+            if self.url.startswith('http'):
+                # getinfo() can not be called during the transfer,
+                # hence the code is taken from the last status line
+                code, headers = self.last_resp_headers()
+                self.write_body = code in (200, 206)
+                if code == 200:
+                    # the whole file is sent, e.g. it has
+                    # changed since the partial download
+                    if self.resume_from:
+                        self.truncate_target()
+                        self.resume_from = 0
+                    self.save_partial_info(headers)
+        if self.write_body:
+            self.target.write(data)
+            self.partial_own = True
+
+    def check_download(self):
+        """
+        Checks the size and the md5 checksum of the downloaded file,
+        if `expected_size` or `expected_md5` have been given, e.g.
+        from the listing on the server. Without `expected_size` the
+        size is compared to the Content-Length of the response which
+        started the download.
+        """
+        expected_size = self.expected_size
+        if expected_size is None:
+            info = self.partial_info()
+            expected_size = None if info is None else info['size']
+        if expected_size is not None:
+            size = os.path.getsize(self.target_file_name)
+            if size != expected_size:
+                self.print_debug_info(
+                    'ERROR', 'Size of the file downloaded from %s is %u, '
+                    'expected %u' % (self.url, size, expected_size))
+                return False
+        if self.expected_md5 is not None:
+            md5 = hashlib.md5()
+            with open(self.target_file_name, 'rb') as fp:
+                for chunk in iter(lambda: fp.read(1048576), b''):
+                    md5.update(chunk)
+            if md5.hexdigest() != self.expected_md5.lower():
+                self.print_debug_info(
+                    'ERROR', 'md5 checksum of the file downloaded from %s '
+                    'is %s, expected %s' %
+                    (self.url, md5.hexdigest(), self.expected_md5))
+                return False
+        return True
 
-    def set_req_headers(self):
+    def move_download(self):
+        """
+        Moves the completed download into the cache, replacing
+        the old version if any, in one step.
+        """
+        _replace(self.target_file_name, self.cache_file_name)
+        if os.path.exists(self.partial_info_file_name):
+            os.remove(self.partial_info_file_name)
+
+    def set_req_headers(self, extra=()):
+        # `req_headers` is left intact, as this is called again
+        # for each retry by `prefetch()`
+        headers = list(self.req_headers) + list(extra)
         if self.override_post:
-            self.req_headers.append('X-HTTP-Method-Override: GET')
-        self.curl.setopt(self.curl.HTTPHEADER, self.req_headers)
+            headers.append('X-HTTP-Method-Override: GET')
+        if self.validators is not None:
+            if self.validators['etag']:
+                headers.append('If-None-Match: %s' %
+                               self.validators['etag'])
+            if self.validators['last_modified']:
+                headers.append('If-Modified-Since: %s' %
+                               self.validators['last_modified'])
+        self.curl.setopt(self.curl.HTTPHEADER, headers)
 
     def set_resp_headers(self):
         self.resp_headers = []
@@ -867,35 +1534,80 @@ class Curl(FileOpener):
                     self.print_debug_info(
                         'INFO', 'pypath.curl.Curl().curl_call() :: attempt #%u'
                         % attempt)
+                self.set_resume()
                 self.curl.perform()
                 
-                if self.url.startswith('http'):
-                    self.status = self.curl.getinfo(pycurl.HTTP_CODE)
-                    if self.status == 200:
+                if self.get_status() == 200:
+                    self.target.flush()
+                    if self.check_download():
                         self.terminate_progress()
                         break
+                    self.status = 500
+                    self.truncate_target()
                 
-                if self.url.startswith('ftp'):
-                    self.status == 500
-                    for h in self.resp_headers:
-                        if h[:3] == b'226':
-                            self.status = 200
-                            self.terminate_progress()
-                            break
-                    if self.status == 200:
-                        break
+                if self.status == 304 and self.validators is not None:
+                    self.terminate_progress()
+                    break
+                
+                # range not satisfiable: start again
+                if self.status == 416:
+                    self.truncate_target()
             
             except pycurl.error as e:
                 self.status = 500
+                # the server does not support ranges: start again
+                if e.args[0] == pycurl.E_RANGE_ERROR:
+                    self.truncate_target()
                 if self.progress is not None:
                     self.progress.terminate(status='failed')
                     self.progress = None
                 self.print_debug_info('ERROR',
                                       'PycURL error: %s' % str(e.args))
-        if self.status != 200:
-            self.download_failed = True
         self.curl.close()
         self.target.close()
+        if self.status == 200:
+            self.move_download()
+        elif os.path.exists(self.target_file_name) and (
+                not self.resumable() or
+                not os.path.getsize(self.target_file_name)):
+            self.remove_partial()
+        if self.validators is not None:
+            self.revalidated()
+        if self.status != 200 and not self.use_cache:
+            self.download_failed = True
+
+    def revalidated(self):
+        """
+        Finishes a conditional request: if no new version has been
+        downloaded, uses the cached file. If the server could not
+        be reached the cached file is used as well.
+        """
+        if self.status != 200:
+            self.remove_partial()
+            if self.status != 304:
+                self.print_debug_info(
+                    'WARNING', 'Could not revalidate %s (status %s), '
+                    'using the cached file' % (self.url, self.status))
+            self.use_cache = True
+
+    def get_status(self):
+        """
+        Sets the status after a transfer has been performed:
+        the HTTP code for HTTP, 200 for FTP if the server
+        reported the transfer complete, 500 otherwise.
+        """
+        if self.url.startswith('http'):
+            self.status = self.curl.getinfo(pycurl.HTTP_CODE)
+            # the rest of a partial download
+            if self.status == 206 and self.resume_from:
+                self.status = 200
+        elif self.url.startswith('ftp'):
+            self.status = 500
+            for h in self.resp_headers:
+                if h[:3] == b'226':
+                    self.status = 200
+                    break
+        return self.status
 
     def progress_setup(self):
         if not self.silent and self.progress is None and not self.debug:
@@ -1052,12 +1764,16 @@ class Curl(FileOpener):
                                             (self.urlmd5, self.filename))
 
     def delete_cache_file(self):
+        self.remove_partial()
         if os.path.exists(self.cache_file_name):
             self.print_debug_info('INFO',
                                   'CACHE FILE = %s' % self.cache_file_name)
             self.print_debug_info('INFO', 'DELETING CACHE FILE')
             os.remove(self.cache_file_name)
+            get_manifest(self.cache_dir).remove(
+                os.path.basename(self.cache_file_name))
             self.use_cache = False
+            self.validators = None
         else:
             self.print_debug_info('INFO',
                                   'CACHE FILE = %s' % self.cache_file_name)
@@ -1065,10 +1781,48 @@ class Curl(FileOpener):
 
     def select_cache_file(self):
         self.use_cache = False
+        self.validators = None
+        # downloads go to this file, and moved to the cache
+        # only if complete
+        self.target_file_name = '%s.part' % self.cache_file_name
+        # validators of the partial download, to check if it can be
+        # continued later
+        self.partial_info_file_name = '%s.info' % self.target_file_name
         if type(CACHE) is bool:
             self.cache = CACHE
         if self.cache and os.path.exists(self.cache_file_name):
             self.use_cache = True
+            if self.revalidate or REVALIDATE:
+                self.validators = get_manifest(self.cache_dir).validators(
+                    os.path.basename(self.cache_file_name))
+                if self.validators is not None:
+                    self.use_cache = False
+
+    def update_manifest(self):
+        """
+        Records the downloaded file in the cache manifest, or the
+        access if it has been read from the cache, and deletes the
+        least recently used files if the cache is larger than
+        `CACHE_MAX_SIZE`.
+        """
+        manifest = get_manifest(self.cache_dir)
+        name = os.path.basename(self.cache_file_name)
+        if self.use_cache:
+            # reading the cache does not increase its size
+            manifest.touch(name)
+            return None
+        self.resp_headers = getattr(self, 'resp_headers', [])
+        self.get_headers()
+        manifest.record(
+            name, self.url,
+            post_md5=hashlib.md5(self.unicode2bytes(
+                '%s%s' % (self.post_str, self.binary_data or ''))
+            ).hexdigest() if self.post or self.binary_data else None,
+            content_type=self.resp_headers_dict.get('content-type'),
+            etag=self.resp_headers_dict.get('etag'),
+            last_modified=self.resp_headers_dict.get('last-modified'))
+        if CACHE_MAX_SIZE is not None:
+            manifest.evict(CACHE_MAX_SIZE, keep=[name])
 
     def show_cache(self):
         self.print_debug_info('INFO', 'URL = %s' % self.url)
@@ -1083,19 +1837,17 @@ class Curl(FileOpener):
         if not self.use_cache and self.type == 'plain':
             self.guess_encoding()
             if self.encoding is not None and self.encoding != 'utf-8':
-                tmp_file_name = os.path.join(os.getcwd(), self.cache_dir,
-                                             'transcoding.tmp.txt')
-                os.rename(self.cache_file_name, tmp_file_name)
+                tmp_file_name = '%s.transcoding' % self.cache_file_name
                 if self.progress is not None:
                     self.print_status('Converting %s encoded data to utf-8' %
                                       self.encoding)
-                with open(tmp_file_name, 'rb') as tmp_file:
-                    with open(self.cache_file_name, 'wb') as cache_file:
-                        for line in tmp_file:
-                            cache_file.write(
+                with open(self.cache_file_name, 'rb') as cache_file:
+                    with open(tmp_file_name, 'wb') as tmp_file:
+                        for line in cache_file:
+                            tmp_file.write(
                                 line.decode(self.encoding or 'utf-8').encode(
                                     'utf-8'))
-                os.remove(tmp_file_name)
+                _replace(tmp_file_name, self.cache_file_name)
                 self.encoding = 'utf-8'
 
     def copy_file(self):
@@ -1261,3 +2013,220 @@ class Curl(FileOpener):
                     if '3' in whattodo:
                         return False
         return True
+
+
+def prefetch(urls_or_requests,
+             max_parallel=8,
+             max_per_host=4,
+             silent=True,
+             cache_dir='cache',
+             revalidate=False):
+    """
+    Downloads many files in parallel into the cache, so the later
+    `Curl()` calls with the same parameters only read the cache.
+    Uses one `pycurl.CurlMulti` for all the transfers, and keeps
+    at most ``max_parallel`` transfers running at once, and at most
+    ``max_per_host`` against the same host. Files already in the
+    cache are not downloaded again. Failed transfers are retried,
+    and removed from the cache if all attempts failed.
+    Returns the list of `Curl` instances, each having its
+    `status`, `download_failed` and `cache_file_name` set.
+    Requests resulting the same cache file are downloaded once,
+    and all of them get the status of that download.
+
+    :param list urls_or_requests: URLs or dicts of keyword arguments
+        for `Curl()`, e.g. ``{'url': url, 'post': {'id': '1'}}``.
+        SFTP downloads are not supported here.
+    :param int max_parallel: Maximum number of transfers at once.
+    :param int max_per_host: Maximum number of transfers at once
+        against one host.
+    :param bool silent: Whether to show a progress indicator.
+    :param str cache_dir: Default cache directory for the requests
+        not defining it.
+    :param bool revalidate: Check the cached files with the server
+        (see `revalidate_on`), instead of using them as they are.
+    """
+    curls = []
+    for req in urls_or_requests:
+        param = {'url': req} \
+            if type(req) in common.charTypes else dict(req)
+        param.setdefault('cache_dir', cache_dir)
+        param.setdefault('revalidate', revalidate)
+        param.update({
+            'silent': True,
+            'setup': False,
+            'call': False,
+            'process': False
+        })
+        curls.append(Curl(**param))
+    queue = deque()
+    queued = {}
+    for c in curls:
+        if not c.use_cache and not DRYRUN and \
+                c.cache_file_name not in queued:
+            queue.append(c)
+            queued[c.cache_file_name] = c
+    if not queue:
+        return curls
+    prg = None if silent else progress.Progress(
+        len(queue), 'Downloading %u files' % len(queue), 1, percent=False)
+    attempts = Counter()
+    active = {}
+    locks = {}
+    per_host = Counter()
+    multi = pycurl.CurlMulti()
+
+    def finish(handle, errmsg, errno=None):
+        lock = locks.pop(handle)
+        try:
+            _finish(handle, errmsg, errno)
+        finally:
+            lock.release()
+
+    def _finish(handle, errmsg, errno):
+        c = active.pop(handle)
+        per_host[c.domain] -= 1
+        multi.remove_handle(handle)
+        if errmsg is None:
+            c.get_status()
+        else:
+            c.status = 500
+            if c.debug:
+                c.print_debug_info('ERROR', 'PycURL error: %s' % errmsg)
+        handle.close()
+        c.target.close()
+        if c.status == 200:
+            if c.check_download():
+                c.move_download()
+            else:
+                c.status = 500
+                c.remove_partial()
+        if c.status == 200 or (c.status == 304 and c.validators is not None):
+            if c.validators is not None:
+                c.revalidated()
+            if not c.use_cache:
+                c.get_type()
+                c.transcode()
+            c.update_manifest()
+            if prg is not None:
+                prg.step()
+            return None
+        # partial downloads are continued by the next attempt
+        if os.path.exists(c.target_file_name) and (
+                not c.resumable() or c.status == 416 or
+                errno == pycurl.E_RANGE_ERROR or
+                not os.path.getsize(c.target_file_name)):
+            c.remove_partial()
+        attempts[c.urlmd5] += 1
+        if attempts[c.urlmd5] < c.retries:
+            queue.append(c)
+        else:
+            if c.validators is not None:
+                c.revalidated()
+            else:
+                c.download_failed = True
+            if prg is not None:
+                prg.step()
+
+    try:
+        while queue or active:
+            for _ in xrange(len(queue)):
+                if len(active) >= max_parallel:
+                    break
+                c = queue.popleft()
+                if per_host[c.domain] >= max_per_host:
+                    queue.append(c)
+                    continue
+                lock = CacheLock(c.cache_file_name)
+                # being downloaded by another thread or process
+                if not lock.acquire(False):
+                    queue.append(c)
+                    continue
+                c.select_cache_file()
+                if c.use_cache:
+                    lock.release()
+                    if prg is not None:
+                        prg.step()
+                    continue
+                try:
+                    c.curl_setup()
+                    c.set_resume()
+                    multi.add_handle(c.curl)
+                except:
+                    lock.release()
+                    raise
+                active[c.curl] = c
+                locks[c.curl] = lock
+                per_host[c.domain] += 1
+            while True:
+                ret, nhandles = multi.perform()
+                if ret != pycurl.E_CALL_MULTI_PERFORM:
+                    break
+            while True:
+                nqueued, succeeded, failed = multi.info_read()
+                for handle in succeeded:
+                    finish(handle, None)
+                for handle, errno, errmsg in failed:
+                    finish(handle, errmsg, errno)
+                if not nqueued:
+                    break
+            if active:
+                multi.select(1.0)
+            elif queue:
+                # all the remaining files are locked by others
+                time.sleep(0.1)
+    finally:
+        # after an error or interrupt, the locks must be released,
+        # otherwise later downloads of the same files in this
+        # process would wait forever
+        for handle, c in iteritems(active):
+            multi.remove_handle(handle)
+            handle.close()
+            c.target.close()
+        for lock in locks.values():
+            lock.release()
+        active.clear()
+        locks.clear()
+        multi.close()
+        if prg is not None:
+            prg.terminate()
+    for c in curls:
+        first = queued.get(c.cache_file_name)
+        if first is not None and first is not c:
+            c.status = first.status
+            c.download_failed = first.download_failed
+            c.use_cache = first.use_cache
+    return curls
+
+
+def revalidate(urls_or_requests, **kwargs):
+    """
+    Checks the cached files of many URLs with the servers in parallel,
+    and downloads the ones which have changed. See `prefetch()` for
+    the arguments, and `revalidate_on` for the details.
+    """
+    kwargs['revalidate'] = True
+    return prefetch(urls_or_requests, **kwargs)
+
+
+def revalidate_cache(cache_dir='cache', **kwargs):
+    """
+    Checks all the files in the cache with the servers in parallel,
+    and downloads the ones which have changed, so after this all
+    the cached data is up to date. Only the files downloaded by GET
+    requests and having ETag or Last-Modified in the cache manifest
+    can be checked. See `prefetch()` for the other arguments.
+    Returns the list of `Curl` instances.
+    """
+    manifest = cache_manifest(cache_dir)
+    urls = []
+    for entry in manifest.entries():
+        if (entry['url'] is None or entry['post_md5'] is not None or
+                not (entry['etag'] or entry['last_modified'])):
+            continue
+        # only if the URL results the same cache file name
+        c = Curl(entry['url'], cache_dir=cache_dir,
+                 setup=False, call=False, process=False)
+        if os.path.basename(c.cache_file_name) == entry['name']:
+            urls.append(entry['url'])
+    return revalidate(urls, cache_dir=cache_dir, **kwargs)
@@ -2979,11 +2979,10 @@ def get_oreganno(organism='Homo sapiens'):
     result = []
     url = urls.urls['oreganno']['url']
     c = curl.Curl(url, silent=False, large=True)
-    data = c.result
-    null = data.readline()
+    data = c.iterlines()
+    null = next(data, None)
     del null
     for l in data:
-        l = l.decode('utf-8')
         if len(l) > 0:
             l = [x.strip() for x in l.split('\t')]
             if l[1] == organism and \
@@ -3119,12 +3118,11 @@ def get_go(organism=9606, swissprot='yes'):
 def get_go_goa(organism='human'):
     result = {'P': {}, 'C': {}, 'F': {}}
     url = urls.urls['goa']['url'] % (organism.upper(), organism)
-    c = curl.Curl(url, silent=False)
-    data = c.result
-    data = [
-        x.split('\t') for x in data.split('\n')
+    c = curl.Curl(url, silent=False, large=True)
+    data = (
+        x.split('\t') for x in c.iterlines()
         if not x.startswith('!') and len(x) > 0
-    ]
+    )
     for l in data:
         if l[1] not in result[l[8]]:
             result[l[8]][l[1]] = []
@@ -3139,10 +3137,9 @@ def get_go_quick(organism=9606, slim=False):
     terms = {'C': {}, 'F': {}, 'P': {}}
     names = {}
     url = urls.urls['quickgo']['url'] % (goslim, termuse, organism)
-    c = curl.Curl(url, silent=False)
-    data = c.result
-    data = [x.split('\t') for x in data.split('\n') if len(x) > 0]
-    del data[0]
+    c = curl.Curl(url, silent=False, large=True)
+    data = (x.split('\t') for x in c.iterlines() if len(x) > 0)
+    null = next(data, None)
     for l in data:
         try:
             if l[0] not in terms[l[3][0]]:
@@ -3161,10 +3158,9 @@ def get_goslim(url=None):
     rego = re.compile(r'GO:[0-9]{7}')
     url = url if type(url) in [str, unicode] \
         else urls.urls['goslim_gen']['url']
-    c = curl.Curl(url, silent=False)
-    data = c.result
+    c = curl.Curl(url, silent=False, large=True)
     result = []
-    for l in data.split('\n'):
+    for l in c.iterlines():
         if l.startswith('id:'):
             result += rego.findall(l)
     return result
@@ -3342,9 +3338,7 @@ def get_tfcensus(classes=['a', 'b', 'other']):
     reensg = re.compile(r'ENSG[0-9]{11}')
     url = urls.urls['vaquerizas2009']['url']
     c = curl.Curl(url, silent=False, large=True)
-    f = c.result
-    for l in f:
-        l = l.decode('utf-8')
+    for l in c.iterlines():
         if len(l) > 0 and l.split('\t')[0] in classes:
             ensg += reensg.findall(l)
             h = l.split('\t')[5].strip()
@@ -4087,6 +4081,8 @@ def get_kegg(mapper=None):
         m = rehsa.match(a['href'])
         if m:
             hsa_list.append((m.groups(0)[0], a.text))
+    curl.prefetch([urls.urls['kegg_pws']['kgml_url'] % hsa
+                   for hsa, pw in hsa_list])
     prg = progress.Progress(
         len(hsa_list), 'Processing KEGG Pathways', 1, percent=False)
     for hsa, pw in hsa_list:
@@ -4151,6 +4147,7 @@ def signor_pathways(**kwargs):
     urls = signor_urls()
     proteins_pathways = {}
     interactions_pathways = {}
+    curl.prefetch([url for pathw, url in urls])
     prg = progress.Progress(
         len(urls), 'Downloading data from Signor', 1, percent=False)
     for pathw, url in urls:
@@ -6199,18 +6196,15 @@ def intact_interactions(miscore=0.6, organism=9606, complex_expansion=False):
     if type(organism) is int:
         organism = '%u' % organism
     c = curl.Curl(url, silent=False, large=True, files_needed=['intact.txt'])
-    data = c.result
-    f = data['intact.txt']
     size = c.sizes['intact.txt']
     lnum = 0
     prg = progress.Progress(size, 'Reading IntAct MI-tab file', 99)
-    for l in f:
-        prg.step(len(l))
+    for l in c.iterlines(member='intact.txt'):
+        prg.step(len(l) + 1)
         if lnum == 0:
             lnum += 1
             continue
-        l = l.decode('utf-8')
-        l = l.replace('\n', '').replace('\r', '').strip()
+        l = l.replace('\r', '').strip()
         l = l.split('\t')
         tax1 = '0' if l[9] == '-' \
             else l[9].split('|')[0].split(':')[1].split('(')[0]
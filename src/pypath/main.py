@@ -36,6 +36,8 @@ except:
 
 import igraph
 import codecs
+import io
+import csv
 import random
 import textwrap
 import copy
@@ -44,6 +46,7 @@ import operator
 import locale
 import heapq
 import threading
+import multiprocessing
 import traceback
 import itertools
 from itertools import chain
@@ -105,64 +108,274 @@ if 'unicode' not in __builtins__:
     unicode = str
 
 __all__ = [
-    'PyPath', 'Direction', '__version__', 'a', 'AttrHelper', 'ReferenceList'
+    'PyPath', 'Direction', '__version__', 'a', 'AttrHelper', 'ReferenceList',
+    'SourceRegistry', 'source_registry'
 ]
 
+# the PyPath instance inherited by the worker processes
+# of `PyPath.load_resources(workers = N)`
+_worker_pypath = None
+
+
+def _read_resource_worker(args):
+    """
+    Reads and maps one resource in a worker process forked by
+    `PyPath.load_resources()`. Returns the mapped edge list, or
+    `None` and the traceback if an error occurred.
+    """
+    settings, cache_files, reread, redownload = args
+    pa = _worker_pypath
+    try:
+        pa.raw_data = None
+        pa.read_data_file(
+            settings,
+            cache_files=cache_files,
+            reread=reread,
+            redownload=redownload)
+        return pa.raw_data, None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+class SourceRegistry(object):
+    """
+    Assigns an integer bit to each resource name, so sets of resources
+    can be stored as integer bitmasks. Bits are assigned in the order
+    the names are first seen, and are only valid within the current
+    process: anything persisted should store the names.
+    """
+
+    def __init__(self):
+        self.bits = {}
+        self.names_by_bit = []
+        self._names_cache = {0: frozenset([])}
+
+    def __len__(self):
+        return len(self.names_by_bit)
+
+    def __contains__(self, name):
+        return name in self.bits
+
+    def bit(self, name):
+        """
+        Returns the index of the bit of one resource,
+        registers the resource if it is new.
+        """
+        if name not in self.bits:
+            self.bits[name] = len(self.names_by_bit)
+            self.names_by_bit.append(name)
+        return self.bits[name]
+
+    def mask(self, sources):
+        """
+        Returns the bitmask of one resource name or an iterable
+        of resource names.
+        """
+        if type(sources) in common.charTypes:
+            return 1 << self.bit(sources)
+        mask = 0
+        for name in sources:
+            mask |= 1 << self.bit(name)
+        return mask
+
+    def names(self, mask):
+        """
+        Returns the set of resource names in a bitmask.
+        """
+        if mask not in self._names_cache:
+            self._names_cache[mask] = frozenset(
+                name for i, name in enumerate(self.names_by_bit)
+                if mask >> i & 1)
+        return set(self._names_cache[mask])
+
+    def count(self, masks):
+        """
+        Counts the occurrences of each resource in an iterable of
+        bitmasks. Returns an array indexed by the bits.
+        """
+        counts = np.zeros(len(self), dtype=np.int64)
+        for mask, n in iteritems(Counter(masks)):
+            i = 0
+            while mask:
+                if mask & 1:
+                    counts[i] += n
+                mask >>= 1
+                i += 1
+        return counts
+
+
+source_registry = SourceRegistry()
+
 
 class Direction(object):
+    """
+    Directions and signs of one interaction, and the resources
+    supporting them. Directions are coded as indices
+    (0: straight, 1: reverse, 2: undirected), resources as bitmasks
+    according to the module level `source_registry`. The `dirs`,
+    `sources`, `positive`, `negative`, `positive_sources` and
+    `negative_sources` attributes are dicts built on access, keyed
+    by direction tuples and `'undirected'`, as in earlier versions.
+    """
+
+    __slots__ = ['straight', 'reverse', '_flags', '_sources', '_positive',
+                 '_negative', '_mechanisms', '_methods']
+
+    # bits of `_flags`: directions, then positive and negative signs
+    _DIR_FLAG = (1, 2, 4)
+    _POS_FLAG = (8, 16)
+    _NEG_FLAG = (32, 64)
+
     def __init__(self, nameA, nameB):
-        self.nodes = [nameA, nameB]
-        self.nodes.sort()
-        self.straight = (self.nodes[0], self.nodes[1])
-        self.reverse = (self.nodes[1], self.nodes[0])
-        self.dirs = {
-            self.straight: False,
-            self.reverse: False,
-            'undirected': False
-        }
-        self.sources = {
-            self.straight: set([]),
-            self.reverse: set([]),
-            'undirected': set([])
-        }
-        self.positive = {self.straight: False, self.reverse: False}
-        self.negative = {self.straight: False, self.reverse: False}
-        self.positive_sources = {self.straight: set([]), self.reverse: set([])}
-        self.negative_sources = {self.straight: set([]), self.reverse: set([])}
-        self.mechanisms = {}
-        self.methods = {}
+        nodes = sorted([nameA, nameB])
+        self.straight = (nodes[0], nodes[1])
+        self.reverse = (nodes[1], nodes[0])
+        self._flags = 0
+        self._sources = [0, 0, 0]
+        self._positive = [0, 0]
+        self._negative = [0, 0]
+        self._mechanisms = None
+        self._methods = None
+
+    def __getstate__(self):
+        names = source_registry.names
+        return (self.straight, self._flags,
+                [sorted(names(m)) for m in self._sources],
+                [sorted(names(m)) for m in self._positive],
+                [sorted(names(m)) for m in self._negative],
+                self._mechanisms, self._methods)
+
+    def __setstate__(self, state):
+        mask = source_registry.mask
+        if isinstance(state, tuple) and len(state) == 2:
+            # default state of slotted objects: (__dict__, slots)
+            state = state[0] or state[1]
+        if isinstance(state, dict):
+            # pickled by the earlier, dict based version of this class
+            self.__init__(*state['nodes'])
+            for i, di in self._keys():
+                if state['dirs'].get(di):
+                    self._flags |= self._DIR_FLAG[i]
+                self._sources[i] = mask(state['sources'].get(di, ()))
+                if i < 2:
+                    if state['positive'].get(di):
+                        self._flags |= self._POS_FLAG[i]
+                    if state['negative'].get(di):
+                        self._flags |= self._NEG_FLAG[i]
+                    self._positive[i] = \
+                        mask(state['positive_sources'].get(di, ()))
+                    self._negative[i] = \
+                        mask(state['negative_sources'].get(di, ()))
+            self._mechanisms = state.get('mechanisms') or None
+            self._methods = state.get('methods') or None
+        else:
+            straight, flags, sources, positive, negative, \
+                mechanisms, methods = state
+            self.__init__(*straight)
+            self._flags = flags
+            self._sources = [mask(s) for s in sources]
+            self._positive = [mask(s) for s in positive]
+            self._negative = [mask(s) for s in negative]
+            self._mechanisms = mechanisms
+            self._methods = methods
+
+    def _index(self, direction):
+        if direction == 'undirected':
+            return 2
+        if direction == self.straight:
+            return 0
+        if direction == self.reverse:
+            return 1
+        raise KeyError(direction)
+
+    def _keys(self):
+        """
+        Indices and keys of the directions. For loop edges straight
+        and reverse are the same.
+        """
+        if self.straight == self.reverse:
+            return [(0, self.straight), (2, 'undirected')]
+        return [(0, self.straight), (1, self.reverse), (2, 'undirected')]
+
+    def _dict(self, values, undirected=True):
+        return dict((di, values(i)) for i, di in self._keys()
+                    if undirected or i < 2)
+
+    @property
+    def nodes(self):
+        return list(self.straight)
+
+    @property
+    def dirs(self):
+        return self._dict(lambda i: bool(self._flags & self._DIR_FLAG[i]))
+
+    @property
+    def sources(self):
+        return self._dict(lambda i: source_registry.names(self._sources[i]))
+
+    @property
+    def positive(self):
+        return self._dict(
+            lambda i: bool(self._flags & self._POS_FLAG[i]), False)
+
+    @property
+    def negative(self):
+        return self._dict(
+            lambda i: bool(self._flags & self._NEG_FLAG[i]), False)
+
+    @property
+    def positive_sources(self):
+        return self._dict(
+            lambda i: source_registry.names(self._positive[i]), False)
+
+    @property
+    def negative_sources(self):
+        return self._dict(
+            lambda i: source_registry.names(self._negative[i]), False)
+
+    @property
+    def mechanisms(self):
+        if self._mechanisms is None:
+            self._mechanisms = {}
+        return self._mechanisms
+
+    @property
+    def methods(self):
+        if self._methods is None:
+            self._methods = {}
+        return self._methods
 
     def __str__(self):
         s = 'Directions and signs of interaction between %s and %s\n\n' % \
             (self.nodes[0], self.nodes[1])
-        if self.dirs[self.straight]:
+        if self.get_dir(self.straight):
             s += '\t%s ===> %s :: %s\n' % \
                 (self.nodes[0], self.nodes[1], ', '.join(
-                    self.sources[self.straight]))
-        if self.dirs[self.reverse]:
+                    self.sources_straight()))
+        if self.get_dir(self.reverse):
             s += '\t%s <=== %s :: %s\n' % \
                 (self.nodes[0], self.nodes[1],
-                 ', '.join(self.sources[self.reverse]))
-        if self.dirs['undirected']:
+                 ', '.join(self.sources_reverse()))
+        if self.get_dir('undirected'):
             s += '\t%s ==== %s :: %s\n' % \
                 (self.nodes[0], self.nodes[1],
-                 ', '.join(self.sources['undirected']))
-        if self.positive[self.straight]:
+                 ', '.join(self.sources_undirected()))
+        if self.positive_straight():
             s += '\t%s =+=> %s :: %s\n' % (
                 self.nodes[0], self.nodes[1],
-                ', '.join(self.positive_sources[self.straight]))
-        if self.positive[self.reverse]:
+                ', '.join(self.positive_sources_straight()))
+        if self.positive_reverse():
             s += '\t%s <=+= %s :: %s\n' % (
                 self.nodes[0], self.nodes[1],
-                ', '.join(self.positive_sources[self.reverse]))
-        if self.negative[self.straight]:
+                ', '.join(self.positive_sources_reverse()))
+        if self.negative_straight():
             s += '\t%s =-=> %s :: %s\n' % (
                 self.nodes[0], self.nodes[1],
-                ', '.join(self.negative_sources[self.straight]))
-        if self.negative[self.reverse]:
+                ', '.join(self.negative_sources_straight()))
+        if self.negative_reverse():
             s += '\t%s <=-= %s :: %s\n' % (
                 self.nodes[0], self.nodes[1],
-                ', '.join(self.negative_sources[self.reverse]))
+                ', '.join(self.negative_sources_reverse()))
         return s
 
     def reload(self):
@@ -173,7 +386,7 @@ class Direction(object):
         setattr(self, '__class__', new)
     
     def check_nodes(self, nodes):
-        return not bool(len(set(self.nodes) - set(nodes)))
+        return not bool(len(set(self.straight) - set(nodes)))
     
     def check_param(self, di):
         return (di == 'undirected' or (isinstance(di, tuple) and
@@ -185,19 +398,21 @@ class Direction(object):
         the corresponding data source named.
         '''
         if self.check_param(direction) and len(source):
-            self.dirs[direction] = True
+            i = self._index(direction)
+            self._flags |= self._DIR_FLAG[i]
             source = common.addToSet(set([]), source)
-            self.sources[direction] = self.sources[direction] | source
+            self._sources[i] |= source_registry.mask(source)
 
     def get_dir(self, direction, sources=False):
         '''
         Returns boolean or list of sources
         '''
         if self.check_param(direction):
+            i = self._index(direction)
             if sources:
-                return self.sources[direction]
+                return source_registry.names(self._sources[i])
             else:
-                return self.dirs[direction]
+                return bool(self._flags & self._DIR_FLAG[i])
         else:
             return None
 
@@ -208,113 +423,100 @@ class Direction(object):
         '''
         query = (src, tgt)
         if self.check_nodes(query):
-            if sources:
-                return [
-                    self.sources[query], self.sources[(query[1], query[0])],
-                    self.sources['undirected']
-                ]
-            else:
-                return [
-                    self.dirs[query], self.dirs[(query[1], query[0])],
-                    self.dirs['undirected']
-                ]
+            return [
+                self.get_dir(query, sources=sources),
+                self.get_dir((query[1], query[0]), sources=sources),
+                self.get_dir('undirected', sources=sources)
+            ]
         else:
             return None
 
     def which_dirs(self):
-        return [d for d, s in iteritems(self.dirs) if s and d != 'undirected']
+        return [
+            di for i, di in self._keys()
+            if i < 2 and self._flags & self._DIR_FLAG[i]
+        ]
 
     def unset_dir(self, direction, source=None):
         '''
         Removes directionality information,
         or single source.
         '''
-        if check_param(direction):
+        if self.check_param(direction):
+            i = self._index(direction)
             if source is not None:
-                try:
-                    self.sources[direction].remove(source)
-                except ValueError:
-                    pass
+                if source in source_registry:
+                    self._sources[i] &= ~source_registry.mask(source)
             else:
-                self.sources[direction] = []
-            if len(self.sources[direction]) == 0:
-                self.dirs[direction] = False
+                self._sources[i] = 0
+            if self._sources[i] == 0:
+                self._flags &= ~self._DIR_FLAG[i]
 
     def is_directed(self):
-        return bool(
-            sum([v for k, v in iteritems(self.dirs) if k != 'undirected']))
+        return bool(self._flags & (self._DIR_FLAG[0] | self._DIR_FLAG[1]))
 
     def is_stimulation(self, direction=None):
         if direction is None:
-            return bool(sum(self.positive.values()))
+            return bool(self._flags & (self._POS_FLAG[0] | self._POS_FLAG[1]))
         else:
-            return self.positive[direction]
+            return bool(self._flags & self._POS_FLAG[self._index(direction)])
 
     def is_inhibition(self, direction=None):
         if direction is None:
-            return bool(sum(self.negative.values()))
+            return bool(self._flags & (self._NEG_FLAG[0] | self._NEG_FLAG[1]))
         else:
-            return self.negative[direction]
+            return bool(self._flags & self._NEG_FLAG[self._index(direction)])
 
     def has_sign(self, direction=None):
-        if direction is None:
-            return bool(sum(self.positive.values())) or \
-                bool(sum(self.negative.values()))
-        else:
-            return self.negative[direction] or self.positive[direction]
+        return self.is_stimulation(direction) or \
+            self.is_inhibition(direction)
 
     def set_sign(self, direction, sign, source):
         if self.check_nodes(direction) and len(source):
             self.set_dir(direction, source)
-            source = common.addToSet(set([]), source)
+            i = self._index(direction)
+            source = source_registry.mask(common.addToSet(set([]), source))
             if sign == 'positive':
-                self.positive[direction] = True
-                self.positive_sources[direction] = \
-                    self.positive_sources[direction] | source
+                self._flags |= self._POS_FLAG[i]
+                self._positive[i] |= source
             else:
-                self.negative[direction] = True
-                self.negative_sources[direction] = \
-                    self.negative_sources[direction] | source
+                self._flags |= self._NEG_FLAG[i]
+                self._negative[i] |= source
 
     def get_sign(self, direction, sign=None, sources=False):
         if self.check_nodes(direction):
+            i = self._index(direction)
             if sources:
-                if sign == 'positive':
-                    return self.positive_sources[direction]
-                elif sign == 'negative':
-                    return self.negative_sources[direction]
-                else:
-                    return [
-                        self.positive_sources[direction],
-                        self.negative_sources[direction]
-                    ]
+                positive = source_registry.names(self._positive[i])
+                negative = source_registry.names(self._negative[i])
             else:
-                if sign == 'positive':
-                    return self.positive[direction]
-                elif sign == 'negative':
-                    return self.negative[direction]
-                else:
-                    return [self.positive[direction], self.negative[direction]]
+                positive = bool(self._flags & self._POS_FLAG[i])
+                negative = bool(self._flags & self._NEG_FLAG[i])
+            if sign == 'positive':
+                return positive
+            elif sign == 'negative':
+                return negative
+            else:
+                return [positive, negative]
 
     def unset_sign(self, direction, sign, source=None):
         if self.check_nodes(direction):
+            i = self._index(direction)
             if source is not None:
-                try:
+                if source in source_registry:
                     if sign == 'positive':
-                        self.positive_sources[direction].remove(source)
+                        self._positive[i] &= ~source_registry.mask(source)
                     if sign == 'negative':
-                        self.negative_sources[direction].remove(source)
-                except:
-                    pass
+                        self._negative[i] &= ~source_registry.mask(source)
             else:
                 if sign == 'positive':
-                    self.positive_sources[direction] = []
+                    self._positive[i] = 0
                 if sign == 'negative':
-                    self.negative_sources[direction] = []
-            if len(self.positive_sources[direction]) == 0:
-                self.positive[direction] = False
-            if len(self.negative_sources[direction]) == 0:
-                self.negative[direction] = False
+                    self._negative[i] = 0
+            if self._positive[i] == 0:
+                self._flags &= ~self._POS_FLAG[i]
+            if self._negative[i] == 0:
+                self._flags &= ~self._NEG_FLAG[i]
 
     def src(self):
         '''
@@ -323,63 +525,62 @@ class Direction(object):
         list will contain 2 IDs. If the interaction is undirec-
         ted, an empty list will be returned.
         '''
-        return [
-            k[0] for k, v in iteritems(self.dirs) if k != 'undirected' and v
-        ]
+        return [di[0] for di in self.which_dirs()]
 
     def tgt(self):
         '''
         Returns the IDs of the target moleculess in the inter-
         action. Same behaviour as `Direction.src()`.
         '''
-        return [
-            k[1] for k, v in iteritems(self.dirs) if k != 'undirected' and v
-        ]
+        return [di[1] for di in self.which_dirs()]
 
     def src_by_source(self, source):
         return [
-            k[0] for k, v in iteritems(self.sources)
-            if k != 'undirected' and source in v
+            di[0] for i, di in self._keys()
+            if i < 2 and source in self.get_dir(di, sources=True)
         ]
 
     def tgt_by_source(self, source):
         return [
-            k[1] for k, v in iteritems(self.sources)
-            if k != 'undirected' and source in v
+            di[1] for i, di in self._keys()
+            if i < 2 and source in self.get_dir(di, sources=True)
         ]
 
     def sources_straight(self):
-        return self.sources[self.straight]
+        return self.get_dir(self.straight, sources=True)
 
     def sources_reverse(self):
-        return self.sources[self.reverse]
+        return self.get_dir(self.reverse, sources=True)
 
     def sources_undirected(self):
-        return self.sources['undirected']
+        return self.get_dir('undirected', sources=True)
 
     def positive_straight(self):
-        return self.positive[self.straight]
+        return self.get_sign(self.straight, 'positive')
 
     def positive_reverse(self):
-        return self.positive[self.reverese]
+        return self.get_sign(self.reverse, 'positive')
 
     def negative_straight(self):
-        return self.negative[self.straight]
+        return self.get_sign(self.straight, 'negative')
 
     def negative_reverse(self):
-        return self.negative[self.reverese]
+        return self.get_sign(self.reverse, 'negative')
 
     def negative_sources_straight(self):
-        return self.negative_sources[self.straight]
+        return self.get_sign(self.straight, 'negative', sources=True)
 
     def negative_sources_reverse(self):
-        return self.negative_sources[self.reverse]
+        return self.get_sign(self.reverse, 'negative', sources=True)
 
     def positive_sources_straight(self):
-        return self.positive_sources[self.straight]
+        return self.get_sign(self.straight, 'positive', sources=True)
 
     def positive_sources_reverse(self):
-        return self.positive_sources[self.reverse]
+        return self.get_sign(self.reverse, 'positive', sources=True)
+
+    def _count(self, mask):
+        return bin(mask).count('1')
 
     def majority_dir(self):
         """
@@ -390,11 +591,11 @@ class Direction(object):
         more sources.
         """
         if self.is_directed():
-            if len(self.sources[self.straight]) == len(self.sources[
-                    self.reverse]):
+            straight = self._count(self._sources[self._index(self.straight)])
+            reverse = self._count(self._sources[self._index(self.reverse)])
+            if straight == reverse:
                 return None
-            elif len(self.sources[self.straight]) > len(self.sources[
-                    self.reverse]):
+            elif straight > reverse:
                 return self.straight
             else:
                 return self.reverse
@@ -410,18 +611,12 @@ class Direction(object):
         value is the same for inhibition.
         """
         result = {self.straight: None, self.reverse: None}
-        if self.has_sign(direction=self.straight):
-            pos = len(self.positive_sources[self.straight]) >= len(
-                self.negative_sources[self.straight])
-            neg = len(self.positive_sources[self.straight]) <= len(
-                self.negative_sources[self.straight])
-            result[self.straight] = [pos, neg]
-        if self.has_sign(direction=self.reverse):
-            pos = len(self.positive_sources[self.reverse]) >= len(
-                self.negative_sources[self.reverse])
-            neg = len(self.positive_sources[self.reverse]) <= len(
-                self.negative_sources[self.reverse])
-            result[self.reverse] = [pos, neg]
+        for di in [self.straight, self.reverse]:
+            if self.has_sign(direction=di):
+                i = self._index(di)
+                npos = self._count(self._positive[i])
+                nneg = self._count(self._negative[i])
+                result[di] = [npos >= nneg, npos <= nneg]
         return result
 
     def consensus_edges(self):
@@ -470,28 +665,17 @@ class Direction(object):
     def merge(self, other):
         if other.__class__.__name__ == 'Direction' and self.check_nodes(
                 other.nodes):
-            self.dirs[self.straight] = self.dirs[self.straight] or \
-                other.dirs[self.straight]
-            self.dirs[self.reverse] = self.dirs[self.reverse] or \
-                other.dirs[self.reverse]
-            self.dirs['undirected'] = self.dirs['undirected'] or \
-                other.dirs['undirected']
-            self.sources[self.straight] = self.sources[self.straight] | \
-                other.sources[self.straight]
-            self.sources[self.reverse] = self.sources[self.reverse] | \
-                other.sources[self.reverse]
-            self.sources['undirected'] = self.sources['undirected'] | \
-                other.sources['undirected']
-            self.positive[self.straight] = self.positive[self.straight] or \
-                other.positive[self.straight]
-            self.negative[self.reverse] = self.negative[self.reverse] or \
-                other.negative[self.reverse]
-            self.positive_sources[self.straight] = \
-                                 self.positive_sources[self.straight] | \
-                                other.positive_sources[self.straight]
-            self.negative_sources[self.reverse] = \
-                                 self.negative_sources[self.reverse] | \
-                                other.negative_sources[self.reverse]
+            for i in xrange(3):
+                self._flags |= other._flags & self._DIR_FLAG[i]
+                self._sources[i] |= other._sources[i]
+            # as in earlier versions, only the positive sign of the
+            # straight and the negative sign of the reverse direction
+            # are merged
+            r = self._index(self.reverse)
+            self._flags |= other._flags & self._POS_FLAG[0]
+            self._positive[0] |= other._positive[0]
+            self._flags |= other._flags & self._NEG_FLAG[r]
+            self._negative[r] |= other._negative[r]
     
     def translate(self, ids):
         # new Direction object
@@ -597,6 +781,103 @@ class _NamedVertexSeq(object):
     vs = __iter__
 
 
+class _VertexIndex(object):
+    '''
+    Lookup tables between the names, labels and indices of the
+    vertices of one graph. The tables are kept up to date by the
+    methods changing the vertices: `append()` registers the vertices
+    added to the end of the graph, these are read at the next
+    lookup, `deleted()` and `relabel()` update the tables from the
+    indices of the deleted or relabelled vertices, without reading
+    the attributes of the other vertices. `invalidate()` rebuilds
+    the tables from scratch at the next lookup, after any other
+    change.
+    '''
+
+    def __init__(self):
+        self.graph = None
+        self.stale = True
+        self.pending = False
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.nodInd = set([])
+        self.nodDct = {}
+        self.labDct = {}
+        self.nodNam = {}
+        self.nodLab = {}
+
+    def invalidate(self, graph):
+        self.graph = graph
+        self.stale = True
+
+    def append(self, graph):
+        if graph is not self.graph:
+            self.invalidate(graph)
+        self.pending = True
+
+    def get(self, table):
+        if self.graph is None:
+            raise AttributeError(table)
+        if self.stale or self.pending:
+            self.update()
+        return getattr(self, table)
+
+    def update(self):
+        g = self.graph
+        vcount = g.vcount()
+        if self.stale or vcount < self.count:
+            self.reset()
+        if vcount > self.count:
+            vs = g.vs.select(xrange(self.count, vcount))
+            self.add(vs['name'], vs['label'])
+        self.stale = False
+        self.pending = False
+
+    def add(self, names, labels):
+        for i, name, label in zip(
+                xrange(self.count, self.count + len(names)), names, labels):
+            self.nodDct[name] = i
+            self.nodNam[i] = name
+            self.labDct[label] = i
+            self.nodLab[i] = label
+        self.nodInd.update(names)
+        self.count += len(names)
+
+    def deleted(self, indices):
+        '''
+        Removes the vertices deleted from the graph by their
+        original indices, and renumbers the remaining ones.
+        '''
+        indices = set(indices)
+        if (self.stale or self.pending or
+                self.graph.vcount() + len(indices) != self.count):
+            # the tables do not describe the graph before the deletion
+            self.stale = True
+            return
+        keep = [i for i in xrange(self.count) if i not in indices]
+        names = [self.nodNam[i] for i in keep]
+        labels = [self.nodLab[i] for i in keep]
+        self.reset()
+        self.add(names, labels)
+
+    def relabel(self, indices, labels):
+        '''
+        Updates the labels of the vertices at `indices`.
+        '''
+        if self.stale:
+            return
+        for i, label in zip(indices, labels):
+            if i >= self.count:
+                continue
+            old = self.nodLab[i]
+            if self.labDct.get(old) == i:
+                del self.labDct[old]
+            self.nodLab[i] = label
+            self.labDct[label] = i
+
+
 class PyPath(object):
 
     ###
@@ -786,6 +1067,7 @@ class PyPath(object):
                         '%u edges.\n' % (' ' * 90, pfile, self.graph.vcount(),
                                          self.graph.ecount()))
                     sys.stdout.flush()
+                    self.intern_references()
                     self.update_vname()
                     self.update_vindex()
                     self.update_sources()
@@ -803,6 +1085,21 @@ class PyPath(object):
                 (' ' * 90, pfile))
             sys.stdout.flush()
 
+    def intern_references(self):
+        '''
+        Replaces the references of the edges by the interned
+        `refs.Reference` instances, i.e. one object for each PubMed ID.
+        Networks pickled by earlier versions contain a separate object
+        for each occurrence of a reference.
+        '''
+        for attr in ('references', 'negative_refs', 'refs_by_source',
+                     'refs_by_type', 'refs_by_dir', 'refs_by_cat'):
+            if attr in self.graph.es.attributes():
+                self.graph.es[attr] = [
+                    _refs.intern_references(value)
+                    for value in self.graph.es[attr]
+                ]
+
     def save_network(self, pfile=None):
         pfile = pfile if pfile is not None \
             else os.path.join('cache', 'default_network.pickle')
@@ -898,7 +1195,7 @@ class PyPath(object):
         common.console(':: Nodes in giant component: %u' %
                        in_giant.count(True))
         toDel = [i for i in xrange(0, gg.vcount()) if not in_giant[i]]
-        gg.delete_vertices(toDel)
+        self._delete_vertices(gg, toDel)
         common.console(':: Giant component size: %u edges, %u nodes' %
                        (gg.ecount(), gg.vcount()))
         if not replace:
@@ -910,28 +1207,70 @@ class PyPath(object):
         hold in a list and a dict as well. However, every time
         new nodes are added, these should be updated. This
         function is automatically called after all operations
-        affecting node indices.
+        affecting node indices. Only the vertices added since the
+        last call are labelled and added to the lookup tables,
+        deleted vertices are removed from the tables by
+        `_delete_vertices()`.
         '''
-        self.genesymbol_labels()
         graph = self._get_undirected()
         self._already_has_directed()
         dgraph = self._directed
-        if graph is not None:
-            self.nodInd = set(graph.vs['name'])
-            self.nodDct = dict(zip(graph.vs['name'], xrange(graph.vcount())))
-            self.labDct = dict(zip(graph.vs['label'], xrange(graph.vcount())))
-            self.nodNam = dict(zip(xrange(graph.vcount()), graph.vs['name']))
-            self.nodLab = dict(zip(xrange(graph.vcount()), graph.vs['label']))
-        if dgraph is not None:
-            self.dnodInd = set(dgraph.vs['name'])
-            self.dnodDct = dict(
-                zip(dgraph.vs['name'], xrange(dgraph.vcount())))
-            self.dlabDct = dict(
-                zip(dgraph.vs['label'], xrange(dgraph.vcount())))
-            self.dnodNam = dict(
-                zip(xrange(dgraph.vcount()), dgraph.vs['name']))
-            self.dnodLab = dict(
-                zip(xrange(dgraph.vcount()), dgraph.vs['label']))
+        for g, directed in ((graph, False), (dgraph, True)):
+            if g is None:
+                continue
+            index = self._vertex_index(directed=directed)
+            if index.graph is g and not index.stale:
+                if g.vcount() > index.count:
+                    self.genesymbol_labels(
+                        graph=g, vids=xrange(index.count, g.vcount()))
+            else:
+                self.genesymbol_labels(graph=g)
+            index.append(g)
+
+    def _vertex_index(self, directed=False):
+        '''
+        Returns the `_VertexIndex` of the undirected or directed graph.
+        '''
+        attr = '_dvindex' if directed else '_vindex'
+        if attr not in self.__dict__:
+            self.__dict__[attr] = _VertexIndex()
+        return self.__dict__[attr]
+
+    def _vertex_indices(self, graph):
+        '''
+        Returns the `_VertexIndex` objects of `graph`.
+        '''
+        return [
+            index for index in (self.__dict__.get('_vindex'),
+                                self.__dict__.get('_dvindex'))
+            if index is not None and index.graph is graph
+        ]
+
+    def _delete_vertices(self, graph, vids):
+        '''
+        Deletes vertices from `graph` and removes them from the
+        vertex lookup tables.
+
+        @graph : igraph.Graph
+            The graph.
+        @vids : list
+            Indices of the vertices to delete.
+        '''
+        vids = list(vids)
+        graph.delete_vertices(vids)
+        for index in self._vertex_indices(graph):
+            index.deleted(vids)
+
+    nodInd = property(lambda self: self._vertex_index().get('nodInd'))
+    nodDct = property(lambda self: self._vertex_index().get('nodDct'))
+    labDct = property(lambda self: self._vertex_index().get('labDct'))
+    nodNam = property(lambda self: self._vertex_index().get('nodNam'))
+    nodLab = property(lambda self: self._vertex_index().get('nodLab'))
+    dnodInd = property(lambda self: self._vertex_index(True).get('nodInd'))
+    dnodDct = property(lambda self: self._vertex_index(True).get('nodDct'))
+    dlabDct = property(lambda self: self._vertex_index(True).get('labDct'))
+    dnodNam = property(lambda self: self._vertex_index(True).get('nodNam'))
+    dnodLab = property(lambda self: self._vertex_index(True).get('nodLab'))
 
     def vsgs(self):
         return _NamedVertexSeq(self.graph.vs, self.nodNam, self.nodLab).gs()
@@ -943,8 +1282,7 @@ class PyPath(object):
         '''
         This is deprecated.
         '''
-        self.nodNam = dict(
-            zip(range(0, self.graph.vcount()), self.graph.vs['name']))
+        self._vertex_index().invalidate(self.graph)
 
     def vertex_pathways(self):
         '''
@@ -984,21 +1322,43 @@ class PyPath(object):
                 return True
         return False
 
-    def lookup_cache(self, name, cache_files, int_cache, edges_cache):
-        infile = None
-        edgeListMapped = []
+    def resource_cache_files(self, name):
+        '''
+        Returns the paths of the cached interactions and of the cached
+        mapped edges of the resource `name` (lower case).
+        '''
+        return (os.path.join('cache', '%s.interactions.pickle' % name),
+                os.path.join('cache', '%s.edges.pickle' % name))
+
+    def find_cache(self, name, cache_files):
+        '''
+        Returns the type (`interactions` or `edges`) and the path of
+        the cache of the resource `name` read by `lookup_cache()`, or
+        None if the resource has not been cached.
+        '''
+        int_cache, edges_cache = self.resource_cache_files(name)
         cache_file = cache_files[name] if name in cache_files else None
         if cache_file is not None and os.path.exists(cache_file):
             cache_type = cache_file.split('.')[-2]
             if cache_type == 'interactions':
-                infile = self.read_from_cache(int_cache)
+                return cache_type, int_cache
             elif cache_type == 'edges':
-                edgeListMapped = self.read_from_cache(edges_cache)
+                return cache_type, edges_cache
         elif os.path.exists(edges_cache):
-            edgeListMapped = self.read_from_cache(edges_cache)
-        else:
-            if os.path.exists(int_cache):
-                infile = self.read_from_cache(int_cache)
+            return 'edges', edges_cache
+        elif os.path.exists(int_cache):
+            return 'interactions', int_cache
+        return None
+
+    def lookup_cache(self, name, cache_files):
+        infile = None
+        edgeListMapped = []
+        cache = self.find_cache(name, cache_files)
+        if cache is not None:
+            if cache[0] == 'interactions':
+                infile = self.read_from_cache(cache[1])
+            else:
+                edgeListMapped = self.read_from_cache(cache[1])
         return infile, edgeListMapped
 
     def read_from_cache(self, cache_file):
@@ -1032,7 +1392,10 @@ class PyPath(object):
                        keep_raw=False,
                        cache_files={},
                        reread=False,
-                       redownload=False):
+                       redownload=False,
+                       stream=False,
+                       columnar=True,
+                       chunk_size=100000):
         '''
         Interaction data with node and edge attributes can be read
         from simple text based files. This function works not only
@@ -1047,18 +1410,28 @@ class PyPath(object):
         @keep_raw : boolean
             To keep the raw data read by this function, in order for
             debugging purposes, or further use.
+        @stream : bool
+            Do not build the edge lists in memory: `raw_data` will be
+            a generator of mapped edges, reading and mapping the input
+            line by line while it is consumed (see `load_resource()`).
+            In this mode the mapped edges are not saved to the cache,
+            `keep_raw` has no effect, and resources marked as `huge`
+            are processed without asking.
+        @chunk_size : int
+            Number of records mapped at once in `stream` mode.
+        @columnar : bool
+            Read tables from files and URLs by `read_data_columns()`
+            if possible. Otherwise, and for inputs from functions, the
+            lines are processed one by one.
         '''
-        listLike = set([list, tuple])
-        edgeList = []
-        nodeList = []
         edgeListMapped = []
         infile = None
+        records = None
+        stats = {}
         _name = settings.name.lower()
-        int_cache = os.path.join('cache', '%s.interactions.pickle' % _name)
-        edges_cache = os.path.join('cache', '%s.edges.pickle' % _name)
+        edges_cache = self.resource_cache_files(_name)[1]
         if not reread and not redownload:
-            infile, edgeListMapped = self.lookup_cache(_name, cache_files,
-                                                       int_cache, edges_cache)
+            infile, edgeListMapped = self.lookup_cache(_name, cache_files)
         if not len(edgeListMapped):
             if infile is None:
                 if settings.__class__.__name__ != "ReadSettings":
@@ -1066,7 +1439,7 @@ class PyPath(object):
                         """No proper input file definition!\n\'settings\'
                         should be a \'ReadSettings\' instance\n"""), 'ERROR')
                     return None
-                if settings.huge:
+                if settings.huge and not stream:
                     sys.stdout.write(
                         '\n\tProcessing %s requires huge memory.\n'
                         '\tPlease hit `y` if you have at least 2G free memory,\n'
@@ -1100,11 +1473,19 @@ class PyPath(object):
                         silent=False,
                         large=True,
                         cache=curl_use_cache)
-                    infile = c.result
-                    infile = [
-                        x for x in infile.read().replace('\r', '').split('\n')
-                        if len(x) > 0
-                    ]
+                    if not stream and columnar and \
+                            hasattr(c.result, 'read') and \
+                            hasattr(c.result, 'seek'):
+                        records = self.read_data_columns(
+                            settings, c.result, stats, nonempty=True)
+                        if records is None:
+                            c.result.seek(0)
+                    if stream:
+                        infile = self.iter_lines(c)
+                    elif records is None:
+                        infile = list(self.iter_lines(c))
+                    else:
+                        infile = []
                     self.ownlog.msg(2, "Retrieving data from%s ..." %
                                     settings.inFile)
                 # elif hasattr(dataio, settings.inFile):
@@ -1135,181 +1516,30 @@ class PyPath(object):
                             sys.stdout.flush()
                     curl.CACHE = _store_cache
                 elif os.path.isfile(settings.inFile):
+                    if columnar and not stream:
+                        with open(settings.inFile, 'rb') as fp:
+                            records = self.read_data_columns(
+                                settings, fp, stats)
                     infile = codecs.open(
-                        settings.inFile, encoding='utf-8', mode='r')
+                        settings.inFile, encoding='utf-8', mode='r') \
+                        if records is None else []
                     self.ownlog.msg(2, "%s opened..." % settings.inFile)
                 if infile is None:
                     self.ownlog.msg(2, "%s: No such file or "
                                     "dataio function! :(\n" %
                                     (settings.inFile), 'ERROR')
                     return None
-            # finding the largest referred column number,
-            # to avoid references out of range
-            isDir = settings.isDirected
-            sign = settings.sign
-            refCol = settings.refs[0] if isinstance(settings.refs, tuple) \
-                else settings.refs if isinstance(settings.refs, int) else None
-            refSep = settings.refs[1] if isinstance(settings.refs,
-                                                    tuple) else ';'
-            sigCol = None if not isinstance(sign, tuple) else sign[0]
-            dirCol = None
-            dirVal = None
-            dirSep = None
-            if isinstance(isDir, tuple):
-                dirCol = isDir[0]
-                dirVal = isDir[1]
-                dirSep = isDir[2] if len(isDir) > 2 else None
-            elif isinstance(sign, tuple):
-                dirCol = sign[0]
-                dirVal = sign[1:3]
-                dirVal = dirVal if type(dirVal[
-                    0]) in common.simpleTypes else common.flatList(dirVal)
-                dirSep = sign[3] if len(sign) > 3 else None
-            dirVal = set(dirVal if isinstance(dirVal, list) else [dirVal])
-            maxCol = max(
-                filter(
-                    lambda i: i is not None, [
-                        settings.nameColA, settings.nameColB, self.get_max(
-                            settings.extraEdgeAttrs),
-                        self.get_max(settings.extraNodeAttrsA), self.get_max(
-                            settings.extraNodeAttrsB), refCol, dirCol, sigCol,
-                        max(itertools.chain(
-                            map(lambda x: x[0],
-                                settings.positiveFilters),
-                            [0])),
-                        max(itertools.chain(
-                            map(lambda x: x[0],
-                                settings.negativeFilters),
-                            [0]))
-                    ]))
-            # iterating lines from input file
-            lnum = 0
-            lFiltered = 0
-            rFiltered = 0
-            tFiltered = 0
-            readError = 0
-            for line in infile:
-                lnum += 1
-                if len(line) <= 1 or (lnum == 1 and settings.header):
-                    # empty lines
-                    # or header row
-                    continue
-                if type(line) not in listLike:
-                    if hasattr(line, 'decode'):
-                        line = line.decode('utf-8')
-                    line = line.replace('\n', '').replace('\r', '').\
-                        split(settings.separator)
-                else:
-                    line = [
-                        x.replace('\n', '').replace('\r', '')
-                        if hasattr(x, 'replace') else x for x in line
-                    ]
-                # in case line has less fields than needed
-                if len(line) < maxCol:
-                    self.ownlog.msg(2, ('Line #%u has less than %u fields,'
-                                        ' skipping! :(\n' % (lnum, maxCol)),
-                                    'ERROR')
-                    readError = 1
-                    continue
-                else:
-                    # applying filters:
-                    if self.filters(line, settings.positiveFilters,
-                                    settings.negativeFilters):
-                        lFiltered += 1
-                        continue
-                    # reading names and attributes:
-                    if isDir and not isinstance(isDir, tuple):
-                        thisEdgeDir = True
-                    else:
-                        thisEdgeDir = self.process_direction(line, dirCol,
-                                                             dirVal, dirSep)
-                    refs = []
-                    if refCol is not None:
-                        refs = common.delEmpty(
-                            list(set(line[refCol].split(refSep))))
-                    refs = dataio.only_pmids([r.strip() for r in refs])
-                    if len(refs) == 0 and settings.must_have_references:
-                        rFiltered += 1
-                        continue
-                    # to give an easy way:
-                    if isinstance(settings.ncbiTaxId, int):
-                        taxA = settings.ncbiTaxId
-                        taxB = settings.ncbiTaxId
-                    # to enable more sophisticated inputs:
-                    elif isinstance(settings.ncbiTaxId, dict):
-                        taxx = self.get_taxon(settings.ncbiTaxId, line)
-                        if isinstance(taxx, tuple):
-                            taxA = taxx[0]
-                            taxB = taxx[1]
-                        else:
-                            taxA = taxB = taxx
-                    else:
-                        taxA = taxB = self.ncbi_tax_id
-                    if taxA is None or taxB is None:
-                        tFiltered += 1
-                        continue
-                    stim = False
-                    inh = False
-                    if isinstance(sign, tuple):
-                        stim, inh = self.process_sign(line[sign[0]], sign)
-                    resource = line[settings.resource] if isinstance(
-                        settings.resource, int) else settings.resource
-                    newEdge = {
-                        "nameA": line[settings.nameColA].strip(),
-                        "nameB": line[settings.nameColB].strip(),
-                        "nameTypeA": settings.nameTypeA,
-                        "nameTypeB": settings.nameTypeB,
-                        "typeA": settings.typeA,
-                        "typeB": settings.typeB,
-                        "source": resource,
-                        "isDirected": thisEdgeDir,
-                        "references": refs,
-                        "stim": stim,
-                        "inh": inh,
-                        "taxA": taxA,
-                        "taxB": taxB,
-                        "type": settings.intType
-                    }
-                    # except:
-                    # self.ownlog.msg(2,("""Wrong name column indexes (%u and %u),
-                    # or wrong separator (%s)? Line #%u\n"""
-                    #% (
-                    #settings.nameColA, settings.nameColB,
-                    # settings.separator, lnum)), 'ERROR')
-                    #readError = 1
-                    # break
-                    # getting additional edge and node attributes
-                    attrsEdge = self.get_attrs(line, settings.extraEdgeAttrs,
-                                               lnum)
-                    attrsNodeA = self.get_attrs(line, settings.extraNodeAttrsA,
-                                                lnum)
-                    attrsNodeB = self.get_attrs(line, settings.extraNodeAttrsB,
-                                                lnum)
-                    # merging dictionaries
-                    nodeAttrs = {
-                        "attrsNodeA": attrsNodeA,
-                        "attrsNodeB": attrsNodeB,
-                        "attrsEdge": attrsEdge
-                    }
-                    newEdge.update(nodeAttrs)
-                if readError != 0:
-                    self.ownlog.msg(2, (
-                        'Errors occured, certain lines skipped.'
-                        'Trying to read the remaining.\n'), 'ERROR')
-                    readError = 1
-                edgeList.append(newEdge)
-            if hasattr(infile, 'close'):
-                infile.close()
+            edgeList = self.read_data_records(settings, infile, stats) \
+                if records is None else records
+            if stream:
+                self.raw_data = self._stream_mapped(settings, edgeList, stats,
+                                                    chunk_size)
+                return None
             ### !!!! ##
-            edgeListMapped = self.map_list(edgeList)
-            self.ownlog.msg(
-                2, "%u lines have been read from %s,"
-                "%u links after mapping; \n\t\t"
-                "%u lines filtered by filters;\n\t\t"
-                "%u lines filtered because lack of references;\n\t\t"
-                "%u lines filtered by taxon filters." %
-                (lnum - 1, settings.inFile, len(edgeListMapped), lFiltered,
-                 rFiltered, tFiltered))
+            self.mapper.start_report()
+            edgeListMapped = self.map_list(list(edgeList))
+            self.log_data_file(settings, stats, len(edgeListMapped),
+                               self.mapper.end_report())
             if reread or redownload:
                 pickle.dump(edgeListMapped, open(edges_cache, 'wb'))
                 self.ownlog.msg(2,
@@ -1318,6 +1548,569 @@ class PyPath(object):
             self.data[settings.name] = edgeListMapped
         self.raw_data = edgeListMapped
 
+    def iter_lines(self, infile):
+        '''
+        Iterates the non empty lines of a `curl.Curl` instance or a
+        file object opened by it, without reading the whole file into
+        memory. Carriage returns are removed, in the same way as the
+        columnar path of `read_data_file()` does.
+        '''
+        if hasattr(infile, 'iterlines'):
+            lines = infile.iterlines(encoding='utf-8')
+        else:
+            lines = infile
+        for line in lines:
+            if hasattr(line, 'decode'):
+                line = line.decode('utf-8')
+            line = line.replace('\r', '').replace('\n', '')
+            if len(line) > 0:
+                yield line
+        if hasattr(infile, 'close'):
+            infile.close()
+
+    def record_columns(self, settings):
+        '''
+        Returns the column of references and its separator, the column
+        of the sign, the column, values and separator of the direction,
+        and the largest column number referred in `settings`.
+        '''
+        # finding the largest referred column number,
+        # to avoid references out of range
+        isDir = settings.isDirected
+        sign = settings.sign
+        refCol = settings.refs[0] if isinstance(settings.refs, tuple) \
+            else settings.refs if isinstance(settings.refs, int) else None
+        refSep = settings.refs[1] if isinstance(settings.refs,
+                                                tuple) else ';'
+        sigCol = None if not isinstance(sign, tuple) else sign[0]
+        dirCol = None
+        dirVal = None
+        dirSep = None
+        if isinstance(isDir, tuple):
+            dirCol = isDir[0]
+            dirVal = isDir[1]
+            dirSep = isDir[2] if len(isDir) > 2 else None
+        elif isinstance(sign, tuple):
+            dirCol = sign[0]
+            dirVal = sign[1:3]
+            dirVal = dirVal if type(dirVal[
+                0]) in common.simpleTypes else common.flatList(dirVal)
+            dirSep = sign[3] if len(sign) > 3 else None
+        dirVal = set(dirVal if isinstance(dirVal, list) else [dirVal])
+        maxCol = max(
+            filter(
+                lambda i: i is not None, [
+                    settings.nameColA, settings.nameColB, self.get_max(
+                        settings.extraEdgeAttrs),
+                    self.get_max(settings.extraNodeAttrsA), self.get_max(
+                        settings.extraNodeAttrsB), refCol, dirCol, sigCol,
+                    max(itertools.chain(
+                        map(lambda x: x[0],
+                            settings.positiveFilters),
+                        [0])),
+                    max(itertools.chain(
+                        map(lambda x: x[0],
+                            settings.negativeFilters),
+                        [0]))
+                ]))
+        return refCol, refSep, sigCol, dirCol, dirVal, dirSep, maxCol
+
+    def read_data_records(self, settings, infile, stats=None):
+        '''
+        Processes the lines of `infile` according to `settings`, and
+        yields the edge records (not mapped yet) one by one. The numbers
+        of lines read and filtered are set in the dict `stats`, these
+        are final once the generator has been consumed.
+
+        @settings : ReadSettings instance
+        @infile : iterable
+            Lines as strings or lists of fields.
+        @stats : dict
+        '''
+        stats = {} if stats is None else stats
+        listLike = set([list, tuple])
+        isDir = settings.isDirected
+        sign = settings.sign
+        refCol, refSep, sigCol, dirCol, dirVal, dirSep, maxCol = \
+            self.record_columns(settings)
+        # iterating lines from input file
+        stats['lnum'] = 0
+        stats['lFiltered'] = 0
+        stats['rFiltered'] = 0
+        stats['tFiltered'] = 0
+        readError = 0
+        for line in infile:
+            stats['lnum'] += 1
+            lnum = stats['lnum']
+            if len(line) <= 1 or (lnum == 1 and settings.header):
+                # empty lines
+                # or header row
+                continue
+            if type(line) not in listLike:
+                if hasattr(line, 'decode'):
+                    line = line.decode('utf-8')
+                line = line.replace('\n', '').replace('\r', '').\
+                    split(settings.separator)
+            else:
+                line = [
+                    x.replace('\n', '').replace('\r', '')
+                    if hasattr(x, 'replace') else x for x in line
+                ]
+            # in case line has less fields than needed
+            if len(line) < maxCol:
+                self.ownlog.msg(2, ('Line #%u has less than %u fields,'
+                                    ' skipping! :(\n' % (lnum, maxCol)),
+                                'ERROR')
+                readError = 1
+                continue
+            else:
+                # applying filters:
+                if self.filters(line, settings.positiveFilters,
+                                settings.negativeFilters):
+                    stats['lFiltered'] += 1
+                    continue
+                # reading names and attributes:
+                if isDir and not isinstance(isDir, tuple):
+                    thisEdgeDir = True
+                else:
+                    thisEdgeDir = self.process_direction(line, dirCol,
+                                                         dirVal, dirSep)
+                refs = []
+                if refCol is not None:
+                    refs = common.delEmpty(
+                        list(set(line[refCol].split(refSep))))
+                refs = dataio.only_pmids([r.strip() for r in refs])
+                if len(refs) == 0 and settings.must_have_references:
+                    stats['rFiltered'] += 1
+                    continue
+                # to give an easy way:
+                if isinstance(settings.ncbiTaxId, int):
+                    taxA = settings.ncbiTaxId
+                    taxB = settings.ncbiTaxId
+                # to enable more sophisticated inputs:
+                elif isinstance(settings.ncbiTaxId, dict):
+                    taxx = self.get_taxon(settings.ncbiTaxId, line)
+                    if isinstance(taxx, tuple):
+                        taxA = taxx[0]
+                        taxB = taxx[1]
+                    else:
+                        taxA = taxB = taxx
+                else:
+                    taxA = taxB = self.ncbi_tax_id
+                if taxA is None or taxB is None:
+                    stats['tFiltered'] += 1
+                    continue
+                stim = False
+                inh = False
+                if isinstance(sign, tuple):
+                    stim, inh = self.process_sign(line[sign[0]], sign)
+                resource = line[settings.resource] if isinstance(
+                    settings.resource, int) else settings.resource
+                newEdge = {
+                    "nameA": line[settings.nameColA].strip(),
+                    "nameB": line[settings.nameColB].strip(),
+                    "nameTypeA": settings.nameTypeA,
+                    "nameTypeB": settings.nameTypeB,
+                    "typeA": settings.typeA,
+                    "typeB": settings.typeB,
+                    "source": resource,
+                    "isDirected": thisEdgeDir,
+                    "references": refs,
+                    "stim": stim,
+                    "inh": inh,
+                    "taxA": taxA,
+                    "taxB": taxB,
+                    "type": settings.intType
+                }
+                # except:
+                # self.ownlog.msg(2,("""Wrong name column indexes (%u and %u),
+                # or wrong separator (%s)? Line #%u\n"""
+                #% (
+                #settings.nameColA, settings.nameColB,
+                # settings.separator, lnum)), 'ERROR')
+                #readError = 1
+                # break
+                # getting additional edge and node attributes
+                attrsEdge = self.get_attrs(line, settings.extraEdgeAttrs,
+                                           lnum)
+                attrsNodeA = self.get_attrs(line, settings.extraNodeAttrsA,
+                                            lnum)
+                attrsNodeB = self.get_attrs(line, settings.extraNodeAttrsB,
+                                            lnum)
+                # merging dictionaries
+                nodeAttrs = {
+                    "attrsNodeA": attrsNodeA,
+                    "attrsNodeB": attrsNodeB,
+                    "attrsEdge": attrsEdge
+                }
+                newEdge.update(nodeAttrs)
+            if readError != 0:
+                self.ownlog.msg(2, (
+                    'Errors occured, certain lines skipped.'
+                    'Trying to read the remaining.\n'), 'ERROR')
+                readError = 1
+            yield newEdge
+        if hasattr(infile, 'close'):
+            infile.close()
+
+    def read_data_columns(self, settings, data, stats=None, nonempty=False,
+                          block_size=16777216):
+        '''
+        Columnar alternative of `read_data_records()` for plain text
+        tables with a one character separator. Reads only the columns
+        referred in `settings` by `pandas`, applies the filters to whole
+        columns, and returns the same edge records (not mapped yet) as
+        `read_data_records()`, in a list.
+        Returns `None` if `data` can not be processed this way, e.g.
+        `pandas` is not available, or some lines have less fields than
+        the columns used; in this case use `read_data_records()`.
+
+        @settings : ReadSettings instance
+        @data : str, bytes, file
+            Contents of the file, or a file object, which is read from
+            its current position in blocks of `block_size` bytes, so
+            the whole contents is never held in memory.
+        @stats : dict
+            The numbers of lines read and filtered are set here, with
+            the same keys as in `read_data_records()`.
+        @nonempty : bool
+            Count only the non empty lines, and skip the header at the
+            first of them, like `read_data_records()` does with the
+            lines from `iter_lines()`. By default all lines are counted,
+            like in the lines of a file.
+        '''
+        stats = {} if stats is None else stats
+        sep = settings.separator
+        if 'pandas' not in globals() or \
+                type(sep) not in common.charTypes or len(sep) != 1:
+            return None
+        if hasattr(sep, 'decode'):
+            sep = sep.decode('utf-8')
+        if ord(sep) > 127:
+            return None
+        counts = {
+            'lnum': 0,
+            'lFiltered': 0,
+            'rFiltered': 0,
+            'tFiltered': 0,
+            'short': 0
+        }
+        records = []
+        for block in self.data_blocks(data, block_size):
+            block_records = self.read_data_block(settings, block, sep,
+                                                 counts, nonempty)
+            if block_records is None:
+                return None
+            records.extend(block_records)
+        if not counts['lnum']:
+            return None
+        if counts['short']:
+            self.ownlog.msg(2, (
+                'Errors occured, certain lines skipped.'
+                'Trying to read the remaining.\n'), 'ERROR')
+        del counts['short']
+        stats.update(counts)
+        return records
+
+    def data_blocks(self, data, block_size=16777216):
+        '''
+        Yields the contents of a file object in blocks of complete
+        lines, encoded to bytes, or `data` itself if it is a string.
+        '''
+        if isinstance(data, (bytes, unicode)):
+            yield data if isinstance(data, bytes) else data.encode('utf-8')
+            return
+        rest = b''
+        while True:
+            chunk = data.read(block_size)
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                break
+            block = rest + chunk
+            cut = block.rfind(b'\n') + 1
+            if cut:
+                rest = block[cut:]
+                yield block[:cut]
+            else:
+                rest = block
+        if rest:
+            yield rest
+
+    def read_data_block(self, settings, data, sep, counts, nonempty=False):
+        '''
+        Does the work of `read_data_columns()` for one block of
+        complete lines. The numbers of lines read, filtered and
+        skipped in the previous blocks are in the dict `counts`,
+        and updated with this block.
+        '''
+        if data.count(b'\r') != data.count(b'\r\n'):
+            return None
+        isDir = settings.isDirected
+        sign = settings.sign
+        refCol, refSep, sigCol, dirCol, dirVal, dirSep, maxCol = \
+            self.record_columns(settings)
+
+        def taxon_columns(tax_dict):
+            if 'A' in tax_dict and 'B' in tax_dict:
+                return taxon_columns(tax_dict['A']) + \
+                    taxon_columns(tax_dict['B'])
+            return [tax_dict['col']]
+
+        cols = [
+            settings.nameColA, settings.nameColB, refCol, dirCol, sigCol
+        ] + [
+            spec[0] if isinstance(spec, tuple) else spec
+            for attrs in [settings.extraEdgeAttrs,
+                          settings.extraNodeAttrsA,
+                          settings.extraNodeAttrsB]
+            for spec in attrs.values()
+        ] + [
+            filtr[0] for filtr in
+            settings.positiveFilters + settings.negativeFilters
+        ]
+        if isinstance(settings.resource, int):
+            cols.append(settings.resource)
+        if isinstance(settings.ncbiTaxId, dict):
+            cols.extend(taxon_columns(settings.ncbiTaxId))
+        cols = sorted(set(int(c) for c in cols if c is not None))
+        # numbers of fields and lengths of the lines
+        buf = np.frombuffer(data, dtype=np.uint8)
+        ends = np.flatnonzero(buf == 10)
+        if len(buf) and buf[-1] != 10:
+            ends = np.append(ends, len(buf))
+        if not len(ends):
+            return []
+        starts = np.concatenate([[0], ends[:-1] + 1]).astype(ends.dtype)
+        seps = np.flatnonzero(buf == ord(sep))
+        nfields = np.searchsorted(seps, ends) - \
+            np.searchsorted(seps, starts) + 1
+        cr = np.zeros(len(ends), dtype=np.bool_)
+        has_chars = ends > starts
+        cr[has_chars] = buf[ends[has_chars] - 1] == 13
+        length = ends - starts - cr
+        if nonempty:
+            # the lines from `iter_lines()`: without line endings,
+            # the empty ones are not counted, the one character
+            # long ones are counted but skipped
+            counted = length > 0
+            keep = length > 1
+        else:
+            # the lines of a file, with the line endings
+            counted = np.ones(len(ends), dtype=np.bool_)
+            keep = ends - starts + (ends < len(buf)) > 1
+        # number of each line, as in `read_data_records()`
+        lnums = np.cumsum(counted) + counts['lnum']
+        if settings.header:
+            keep &= ~(counted & (lnums == 1))
+        short = keep & (nfields < maxCol)
+        keep &= ~short
+        if np.any(nfields[keep] <= max(cols)):
+            # columns out of range in some lines:
+            # leaving the details to the row by row reader
+            return None
+        for lnum in lnums[short]:
+            self.ownlog.msg(2, ('Line #%u has less than %u fields,'
+                                ' skipping! :(\n' % (lnum, maxCol)),
+                            'ERROR')
+        counts['short'] += int(short.sum())
+        counts['lnum'] += int(counted.sum())
+        if not np.any(keep):
+            return []
+        try:
+            df = pandas.read_csv(
+                io.BytesIO(data),
+                sep=sep,
+                header=None,
+                names=list(xrange(max(nfields.max(), max(cols) + 1))),
+                usecols=cols,
+                dtype=str,
+                na_filter=False,
+                quoting=csv.QUOTE_NONE,
+                skip_blank_lines=False,
+                encoding='utf-8',
+                engine='c')
+        except Exception:
+            return None
+        if len(df) != len(ends):
+            return None
+        df = df[keep]
+        # applying filters:
+        filtered = np.zeros(len(df), dtype=np.bool_)
+        for filtr in settings.negativeFilters:
+            filtered |= self.column_isin(
+                df[int(filtr[0])], filtr[1], len(filtr) > 2,
+                filtr[2] if len(filtr) > 2 else None)
+        for filtr in settings.positiveFilters:
+            filtered |= ~self.column_isin(
+                df[int(filtr[0])], filtr[1], len(filtr) > 2,
+                filtr[2] if len(filtr) > 2 else None)
+        counts['lFiltered'] += int(filtered.sum())
+        df = df[~filtered]
+        n = len(df)
+        column = lambda c: df[int(c)].tolist()
+        # directions and signs:
+        if isDir and not isinstance(isDir, tuple):
+            directed = [True] * n
+        elif dirCol is None:
+            directed = [False] * n
+        else:
+            directed = self.column_isin(df[int(dirCol)], dirVal, True,
+                                        dirSep).tolist()
+        stim = inh = [False] * n
+        if isinstance(sign, tuple):
+            signSep = sign[3] if len(sign) > 3 else None
+            stim = self.column_isin(df[int(sign[0])], sign[1], True, signSep)
+            inh = self.column_isin(df[int(sign[0])], sign[2], True, signSep)
+            inh = (inh & ~stim).tolist()
+            stim = stim.tolist()
+
+        # references:
+        strip = operator.methodcaller('strip')
+        isdigit = operator.methodcaller('isdigit')
+
+        def refs_of(value):
+            if 'PMC' in value or '/' in value:
+                # DOIs and PMC IDs need to be translated
+                refs = common.delEmpty(list(set(value.split(refSep))))
+                return dataio.only_pmids([r.strip() for r in refs])
+            return list(set(filter(isdigit, map(strip, value.split(refSep)))))
+
+        refs = [refs_of(r) for r in column(refCol)] \
+            if refCol is not None else [[]] * n
+
+        # taxa:
+        def taxon_values(tax_dict):
+            if 'A' in tax_dict and 'B' in tax_dict:
+                return (taxon_values(tax_dict['A']),
+                        taxon_values(tax_dict['B']))
+            return [tax_dict['dict'].get(v) for v in column(tax_dict['col'])]
+
+        if isinstance(settings.ncbiTaxId, int):
+            taxA = taxB = [settings.ncbiTaxId] * n
+        elif isinstance(settings.ncbiTaxId, dict):
+            taxA = taxB = taxon_values(settings.ncbiTaxId)
+            if isinstance(taxA, tuple):
+                taxA, taxB = taxA
+        else:
+            taxA = taxB = [self.ncbi_tax_id] * n
+        resource = column(settings.resource) \
+            if isinstance(settings.resource, int) else \
+            [settings.resource] * n
+
+        # additional edge and node attributes:
+        def attrs_of(spec):
+            names = list(spec.keys())
+            cols = [
+                [v.split(spec[name][1]) for v in column(spec[name][0])]
+                if spec[name].__class__ is tuple else column(spec[name])
+                for name in names
+            ]
+            if not names:
+                return [{} for _ in xrange(n)]
+            return [dict(zip(names, values)) for values in zip(*cols)]
+
+        records = []
+        for nameA, nameB, source, thisDir, thisRefs, thisStim, thisInh, \
+                thisTaxA, thisTaxB, attrsEdge, attrsNodeA, attrsNodeB in zip(
+                    column(settings.nameColA), column(settings.nameColB),
+                    resource, directed, refs, stim, inh, taxA, taxB,
+                    attrs_of(settings.extraEdgeAttrs),
+                    attrs_of(settings.extraNodeAttrsA),
+                    attrs_of(settings.extraNodeAttrsB)):
+            if len(thisRefs) == 0 and settings.must_have_references:
+                counts['rFiltered'] += 1
+                continue
+            if thisTaxA is None or thisTaxB is None:
+                counts['tFiltered'] += 1
+                continue
+            records.append({
+                "nameA": nameA.strip(),
+                "nameB": nameB.strip(),
+                "nameTypeA": settings.nameTypeA,
+                "nameTypeB": settings.nameTypeB,
+                "typeA": settings.typeA,
+                "typeB": settings.typeB,
+                "source": source,
+                "isDirected": thisDir,
+                "references": list(thisRefs),
+                "stim": thisStim,
+                "inh": thisInh,
+                "taxA": thisTaxA,
+                "taxB": thisTaxB,
+                "type": settings.intType,
+                "attrsEdge": attrsEdge,
+                "attrsNodeA": attrsNodeA,
+                "attrsNodeB": attrsNodeB
+            })
+        return records
+
+    def column_isin(self, col, values, split=False, sep=None):
+        '''
+        Tells for each field in a column whether it is one of `values`,
+        or if `split` is `True`, whether any of its elements separated
+        by `sep` is. Returns a boolean array.
+
+        @col : pandas.Series
+        @values : list, str
+            One value or list of values.
+        '''
+        values = set(values if isinstance(values, (list, set)) else [values])
+        # columns have typically few distinct values
+        codes, uniques = pandas.factorize(col)
+        hits = np.array(
+            [not values.isdisjoint(v.split(sep)) for v in uniques]
+            if split else [v in values for v in uniques],
+            dtype=np.bool_)
+        return hits[codes]
+
+    def _stream_mapped(self, settings, edgeList, stats, chunk_size=100000):
+        '''
+        Maps the edge records coming from `read_data_records()`
+        in chunks of `chunk_size` records, each by `map_list()`,
+        and writes the log message once all of them have been
+        processed.
+        '''
+        nmapped = 0
+        edgeList = iter(edgeList)
+        self.mapper.start_report()
+        while True:
+            chunk = list(itertools.islice(edgeList, chunk_size))
+            if not len(chunk):
+                break
+            for mapped in self.map_list(chunk):
+                nmapped += 1
+                yield mapped
+        self.log_data_file(settings, stats, nmapped,
+                           self.mapper.end_report())
+
+    def log_data_file(self, settings, stats, nmapped, report=None):
+        '''
+        Writes the summary of reading a data file to the log.
+        If a mapping report is given (see `mapping.Mapper.start_report()`),
+        it is written as well: how many names have been mapped
+        and by which step of the fallback chain, with some of the
+        names mapped by each step other than the exact match.
+        '''
+        self.ownlog.msg(
+            2, "%u lines have been read from %s,"
+            "%u links after mapping; \n\t\t"
+            "%u lines filtered by filters;\n\t\t"
+            "%u lines filtered because lack of references;\n\t\t"
+            "%u lines filtered by taxon filters." %
+            (stats['lnum'] - 1, settings.inFile, nmapped,
+             stats['lFiltered'], stats['rFiltered'], stats['tFiltered']))
+        if report is not None:
+            self.ownlog.msg(2, "ID translation of %s: %s" %
+                            (settings.name, self.mapper.report_str(report)))
+            for stage, names in sorted(iteritems(report['samples'])):
+                self.ownlog.msg(
+                    3, "%s: %s%s" %
+                    (stage if stage == 'unmapped'
+                     else 'mapped by `%s`' % stage, ', '.join(names),
+                     ', ...' if report['stages'][stage] > len(names)
+                     else ''))
+
     def load_list(self, lst, name):
         self.lists[name] = lst
 
@@ -1553,43 +2346,96 @@ class PyPath(object):
 
     def map_list(self, lst, singleList=False):
         '''
-        Only a wrapper for map_edge()
+        Only a wrapper for map_edge(). The names are translated
+        in batches by `Mapper.map_names()` before.
         '''
         listMapped = []
         if singleList:
+            mapped = self.map_names_batch(
+                (item['name'], item['nameType'],
+                 self.default_name_type[item['type']], None)
+                for item in lst)
             for item in lst:
-                listMapped += self.map_item(item)
+                listMapped += self.map_item(item, mapped)
         else:
+            mapped = self.map_names_batch(
+                (edge['name%s' % ab], edge['nameType%s' % ab],
+                 self.default_name_type[edge['type%s' % ab]],
+                 edge['tax%s' % ab])
+                for edge in lst for ab in ('A', 'B'))
             for edge in lst:
-                listMapped += self.map_edge(edge)
+                listMapped += self.map_edge(edge, mapped)
         return listMapped
 
-    def map_item(self, item):
+    def map_names_batch(self, names):
+        """
+        Translates many names at once. Groups the names by
+        name type, target name type and organism, and calls
+        `Mapper.map_names()` once for each group.
+
+        :param iterable names: Tuples of name, name type,
+            target name type and NCBI Taxonomy ID.
+
+        Returns dict of dicts with tuples of name type, target
+        name type and NCBI Taxonomy ID as keys, and dicts of
+        original names and lists of translated names as values.
+        """
+        groups = {}
+        for name, nameType, targetNameType, ncbi_tax_id in names:
+            groups.setdefault(
+                (self._name_type_key(nameType), targetNameType, ncbi_tax_id),
+                set([])).add(name)
+        return dict(
+            ((nameType, targetNameType, ncbi_tax_id),
+             self.mapper.map_names(
+                 group,
+                 list(nameType) if type(nameType) is tuple else nameType,
+                 targetNameType, ncbi_tax_id = ncbi_tax_id))
+            for (nameType, targetNameType, ncbi_tax_id), group in
+            iteritems(groups))
+
+    def _name_type_key(self, nameType):
+        return tuple(nameType) if type(nameType) is list else nameType
+
+    def _map_name(self, name, nameType, targetNameType,
+                  ncbi_tax_id = None, mapped = None):
+        """
+        Looks up the translation of a name in the output of
+        `map_names_batch()`, or translates it by `Mapper.map_name()`
+        if it is not there.
+        """
+        key = (self._name_type_key(nameType), targetNameType, ncbi_tax_id)
+        if mapped is not None and key in mapped and name in mapped[key]:
+            return mapped[key][name]
+        return self.mapper.map_name(name, nameType, targetNameType,
+                                    ncbi_tax_id = ncbi_tax_id)
+
+    def map_item(self, item, mapped = None):
         """
         Translates the name in item representing a molecule.
         """
         # TODO: include 
-        defaultNames = self.mapper.map_name(
+        defaultNames = self._map_name(
             item['name'], item['nameType'],
-            self.default_name_type[item['type']])
+            self.default_name_type[item['type']], mapped = mapped)
         if len(defaultNames) == 0:
             self.unmapped.append(item['name'])
         return defaultNames
 
-    def map_edge(self, edge):
+    def map_edge(self, edge, mapped = None):
         """
         Translates molecule names in dict representing an edge.
         """
         edgeStack = []
-        defaultNameA = self.mapper.map_name(
+        defaultNameA = self._map_name(
             edge['nameA'], edge['nameTypeA'],
             self.default_name_type[edge['typeA']],
-            ncbi_tax_id = edge['taxA'])
+            ncbi_tax_id = edge['taxA'], mapped = mapped)
         # print 'mapped %s to %s' % (str(edge['nameA']), str(defaultNameA))
-        defaultNameB = self.mapper.map_name(
+        defaultNameB = self._map_name(
             edge['nameB'], edge['nameTypeB'],
             self.default_name_type[edge['typeB']],
-            ncbi_tax_id = edge['taxB'])
+            ncbi_tax_id = edge['taxB'], mapped = mapped)
         # print 'mapped %s to %s' % (str(edge['nameB']), str(defaultNameB))
         # this is needed because the possibility ambigous mapping
         # one name can be mapped to multiple ones
@@ -1774,7 +2620,7 @@ class PyPath(object):
         toDel = list(map(lambda i: graph.vs.select(id_merge = i)[0].index,
                          nonprimary))
         
-        graph.delete_vertices(toDel)
+        self._delete_vertices(graph, toDel)
         del graph.vs['id_merge']
     
     def copy_edges(self, sources, target, move = False, graph = None):
@@ -1886,7 +2732,7 @@ class PyPath(object):
         for v in g.vs:
             if v['ncbi_tax_id'] not in tax:
                 toDel.append(v.index)
-        g.delete_vertices(toDel)
+        self._delete_vertices(g, toDel)
         self.update_vname()
         self.update_db_dict()
 
@@ -1934,7 +2780,7 @@ class PyPath(object):
             vn = [g.vs[i]['name'] for i in vs]
             toDelNames = list(set(vn) - set(reflists[t]))
             toDel += [self.nodDct[n] for n in toDelNames]
-        g.delete_vertices(toDel)
+        self._delete_vertices(g, toDel)
         sys.stdout.write(' done.\n')
 
     def clean_graph(self):
@@ -1957,7 +2803,7 @@ class PyPath(object):
             self.delete_unknown([self.ncbi_tax_id])
         x = g.vs.degree()
         zeroDeg = [i for i, j in enumerate(x) if j == 0]
-        g.delete_vertices(zeroDeg)
+        self._delete_vertices(g, zeroDeg)
         self.update_vname()
 
     ###
@@ -1988,27 +2834,89 @@ class PyPath(object):
         edges in batch.
         '''
         g = self.graph
-        if not defAttrs["name"] in g.vs["name"]:
+        if not hasattr(self, 'nodDct') or len(self.nodInd) != g.vcount():
+            self.update_vname()
+        if not defAttrs["name"] in self.nodDct:
             if not add:
                 self.ownlog.msg(2, 'Failed to add some vertices', 'ERROR')
                 return False
-            n = g.vcount()
-            g.add_vertices(1)
-            g.vs[n][key].originalNames = {originalName: originalNameType}
-            thisNode = g.vs.find(name=defAttrs["name"])
+            g.add_vertex(defAttrs["name"])
+            self.update_vname()
+            thisNode = g.vs[self.nodDct[defAttrs["name"]]]
+            thisNode["originalNames"] = {originalName: originalNameType}
         else:
-            thisNode = g.vs.find(name=defAttrs["name"])
+            thisNode = g.vs[self.nodDct[defAttrs["name"]]]
             if thisNode["originalNames"] is None:
                 thisNode["originalNames"] = {}
             thisNode["originalNames"][originalName] = originalNameType
+        # the labels of new vertices are set from the default name
+        # after their attributes are known, other labels are kept
+        unlabelled = 'label' not in g.vs.attributes() or \
+            thisNode['label'] is None
         for key, value in iteritems(defAttrs):
-            thisNode[key] = value
+            if key != 'label' or unlabelled:
+                thisNode[key] = value
+        if unlabelled:
+            self.genesymbol_labels(graph=g, vids=[thisNode.index])
         for key, value in iteritems(extraAttrs):
             if key not in g.vs.attributes():
                 g.vs[key] = [[] for _ in xrange(self.graph.vcount())] \
                     if isinstance(value, list) else [None]
             thisNode[key] = self.combine_attr([thisNode[key], value])
 
+    def add_update_vertices(self, vertexList):
+        '''
+        Updates the attributes of many nodes in the network, with the
+        same result as calling `add_update_vertex()` for each, but
+        reading and writing each vertex attribute only once, as a
+        whole column. Nodes not in the network are skipped.
+
+        @vertexList : list
+            Tuples of the arguments of `add_update_vertex()`: default
+            attributes, original name, original name type and
+            extra attributes.
+        '''
+        g = self.graph
+        if not hasattr(self, 'nodDct') or len(self.nodInd) != g.vcount():
+            self.update_vname()
+        vcount = g.vcount()
+        attrs = set(g.vs.attributes())
+        cols = {}
+
+        def column(key, value):
+            if key not in cols:
+                cols[key] = g.vs[key] if key in attrs \
+                    else [[] for _ in xrange(vcount)] \
+                    if isinstance(value, list) else [None] * vcount
+            return cols[key]
+
+        failed = 0
+        unlabelled = set([])
+        for defAttrs, originalName, originalNameType, extraAttrs \
+                in vertexList:
+            if defAttrs["name"] not in self.nodDct:
+                failed += 1
+                continue
+            vid = self.nodDct[defAttrs["name"]]
+            originalNames = column("originalNames", None)
+            if originalNames[vid] is None:
+                originalNames[vid] = {}
+            originalNames[vid][originalName] = originalNameType
+            if column("label", None)[vid] is None:
+                unlabelled.add(vid)
+            for key, value in iteritems(defAttrs):
+                if key != "label" or vid in unlabelled:
+                    column(key, None)[vid] = value
+            for key, value in iteritems(extraAttrs):
+                col = column(key, value)
+                col[vid] = self.combine_attr([col[vid], value])
+        if failed:
+            self.ownlog.msg(2, 'Failed to add some vertices', 'ERROR')
+        for key, col in iteritems(cols):
+            g.vs[key] = col
+        if unlabelled:
+            self.genesymbol_labels(graph=g, vids=sorted(unlabelled))
+
     def add_update_edge(self,
                         nameA,
                         nameB,
@@ -2075,6 +2983,141 @@ class PyPath(object):
                     if isinstance(value, list) else [None]
             g.es[edge][key] = self.combine_attr([g.es[edge][key], value])
 
+    def add_update_edges(self, edgeList):
+        """
+        Batch version of `add_update_edge()`. Looks up the edge ids of
+        all records in one call, groups the records by node pair, merges
+        them edge by edge, and finally writes each edge attribute back
+        to the graph as one column. The result is the same as calling
+        `add_update_edge()` for each record in the order of `edgeList`.
+        All edges should exist already, records without edge are
+        added to `failed_edges`.
+
+        :param list edgeList: List of mapped edge records, as returned
+            by `map_list()`.
+        """
+        def as_set(value):
+            return value if isinstance(value, set) \
+                else set(value) if isinstance(value, list) \
+                else set([value])
+
+        def as_list(value):
+            return value if isinstance(value, list) else [value]
+
+        def current_set(value):
+            return set([]) if value is None else as_set(value)
+
+        def current_list(value):
+            return [] if value is None else list(as_list(value))
+
+        def current_dict(value):
+            return value if isinstance(value, dict) else {}
+
+        def group_set(dct, group):
+            if group not in dct or dct[group] is None:
+                dct[group] = set([])
+            elif not isinstance(dct[group], set):
+                dct[group] = as_set(dct[group])
+            return dct[group]
+
+        g = self.graph
+        if not hasattr(self, 'nodDct') or len(self.nodInd) != g.vcount():
+            self.update_vname()
+        pairs = []
+        records = []
+        for e in edgeList:
+            if e['defaultNameA'] in self.nodDct and \
+                    e['defaultNameB'] in self.nodDct:
+                pairs.append((self.nodDct[e['defaultNameA']],
+                              self.nodDct[e['defaultNameB']]))
+                records.append(e)
+        eids = g.get_eids(pairs=pairs, error=False) if len(pairs) else []
+        by_edge = {}
+        failed = len(edgeList) - len(records)
+        for eid, pair, e in zip(eids, pairs, records):
+            if eid == -1:
+                failed += 1
+                self.failed_edges.append([
+                    sorted(pair), e['defaultNameA'], e['defaultNameB'],
+                    pair[0], pair[1], eid, eid
+                ])
+                continue
+            if eid not in by_edge:
+                by_edge[eid] = []
+            by_edge[eid].append(e)
+        if failed:
+            self.ownlog.msg(2, 'Failed to add some edges', 'ERROR')
+        ecount = g.ecount()
+        attrs = g.es.attributes()
+        cols = {}
+        for attr, default in [('sources', set), ('references', list),
+                              ('type', list), ('refs_by_source', dict),
+                              ('refs_by_type', dict), ('refs_by_dir', dict),
+                              ('sources_by_type', dict)]:
+            cols[attr] = g.es[attr] if attr in attrs \
+                else [default() for _ in xrange(ecount)]
+        dirs = g.es['dirs'] if 'dirs' in attrs else [None] * ecount
+        prg = Progress(
+            total=len(by_edge), name='Setting edge attributes', interval=30)
+        for eid, edge_records in iteritems(by_edge):
+            sources = current_set(cols['sources'][eid])
+            refs_all = current_list(cols['references'][eid])
+            types = current_list(cols['type'][eid])
+            refs_by_source = current_dict(cols['refs_by_source'][eid])
+            refs_by_type = current_dict(cols['refs_by_type'][eid])
+            refs_by_dir = current_dict(cols['refs_by_dir'][eid])
+            sources_by_type = current_dict(cols['sources_by_type'][eid])
+            for e in edge_records:
+                nameA = e['defaultNameA']
+                nameB = e['defaultNameB']
+                source = e['source']
+                typ = e['type']
+                refs = [_refs.Reference(pmid) for pmid in e['references']]
+                sources.update(as_set(source))
+                refs_all.extend(refs)
+                group_set(refs_by_source, source).update(refs)
+                group_set(refs_by_type, typ).update(refs)
+                if not dirs[eid]:
+                    dirs[eid] = Direction(nameA, nameB)
+                if e['isDirected']:
+                    dirs[eid].set_dir((nameA, nameB), source)
+                    group_set(refs_by_dir, (nameA, nameB)).update(refs)
+                else:
+                    dirs[eid].set_dir('undirected', source)
+                    group_set(refs_by_dir, 'undirected').update(refs)
+                if e['stim']:
+                    dirs[eid].set_sign((nameA, nameB), 'positive', source)
+                if e['inh']:
+                    dirs[eid].set_sign((nameA, nameB), 'negative', source)
+                group_set(sources_by_type, typ).update(as_set(source))
+                types.extend(as_list(typ))
+            cols['sources'][eid] = sources
+            cols['references'][eid] = common.uniqList(refs_all)
+            cols['type'][eid] = common.uniqList(types)
+            cols['refs_by_source'][eid] = refs_by_source
+            cols['refs_by_type'][eid] = refs_by_type
+            cols['refs_by_dir'][eid] = refs_by_dir
+            cols['sources_by_type'][eid] = sources_by_type
+            prg.step()
+        prg.terminate()
+        for attr, col in iteritems(cols):
+            g.es[attr] = col
+        g.es['dirs'] = dirs
+        # extra attributes are combined in the original order of records,
+        # as `combine_attr()` might depend on the order
+        extra = {}
+        for eid, e in zip(eids, records):
+            if eid == -1:
+                continue
+            for key, value in iteritems(e['attrsEdge']):
+                if key not in extra:
+                    extra[key] = g.es[key] if key in attrs \
+                        else [[] for _ in xrange(ecount)] \
+                        if isinstance(value, list) else [None] * ecount
+                extra[key][eid] = self.combine_attr([extra[key][eid], value])
+        for key, col in iteritems(extra):
+            g.es[key] = col
+
     def add_list_eattr(self, edge, attr, value):
         value = value if isinstance(value, list) else [value]
         e = self.graph.es[edge]
@@ -2164,70 +3207,63 @@ class PyPath(object):
             Return the directed graph instance, or return ``None``.
             Default is ``False`` (returns ``None``).
         """
-        toDel = []
         g = self.graph if not graph else graph
         d = g.as_directed(mutual=True)
         self.update_vname()
-        d.es['directed_sources'] = [[] for _ in xrange(g.ecount())]
-        d.es['undirected_sources'] = [[] for _ in xrange(g.ecount())]
-        d.es['directed'] = [False for _ in xrange(g.ecount())]
+        # `as_directed()` keeps the vertex ids, so the directed
+        # edges can be looked up by the ids of the undirected ones
+        edges = g.get_edgelist()
+        names = g.vs['name']
+        edge_dirs = g.es['dirs'] if g.ecount() else []
+        one = d.get_eids(pairs=edges)
+        two = d.get_eids(pairs=[(t, s) for s, t in edges])
+        directed = [False] * d.ecount()
+        directed_sources = [[] for _ in xrange(d.ecount())]
+        undirected_sources = [[] for _ in xrange(d.ecount())]
+        toDel = np.zeros(d.ecount(), dtype=np.bool_)
         prg = Progress(
             total=g.ecount(), name="Setting directions", interval=17)
-        for e in g.es:
-            '''
-            This works because in directed graphs get_eid() defaults to
-            directed = True, so the source -> target edge is returned.
-            '''
-            dir_one = (g.vs['name'][e.source], g.vs['name'][e.target])
-            dir_two = (g.vs['name'][e.target], g.vs['name'][e.source])
-            dir_edge_one = d.get_eid(
-                d.vs['name'].index(g.vs['name'][e.source]),
-                d.vs['name'].index(g.vs['name'][e.target]))
-            dir_edge_two = d.get_eid(
-                d.vs['name'].index(g.vs['name'][e.target]),
-                d.vs['name'].index(g.vs['name'][e.source]))
-            if not e['dirs'].get_dir(dir_one):
-                if not conv_edges or e['dirs'].get_dir(dir_two):
-                    toDel.append(dir_edge_one)
-            else:
-                d.es[dir_edge_one]['directed'] = True
-                d.es[dir_edge_one]['directed_sources'] += \
-                    e['dirs'].get_dir(dir_one, sources=True)
-                d.es[dir_edge_one]['undirected_sources'] += \
-                    e['dirs'].get_dir('undirected', sources=True)
-            if not e['dirs'].get_dir(dir_two):
-                if not conv_edges or e['dirs'].get_dir(dir_one):
-                    toDel.append(dir_edge_two)
-            else:
-                d.es[dir_edge_two]['directed'] = True
-                d.es[dir_edge_two]['directed_sources'] += \
-                    e['dirs'].get_dir(dir_two, sources=True)
-                d.es[dir_edge_two]['undirected_sources'] += \
-                    e['dirs'].get_dir('undirected', sources=True)
-            if e['dirs'].get_dir('undirected') and \
-                not e['dirs'].get_dir(dir_one) and \
-                    not e['dirs'].get_dir(dir_two):
+        for (s, t), dirs, dir_edge_one, dir_edge_two in \
+                zip(edges, edge_dirs, one, two):
+            dir_one = (names[s], names[t])
+            dir_two = (names[t], names[s])
+            is_one = dirs.get_dir(dir_one)
+            is_two = dirs.get_dir(dir_two)
+            is_undirected = dirs.get_dir('undirected')
+            for di, eid, is_this, is_other in \
+                    ((dir_one, dir_edge_one, is_one, is_two),
+                     (dir_two, dir_edge_two, is_two, is_one)):
+                if not is_this:
+                    if not conv_edges or is_other:
+                        toDel[eid] = True
+                else:
+                    directed[eid] = True
+                    directed_sources[eid].extend(
+                        dirs.get_dir(di, sources=True))
+                    undirected_sources[eid].extend(
+                        dirs.get_dir('undirected', sources=True))
+            if is_undirected and not is_one and not is_two:
                 if conv_edges:
-                    d.es[dir_edge_one]['undirected_sources'] += \
-                        e['dirs'].get_dir('undirected', sources=True)
+                    undirected_sources[dir_edge_one].extend(
+                        dirs.get_dir('undirected', sources=True))
                     if mutual:
-                        d.es[dir_edge_two]['undirected_sources'] += \
-                            e['dirs'].get_dir('undirected', sources=True)
+                        undirected_sources[dir_edge_two].extend(
+                            dirs.get_dir('undirected', sources=True))
                     else:
-                        toDel.append(dir_edge_two)
+                        toDel[dir_edge_two] = True
                 else:
-                    toDel += [dir_edge_one, dir_edge_two]
+                    toDel[dir_edge_one] = True
+                    toDel[dir_edge_two] = True
             prg.step()
-        d.delete_edges(list(set(toDel)))
+        d.es['directed'] = directed
+        d.es['directed_sources'] = directed_sources
+        d.es['undirected_sources'] = undirected_sources
+        d.delete_edges(np.where(toDel)[0].tolist())
         prg.terminate()
-        deg = d.vs.degree()
-        toDel = []
-        for v in d.vs:
-            if deg[v.index] == 0:
-                toDel.append(v.index)
-        del self.nodInd
+        self._vertex_index().invalidate(self.graph)
+        toDel = np.where(np.array(d.vs.degree()) == 0)[0].tolist()
         if len(toDel) > 0:
-            d.delete_vertices(list(set(toDel)))
+            d.delete_vertices(toDel)
         if not graph:
             self.dgraph = d
             self._directed = self.dgraph
@@ -2402,10 +3438,27 @@ class PyPath(object):
                     attr]) in common.simpleTypes:
                 e[attr] = [e[attr]] if len(e[attr]) > 0 else []
 
-    def attach_network(self, edgeList=False, regulator=False):
+    def attach_network(self,
+                       edgeList=False,
+                       regulator=False,
+                       batch=False,
+                       nodes_updated=None,
+                       update_attrs=True):
         """
         Adds edges to the network from edgeList obtained from file or
         other input method.
+
+        :param bool batch: Set the edge attributes by `add_update_edges()`,
+            i.e. grouped by node pair and written as whole columns,
+            instead of calling `add_update_edge()` for each record.
+            The result is the same, but much faster for large inputs.
+        :param set nodes_updated: Names of the nodes which have been
+            updated already from the same resource, and should not be
+            updated again. Used when one resource is attached in more
+            chunks. Newly updated node names are added to this set.
+        :param bool update_attrs: Call `update_attrs()` at the end. When
+            one resource is attached in more chunks, it is enough to
+            call it once after the last chunk.
         """
         g = self.graph
         if not edgeList:
@@ -2459,41 +3512,45 @@ class PyPath(object):
                         'INFO')
         prg = Progress(
             total=len(edgeList), name="Processing attributes", interval=30)
-        nodes_updated = []
+        nodes_updated = set([]) if nodes_updated is None else nodes_updated
+        vertexList = []
         self.update_vname()
+        node_keys = [("defaultNameA", "defaultNameTypeA", "typeA", "taxA",
+                      "nameA", "nameTypeA", "attrsNodeA"),
+                     ("defaultNameB", "defaultNameTypeB", "typeB", "taxB",
+                      "nameB", "nameTypeB", "attrsNodeB")]
         for e in edgeList:
             # adding new node attributes
-            if e["defaultNameA"] not in nodes_updated:
-                defAttrs = {
-                    "name": e["defaultNameA"],
-                    "label": e["defaultNameA"],
-                    "nameType": e["defaultNameTypeA"],
-                    "type": e["typeA"],
-                    "ncbi_tax_id": e["taxA"]
-                }
-                self.add_update_vertex(defAttrs, e["nameA"], e["nameTypeA"],
-                                       e["attrsNodeA"])
-                nodes_updated.append(e["defaultNameA"])
-            if e["defaultNameB"] not in nodes_updated:
-                defAttrs = {
-                    "name": e["defaultNameB"],
-                    "label": e["defaultNameB"],
-                    "nameType": e["defaultNameTypeB"],
-                    "type": e["typeB"],
-                    "ncbi_tax_id": e["taxB"]
-                }
-                self.add_update_vertex(defAttrs, e["nameB"], e["nameTypeB"],
-                                       e["attrsNodeB"])
-                nodes_updated.append(e["defaultNameB"])
+            for name, nameType, typ, tax, orig, origType, attrs in node_keys:
+                if e[name] not in nodes_updated:
+                    defAttrs = {
+                        "name": e[name],
+                        "label": e[name],
+                        "nameType": e[nameType],
+                        "type": e[typ],
+                        "ncbi_tax_id": e[tax]
+                    }
+                    vertex = (defAttrs, e[orig], e[origType], e[attrs])
+                    if batch:
+                        vertexList.append(vertex)
+                    else:
+                        self.add_update_vertex(*vertex)
+                    nodes_updated.add(e[name])
             # adding new edge attributes
-            self.add_update_edge(e["defaultNameA"], e["defaultNameB"],
-                                 e["source"], e["isDirected"], e["references"],
-                                 e["stim"], e["inh"], e["taxA"], e["taxB"],
-                                 e["type"], e["attrsEdge"])
+            if not batch:
+                self.add_update_edge(e["defaultNameA"], e["defaultNameB"],
+                                     e["source"], e["isDirected"],
+                                     e["references"], e["stim"], e["inh"],
+                                     e["taxA"], e["taxB"], e["type"],
+                                     e["attrsEdge"])
             prg.step()
         prg.terminate()
+        if batch:
+            self.add_update_vertices(vertexList)
+            self.add_update_edges(edgeList)
         self.raw_data = None
-        self.update_attrs()
+        if update_attrs:
+            self.update_attrs()
 
     def apply_list(self, name, node_or_edge="node"):
         """
@@ -2607,17 +3664,35 @@ class PyPath(object):
     #
 
     def databases_similarity(self, index='simpson'):
-        g = self.graph
-        edges = {}
-        nodes = {}
         self.update_sources()
-        nodes = dict([(s, [v.index for v in g.vs if s in v['sources']])
-                      for s in self.sources])
-        edges = dict([(s, [e.index for e in g.es if s in e['sources']])
-                      for s in self.sources])
-        sNodes = self.similarity_groups(nodes, index=index)
-        sEdges = self.similarity_groups(edges, index=index)
-        return {'nodes': sNodes, 'edges': sEdges}
+        if index not in self._similarity_indices:
+            g = self.graph
+            nodes = dict([(s, [v.index for v in g.vs if s in v['sources']])
+                          for s in self.sources])
+            edges = dict([(s, [e.index for e in g.es if s in e['sources']])
+                          for s in self.sources])
+            sNodes = self.similarity_groups(nodes, index=index)
+            sEdges = self.similarity_groups(edges, index=index)
+            return {'nodes': sNodes, 'edges': sEdges}
+        srcs = sorted(self.sources)
+        result = {}
+        for what in ['nodes', 'edges']:
+            size, inter = self.sources_intersections(what, srcs)
+            a = size[:, None]
+            b = size[None, :]
+            denom = {
+                'simpson': np.minimum(a, b),
+                'sorensen': a + b,
+                'jaccard': a + b - inter
+            }[index]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                sim = np.where(denom > 0, inter / denom.astype(float), 0.0)
+            result[what] = dict([(s1, dict([(s2, float(sim[i, j]))
+                                            for j, s2 in enumerate(srcs)]))
+                                 for i, s1 in enumerate(srcs)])
+        return result
+
+    _similarity_indices = set(['simpson', 'sorensen', 'jaccard'])
 
     def similarity_groups(self, groups, index='simpson'):
         index_func = '%s_index' % index
@@ -2778,12 +3853,9 @@ class PyPath(object):
         Separates networks from different sources.
         Returns dict of igraph objects.
         """
-        return dict([(s, self.get_network({
-            'edge': {
-                'sources': [s]
-            },
-            'node': {}
-        })) for s in self.sources])
+        mat = self.source_matrix()
+        return dict([(s, self._subgraph_by_sources(mat, [s]))
+                     for s in self.sources])
 
     def separate_by_category(self):
         """
@@ -2818,12 +3890,20 @@ class PyPath(object):
                     )
                 )
             )
-        return dict([(c, self.get_network({
-            'edge': {
-                'sources': s
-            },
-            'node': {}
-        })) for c, s in iteritems(cats)])
+        mat = self.source_matrix()
+        return dict([(c, self._subgraph_by_sources(mat, s))
+                     for c, s in iteritems(cats)])
+
+    def _subgraph_by_sources(self, mat, sources):
+        """
+        Returns the subgraph of edges from any of `sources`,
+        using the boolean matrix from `source_matrix()`.
+        """
+        cols = [self.source_registry.bits[s] for s in sources
+                if self.source_registry.bits.get(s, mat.shape[1]) <
+                mat.shape[1]]
+        eids = np.where(mat[:, cols].any(axis=1))[0]
+        return self.graph.subgraph_edges(eids.tolist(), delete_vertices=True)
 
     def update_pathway_types(self):
         g = self.graph
@@ -2854,12 +3934,65 @@ class PyPath(object):
         list of all sources in the current network.
         """
         g = self.graph
-        src = []
-        for e in g.es:
-            src += e["sources"]
-        self.sources = list(set(src))
+        self.sources = list(set(chain.from_iterable(g.es['sources'])))
         self.update_cats()
 
+    @property
+    def source_registry(self):
+        """
+        The registry assigning an integer bit to each resource name,
+        shared with the `Direction` objects of the edges.
+        """
+        return source_registry
+
+    def source_matrix(self, what='edges'):
+        """
+        Returns a boolean array with one row for each edge (or vertex,
+        if `what` is `'nodes'`) and one column for each resource, by
+        the bits in `source_registry`. Column `source_registry.bits[s]`
+        tells which elements have resource `s` in their `sources`.
+        """
+        seq = self.graph.vs if what == 'nodes' else self.graph.es
+        bit = self.source_registry.bit
+        rows = []
+        cols = []
+        if len(seq):
+            for i, srcs in enumerate(seq['sources']):
+                for s in srcs or ():
+                    rows.append(i)
+                    cols.append(bit(s))
+        mat = np.zeros((len(seq), len(self.source_registry)), dtype=np.bool_)
+        mat[rows, cols] = True
+        return mat
+
+    def sources_dirs_counts(self):
+        """
+        Counts for each resource the number of directions, stimulations
+        and inhibitions it supports. Returns dict of arrays indexed
+        by the bits in `source_registry`.
+        """
+        masks = {'directions': [], 'stimulations': [], 'inhibitions': []}
+        if self.graph.ecount():
+            for d in self.graph.es['dirs']:
+                for i, di in d._keys():
+                    if i < 2 and d._flags & d._DIR_FLAG[i]:
+                        masks['directions'].append(d._sources[i])
+                        masks['stimulations'].append(d._positive[i])
+                        masks['inhibitions'].append(d._negative[i])
+        return dict((k, self.source_registry.count(v))
+                    for k, v in iteritems(masks))
+
+    def sources_intersections(self, what='edges', sources=None):
+        """
+        Returns the number of elements from each resource and the number
+        of elements shared by each pair of resources, as an array and a
+        matrix in the order of `sources` (by default `self.sources`).
+        """
+        sources = self.sources if sources is None else sources
+        cols = [self.source_registry.bit(s) for s in sources]
+        sub = self.source_matrix(what)[:, cols].astype(np.int64)
+        return sub.sum(axis=0), sub.T.dot(sub)
+
     def update_cats(self):
         """
         Makes sure that the `has_cats` attribute is an up to date
@@ -2887,12 +4020,12 @@ class PyPath(object):
 
     def delete_unmapped(self):
         if "unmapped" in self.graph.vs["name"]:
-            self.graph.delete_vertices(
-                self.graph.vs.find(name="unmapped").index)
+            self._delete_vertices(
+                self.graph, [self.graph.vs.find(name="unmapped").index])
             self.update_db_dict()
             self.update_vname()
 
-    def genesymbol_labels(self, graph=None, remap_all=False):
+    def genesymbol_labels(self, graph=None, remap_all=False, vids=None):
         """
         Creats vertex attribute ``label`` and fills up with Gene Symbols
         of all proteins where the Gene Symbol can be looked up based on
@@ -2900,30 +4033,48 @@ class PyPath(object):
         If the attribute ``label`` had been already initialized,
         updates this attribute or recreates if ``remap_all``
         is ``True``.
+
+        :param list vids: Label only the vertices with these indices.
+            By default all vertices are labelled, in both the
+            undirected and directed graphs if ``graph`` is ``None``.
         """
         self._already_has_directed()
-        if graph is None and self.dgraph is not None:
+        if graph is None and vids is None and self.dgraph is not None:
             self.genesymbol_labels(graph=self.dgraph, remap_all=remap_all)
         g = self.graph if graph is None else graph
         defaultNameType = self.default_name_type["protein"]
         geneSymbol = "genesymbol"
         if 'label' not in g.vs.attributes():
             remap_all = True
-        labels = [
-            None if remap_all or v['label'] == v['name'] else v['label']
-            for v in g.vs
+            vids = None
+        if not g.vcount():
+            g.vs['label'] = []
+            return
+        vids = list(xrange(g.vcount())) if vids is None else list(vids)
+        if not vids:
+            return
+        vs = g.vs.select(vids)
+        names = vs['name']
+        labels = [None] * len(names) if remap_all else [
+            None if l == n else l
+            for n, l in zip(names, vs['label'])
         ]
-        for v, l, i in zip(g.vs, labels, xrange(g.vcount())):
-            if l is None and v['type'] == 'protein':
-                label = self.mapper.map_name(v['name'],
+        if None in labels:
+            types = vs['type']
+            taxa = vs['ncbi_tax_id']
+        for i, l in enumerate(labels):
+            if l is None and types[i] == 'protein':
+                label = self.mapper.map_name(names[i],
                                              defaultNameType,
                                              geneSymbol,
-                                             ncbi_tax_id = v['ncbi_tax_id'])
+                                             ncbi_tax_id = taxa[i])
                 if len(label) == 0:
-                    labels[i] = v['name']
+                    labels[i] = names[i]
                 else:
                     labels[i] = label[0]
-        g.vs['label'] = labels
+        vs['label'] = labels
+        for index in self._vertex_indices(g):
+            index.relabel(vids, labels)
 
     def network_stats(self, outfile=None):
         '''
@@ -3173,20 +4324,13 @@ class PyPath(object):
     def sources_venn_data(self):
         result = {}
         self.update_sources()
-        g = self.graph
-        for i in self.sources:
-            for j in self.sources:
-                ini = []
-                inj = []
-                for e in g.es:
-                    if i in e["sources"]:
-                        ini.append(e.index)
-                    if j in e["sources"]:
-                        inj.append(e.index)
-                onlyi = str(len(list(set(ini) - set(inj))))
-                onlyj = str(len(list(set(inj) - set(ini))))
-                inter = str(len(list(set(ini) & set(inj))))
-                result[i + "-" + j] = [i, j, onlyi, onlyj, inter]
+        size, inter = self.sources_intersections()
+        for a, i in enumerate(self.sources):
+            for b, j in enumerate(self.sources):
+                result[i + "-" + j] = [
+                    i, j, str(size[a] - inter[a, b]),
+                    str(size[b] - inter[a, b]), str(inter[a, b])
+                ]
         self.write_table(result, "sources-venn-data.csv")
 
     def sources_hist(self):
@@ -3240,18 +4384,20 @@ class PyPath(object):
                          edgeAttrsToDel=None):
         self.update_vertex_sources()
         g = self.graph
-        verticesToDel = []
-        for v in g.vs:
-            if len(v['sources'] - set([source])) == 0:
-                verticesToDel.append(v.index)
-        g.delete_vertices(verticesToDel)
-        edgesToDel = []
-        for e in g.es:
-            if len(e['sources'] - set([source])) == 0:
-                edgesToDel.append(e.index)
-            else:
-                e['sources'] = set(e['sources']) - set([source])
-        g.delete_edges(edgesToDel)
+        bit = self.source_registry.bit(source)
+        # elements having no other resource than `source`
+        mat = self.source_matrix('nodes')
+        mat[:, bit] = False
+        self._delete_vertices(g, np.where(~mat.any(axis=1))[0].tolist())
+        mat = self.source_matrix()
+        has_source = mat[:, bit].copy()
+        mat[:, bit] = False
+        g.delete_edges(np.where(~mat.any(axis=1))[0].tolist())
+        has_source = has_source[mat.any(axis=1)]
+        g.es['sources'] = [
+            srcs - set([source]) if has else srcs
+            for srcs, has in zip(g.es['sources'], has_source)
+        ]
         if vertexAttrsToDel is not None:
             for vAttr in vertexAttrsToDel:
                 if vAttr in g.vs.attributes():
@@ -3282,15 +4428,51 @@ class PyPath(object):
                        exclude=[],
                        cache_files={},
                        reread=False,
-                       redownload=False):
+                       redownload=False,
+                       batch=False,
+                       workers=None,
+                       stream=False,
+                       chunk_size=100000,
+                       mapping_threads=4,
+                       revalidate=False):
         '''
         Loads multiple resources, and cleans up after.
         Looks up ID types, and loads all ID conversion
         tables from UniProt if necessary. This is much
         faster than loading the ID conversion and the
         resources one by one.
+
+        @batch : bool
+            Passed to `attach_network()`: set edge attributes
+            in batch, as whole columns.
+        @workers : int
+            Number of worker processes. If more than 1, the
+            resources are read and mapped in parallel, and only
+            the mapped edge lists are merged into the network
+            in this process. Huge resources are still loaded
+            one by one. Requires the `fork` start method, i.e.
+            not available on Windows. Ignored in `stream` mode.
+        @stream : bool
+            Passed to `load_resource()`: read, map and attach the
+            resources in chunks of `chunk_size` edges. Resources
+            marked as `huge` are loaded without asking.
+        @mapping_threads : int
+            Number of threads loading the ID conversion tables
+            needed by the resources, before reading any of them.
+            If 0, the tables are loaded when first used.
+        @revalidate : bool
+            Check all the files in the download cache with the
+            servers before loading, in parallel, and download
+            again the ones which have changed
+            (see `curl.revalidate_cache()`).
         '''
+        if revalidate:
+            curl.revalidate_cache()
         self.load_reflists()
+        if mapping_threads:
+            self.load_mapping_tables(
+                dict((k, v) for k, v in iteritems(lst) if k not in exclude),
+                threads=mapping_threads)
         huge = dict(
             (k, v) for k, v in iteritems(lst)
             if v.huge and k not in exclude and v.name not in cache_files)
@@ -3298,13 +4480,31 @@ class PyPath(object):
             (k, v) for k, v in iteritems(lst)
             if (not v.huge or v.name in cache_files) and k not in exclude)
         for lst in [huge, nothuge]:
+            if lst is nothuge and workers is not None and workers > 1:
+                if stream:
+                    # the workers return whole edge lists
+                    self.ownlog.msg(1, 'Worker processes can not be used '
+                                    'in `stream` mode, loading resources '
+                                    'one by one.', 'WARNING')
+                else:
+                    self.load_resources_parallel(
+                        lst,
+                        workers=workers,
+                        cache_files=cache_files,
+                        reread=reread,
+                        redownload=redownload,
+                        batch=batch)
+                    continue
             for k, v in iteritems(lst):
                 self.load_resource(
                     v,
                     clean=False,
                     cache_files=cache_files,
                     reread=reread,
-                    redownload=redownload)
+                    redownload=redownload,
+                    batch=batch,
+                    stream=stream,
+                    chunk_size=chunk_size)
                 # try:
                 #    self.load_resource(v, clean = False,
                 #        cache_files = cache_files,
@@ -3323,12 +4523,151 @@ class PyPath(object):
         self.clean_graph()
         self.update_sources()
         self.update_vertex_sources()
+        # the normalisation of the UniProt IDs met while loading
+        self.mapper.save_uniprot_normalisations()
         sys.stdout.write(
             '''\n > %u interactions between %u nodes\n from %u'''
             ''' resources have been loaded,\n for details see the log: ./%s\n'''
             % (self.graph.ecount(), self.graph.vcount(), len(self.sources),
                self.ownlog.logfile))
 
+    def mapping_tables_needed(self, lst):
+        '''
+        Returns the set of ID conversion tables needed to translate
+        the names in the resources in `lst`, as tuples of name type,
+        target name type and NCBI Taxonomy ID.
+
+        @lst : dict
+            Dict of ReadSettings instances.
+        '''
+        tables = set([])
+        for settings in lst.values():
+            taxa = self.settings_taxa(settings)
+            for ab in ('A', 'B'):
+                nameType = getattr(settings, 'nameType%s' % ab)
+                targetNameType = self.default_name_type.get(
+                    getattr(settings, 'type%s' % ab))
+                if targetNameType is None:
+                    continue
+                for tax in taxa:
+                    tables.update(self.mapper.tables_needed(
+                        nameType, targetNameType, ncbi_tax_id=tax))
+        return tables
+
+    def settings_taxa(self, settings, tax_dict=None):
+        '''
+        Returns the set of NCBI Taxonomy IDs a resource might have
+        according to the `ncbiTaxId` of its ReadSettings.
+        '''
+        tax_dict = settings.ncbiTaxId if tax_dict is None else tax_dict
+        if isinstance(tax_dict, dict):
+            if 'A' in tax_dict and 'B' in tax_dict:
+                return (self.settings_taxa(settings, tax_dict['A']) |
+                        self.settings_taxa(settings, tax_dict['B']))
+            return set(tax for tax in tax_dict['dict'].values()
+                       if tax is not None)
+        if isinstance(tax_dict, int):
+            return set([tax_dict])
+        return set([self.ncbi_tax_id])
+
+    def load_mapping_tables(self, lst, threads=4):
+        '''
+        Loads all ID conversion tables needed by the resources
+        in `lst` concurrently in `threads` threads. This way the
+        tables are not loaded one after the other at the first
+        record of each resource.
+
+        @lst : dict
+            Dict of ReadSettings instances.
+        '''
+        tables = self.mapping_tables_needed(lst)
+        self.ownlog.msg(1, 'Loading %u ID conversion tables' % len(tables))
+        self.mapper.load_tables(tables, threads=threads)
+
+    def load_resources_parallel(self,
+                                lst,
+                                workers=2,
+                                cache_files={},
+                                reread=False,
+                                redownload=False,
+                                batch=False):
+        '''
+        Reads and maps the resources in `lst` in a pool of worker
+        processes, and attaches the mapped edge lists to the network
+        in this process, in the same order as `load_resources()`
+        would do. The workers are forked from this process, so they
+        use a copy of the mapping tables loaded here. Falls back to
+        loading one by one if the `fork` start method is not
+        available.
+
+        The workers share the cache directory with this process: the
+        resources read from URLs are downloaded here before forking,
+        and the downloads of the input functions are serialised by
+        the lock of each cache file (see `curl.CacheLock`).
+
+        @lst : dict
+            Dict of ReadSettings instances.
+        @workers : int
+            Number of worker processes.
+        '''
+        global _worker_pypath
+        try:
+            ctx = multiprocessing.get_context('fork') \
+                if hasattr(multiprocessing, 'get_context') \
+                else multiprocessing
+        except ValueError:
+            ctx = None
+        if ctx is None:
+            self.ownlog.msg(1, 'Parallel loading not available on this '
+                            'platform, loading resources one by one.',
+                            'WARNING')
+            for k, v in iteritems(lst):
+                self.load_resource(
+                    v,
+                    clean=False,
+                    cache_files=cache_files,
+                    reread=reread,
+                    redownload=redownload,
+                    batch=batch)
+            return None
+        settings = list(lst.values())
+        args = [(v, cache_files, reread, redownload) for v in settings]
+        if not redownload:
+            urls = [
+                v.inFile for v in settings
+                if (v.inFile.startswith('http') or
+                    v.inFile.startswith('ftp')) and (
+                    reread or
+                    self.find_cache(v.name.lower(), cache_files) is None)
+            ]
+            if len(urls):
+                curl.prefetch(urls, silent=False)
+        sys.stdout.write('\t:: Reading %u resources by %u worker processes\n'
+                         % (len(settings), workers))
+        sys.stdout.flush()
+        _worker_pypath = self
+        pool = ctx.Pool(processes=workers)
+        try:
+            for v, result in zip(settings,
+                                 pool.imap(_read_resource_worker, args)):
+                edgeList, error = result
+                if error is not None:
+                    sys.stdout.write('\t:: Failed to load %s, see %s for '
+                                     'details.\n' %
+                                     (v.name, self.ownlog.logfile))
+                    self.ownlog.msg(1, 'Error at loading %s:\n%s' %
+                                    (v.name, error), 'ERROR')
+                    continue
+                if edgeList is None:
+                    # nothing to attach, e.g. input function failed
+                    continue
+                self.load_resource(v, clean=False, batch=batch,
+                                   edgeList=edgeList)
+        finally:
+            pool.close()
+            pool.join()
+            _worker_pypath = None
+
     def load_mappings(self):
         self.mapper.load_mappings(maps=data_formats.mapList)
 
@@ -3337,14 +4676,50 @@ class PyPath(object):
                       clean=True,
                       cache_files={},
                       reread=False,
-                      redownload=False):
+                      redownload=False,
+                      batch=False,
+                      edgeList=None,
+                      stream=False,
+                      chunk_size=100000):
+        '''
+        Reads one resource and attaches it to the network.
+
+        @edgeList : list
+            Mapped edge list of this resource, if it has been
+            read already, e.g. by a worker process.
+        @stream : bool
+            Read, map and attach the edges in chunks of `chunk_size`,
+            so the memory use does not depend on the size of the input
+            (see `read_data_file()`).
+        @chunk_size : int
+            Number of records mapped and of mapped edges attached at
+            once in `stream` mode.
+        '''
         sys.stdout.write(' > ' + settings.name + '\n')
-        self.read_data_file(
-            settings,
-            cache_files=cache_files,
-            reread=reread,
-            redownload=redownload)
-        self.attach_network()
+        if edgeList is None:
+            self.read_data_file(
+                settings,
+                cache_files=cache_files,
+                reread=reread,
+                redownload=redownload,
+                stream=stream,
+                chunk_size=chunk_size)
+        else:
+            self.raw_data = edgeList
+        if stream and edgeList is None:
+            records = iter(self.raw_data or [])
+            self.raw_data = None
+            nodes_updated = set([])
+            while True:
+                chunk = list(itertools.islice(records, chunk_size))
+                if not len(chunk):
+                    break
+                self.attach_network(
+                    chunk, batch=batch, nodes_updated=nodes_updated,
+                    update_attrs=False)
+            self.update_attrs()
+        else:
+            self.attach_network(batch=batch)
         if clean:
             self.clean_graph()
         self.update_sources()
@@ -5971,7 +7346,8 @@ class PyPath(object):
                 self.db_dict['nodes'][s].add(v.index)
 
     def sources_overlap(self, diagonal=False):
-        self.update_db_dict()
+        self.update_vertex_sources()
+        self.update_sources()
         result = {
             'single': {
                 'nodes': {},
@@ -5982,18 +7358,13 @@ class PyPath(object):
                 'edges': {}
             }
         }
-        for s in self.sources:
-            result['single']['nodes'][s] = len(self.db_dict['nodes'][s])
-            result['single']['edges'][s] = len(self.db_dict['edges'][s])
-        for s1 in self.sources:
-            for s2 in self.sources:
-                if diagonal or s1 != s2:
-                    result['overlap']['nodes'][(s1, s2)] = \
-                        len(self.db_dict['nodes'][s1] &
-                            self.db_dict['nodes'][s2])
-                    result['overlap']['edges'][(s1, s2)] = \
-                        len(self.db_dict['edges'][s1] &
-                            self.db_dict['edges'][s2])
+        for what in ['nodes', 'edges']:
+            size, inter = self.sources_intersections(what)
+            for i, s1 in enumerate(self.sources):
+                result['single'][what][s1] = int(size[i])
+                for j, s2 in enumerate(self.sources):
+                    if diagonal or s1 != s2:
+                        result['overlap'][what][(s1, s2)] = int(inter[i, j])
         return result
 
     def source_stats(self):
@@ -7267,7 +8638,7 @@ class PyPath(object):
         ]
         self.graph.delete_edges(htedgs)
         zerodeg = [v.index for v in self.graph.vs if v.degree() == 0]
-        self.graph.delete_vertices(zerodeg)
+        self._delete_vertices(self.graph, zerodeg)
         self.update_vname()
         sys.stdout.write(
             '\t:: Interactions with only high-throughput references '
@@ -7287,7 +8658,7 @@ class PyPath(object):
         ]
         self.graph.delete_edges(udedgs)
         zerodeg = [v.index for v in self.graph.vs if v.degree() == 0]
-        self.graph.delete_vertices(zerodeg)
+        self._delete_vertices(self.graph, zerodeg)
         self.update_vname()
         sys.stdout.write(
             '\t:: Undirected interactions %s '
@@ -7309,17 +8680,23 @@ class PyPath(object):
 
     def htp_stats(self):
         htdata = {}
-        refc = Counter(
-            common.flatList((r.pmid for r in e['references'])
-                            for e in self.graph.es))
+        references = self.graph.es['references']
+        sources = self.graph.es['sources']
+        refc = Counter(r.pmid for refs in references for r in refs)
+        most_common = refc.most_common()
+        # an edge is high-throughput if all of its references are
+        # above the limit, i.e. if the least cited one is
+        least = [
+            min(refc[r.pmid] for r in refs) if len(refs) else None
+            for refs in references
+        ]
         for htlim in reversed(xrange(1, 201)):
-            htrefs = set([i[0] for i in refc.most_common() if i[1] > htlim])
+            htrefs = set([i[0] for i in most_common if i[1] > htlim])
             htedgs = [
-                e.index for e in self.graph.es
-                if len(set([r.pmid for r in e['references']]) - htrefs) == 0
+                eid for eid, n in enumerate(least)
+                if n is None or n > htlim
             ]
-            htsrcs = common.uniqList(
-                common.flatList([self.graph.es[e]['sources'] for e in htedgs]))
+            htsrcs = set([]).union(*[sources[eid] for eid in htedgs])
             htdata[htlim] = {
                 'rnum': len(htrefs),
                 'enum': len(htedgs),
@@ -8242,7 +9619,7 @@ class PyPath(object):
             )
         
         ndel = len(toDel)
-        graph.delete_vertices(toDel)
+        self._delete_vertices(graph, toDel)
         
         # this for permanent identification of nodes:
         graph.vs['id_old'] = list(range(graph.vcount()))
@@ -8265,6 +9642,9 @@ class PyPath(object):
         
         graph.vs['name'] = newnames
         
+        for index in self._vertex_indices(graph):
+            index.invalidate(graph)
+        
         # the new nodes to be added because of ambiguous mapping
         toAdd = \
             list(
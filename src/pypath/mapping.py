@@ -24,6 +24,16 @@ import codecs
 import re
 import imp
 import copy
+import time
+import bisect
+import mmap
+import multiprocessing
+import multiprocessing.pool
+import threading
+import traceback
+import struct
+import sqlite3
+from collections import Counter, OrderedDict, deque
 
 import urllib
 
@@ -49,19 +59,485 @@ import pypath.mapping_input as mapping_input
 import pypath.uniprot_input as uniprot_input
 import pypath.input_formats as input_formats
 
-__all__ = ['MappingTable', 'Mapper']
+# held while the tables of a Mapper are modified,
+# as they might be loaded in threads (Mapper.load_tables())
+_tables_lock = threading.RLock()
+# held while the translation counters and the report are updated
+_stats_lock = threading.Lock()
+# the depth of nested map_name() and map_names() calls in each thread,
+# only the outermost call is counted in the statistics
+_map_depth = threading.local()
+
+__all__ = ['MmapMapping', 'SqliteMapping', 'PrefixIndex', 'MappingTable',
+           'Mapper']
 
 ###
 # functions to read and use mapping tables from UniProt, file, mysql or pickle
 ###
 
 
+def _refseq_version(key):
+    '''
+    Returns the stem and the version number of a versioned RefSeq ID,
+    e.g. ``('NP_000537', 3)`` for ``NP_000537.3``, or None if ``key``
+    is not a stem followed by a dot and a version number.
+    '''
+    if type(key) not in common.charTypes:
+        return None
+    stem, dot, version = key.partition('.')
+    if version.isdigit() and '%u' % int(version) == version:
+        return stem, int(version)
+
+
+def _uniprot_idmapping_chunks(infile, chunk_size=1 << 24):
+    '''
+    Cuts the UniProt ID mapping file into chunks of about
+    ``chunk_size`` bytes, always at the boundary of two entries,
+    so the chunks can be processed independently.
+    '''
+    carry = b''
+    while True:
+        chunk = carry + infile.read(chunk_size)
+        if not len(chunk):
+            break
+        chunk += infile.readline()
+        last = chunk.rstrip(b'\n').rsplit(b'\n', 1)[-1]
+        ac = last.split(b'\t', 1)[0].split(b'-')[0]
+        carry = b''
+        for line in iter(infile.readline, b''):
+            if line.split(b'\t', 1)[0].split(b'-')[0] != ac:
+                carry = line
+                break
+            chunk += line
+        yield chunk
+
+
+def _uniprot_idmapping_worker(args):
+    '''
+    Processes one chunk of the UniProt ID mapping file. Keeps only
+    the ID types in ``types`` and the entries of organism
+    ``ncbi_tax_id``; entries without taxon are kept too.
+    Returns a dict with the mapping dicts of each ID type.
+    '''
+    chunk, types, ncbi_tax_id, bi = args
+    ncbi_tax_id = '%u' % ncbi_tax_id
+    result = dict((ac_typ, {'to': {}, 'from': {}})
+                  for ac_typ in types.values())
+    entry = None
+    records = []
+    taxon = None
+    for l in chunk.decode('utf-8').split('\n') + ['']:
+        l = l.split('\t')
+        uniprot = l[0].split('-')[0]
+        if uniprot != entry:
+            if taxon is None or taxon == ncbi_tax_id:
+                for ac_typ, other, u in records:
+                    result[ac_typ]['to'].setdefault(other, []).append(u)
+                    if bi:
+                        result[ac_typ]['from'].setdefault(u, []).append(other)
+            entry = uniprot
+            records = []
+            taxon = None
+        if len(l) < 3:
+            continue
+        if l[1] == 'NCBI_TaxID':
+            taxon = l[2].strip()
+        elif l[1] in types:
+            records.append((types[l[1]], l[2].strip().split('.')[0], uniprot))
+    return result
+
+
+class MmapMapping(object):
+    '''
+    Read only, dict like mapping table stored in a file which
+    is opened by ``mmap``. The file contains the sorted keys
+    and the values in a string pool, and two arrays with the
+    offsets of the keys and the values. Keys are looked up by
+    binary search, without loading the table into the memory,
+    and processes opening the same file share one copy of it
+    in the page cache.
+    '''
+    
+    magic = b'PYPMAP01'
+    
+    def __init__(self, fname):
+        self.fname = fname
+        self.fp = open(fname, 'rb')
+        self.mm = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:8] != self.magic:
+            self.close()
+            raise ValueError('Not a mapping table file: `%s`' % fname)
+        self.n = struct.unpack_from('<Q', self.mm, 8)[0]
+        self.keyoff = 16
+        self.valoff = 16 + 8 * (self.n + 1)
+    
+    @classmethod
+    def write(cls, fname, mapping):
+        '''
+        Writes the dict of lists ``mapping`` into file ``fname``
+        in the format read by this class.
+        '''
+        items = sorted(
+            (cls._encode(key), b'\t'.join(cls._encode(v) for v in value))
+            for key, value in iteritems(mapping)
+            if type(key) in common.charTypes
+        )
+        n = len(items)
+        offsets = [16 + 16 * (n + 1)]
+        for i in (0, 1):
+            for item in items:
+                offsets.append(offsets[-1] + len(item[i]))
+            if i == 0:
+                offsets.append(offsets[-1])
+        tmpname = '%s.%u.tmp' % (fname, os.getpid())
+        with open(tmpname, 'wb') as fp:
+            fp.write(cls.magic)
+            fp.write(struct.pack('<Q', n))
+            fp.write(struct.pack('<%uQ' % len(offsets), *offsets))
+            for i in (0, 1):
+                fp.write(b''.join(item[i] for item in items))
+        if os.path.exists(fname):
+            os.remove(fname)
+        os.rename(tmpname, fname)
+    
+    @staticmethod
+    def _encode(s):
+        return s if isinstance(s, bytes) else s.encode('utf-8')
+    
+    def _offsets(self, base, i):
+        return struct.unpack_from('<QQ', self.mm, base + 8 * i)
+    
+    def _key(self, i):
+        a, b = self._offsets(self.keyoff, i)
+        return self.mm[a:b]
+    
+    def _value(self, i):
+        a, b = self._offsets(self.valoff, i)
+        return self.mm[a:b].decode('utf-8').split('\t') if b > a else []
+    
+    def _bisect(self, key):
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def _find(self, key):
+        if type(key) not in common.charTypes:
+            return None
+        key = self._encode(key)
+        i = self._bisect(key)
+        if i < self.n and self._key(i) == key:
+            return i
+    
+    def versions(self, stem):
+        '''
+        Returns the keys which are ``stem`` followed by a version
+        number, ordered by version. As the keys are sorted, these
+        are found by binary search.
+        '''
+        prefix = self._encode(stem) + b'.'
+        keys = []
+        i = self._bisect(prefix)
+        while i < self.n:
+            key = self._key(i)
+            if not key.startswith(prefix):
+                break
+            keys.append(key.decode('utf-8'))
+            i += 1
+        return MappingTable.sort_versions(keys)
+    
+    def __contains__(self, key):
+        return self._find(key) is not None
+    
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i is None:
+            raise KeyError(key)
+        return self._value(i)
+    
+    def get(self, key, default=None):
+        i = self._find(key)
+        return default if i is None else self._value(i)
+    
+    def __len__(self):
+        return self.n
+    
+    def keys(self):
+        for i in xrange(self.n):
+            yield self._key(i).decode('utf-8')
+    
+    __iter__ = keys
+    iterkeys = keys
+    
+    def values(self):
+        for i in xrange(self.n):
+            yield self._value(i)
+    
+    itervalues = values
+    
+    def items(self):
+        for i in xrange(self.n):
+            yield self._key(i).decode('utf-8'), self._value(i)
+    
+    iteritems = items
+    
+    def close(self):
+        self.mm.close()
+        self.fp.close()
+    
+    def __reduce__(self):
+        return self.__class__, (self.fname,)
+
+
+class SqliteMapping(object):
+    '''
+    Read only, dict like mapping table stored in an SQLite database.
+    One database holds any number of tables, in rows indexed by
+    organism, ID types and key, with the values joined by tabs.
+    For keys which are versioned RefSeq IDs, the stem is stored
+    in an indexed column (see :py:func:SqliteMapping.versions()).
+    The most recent lookups, including the misses, are kept in
+    a small cache of ``lru_size`` elements.
+    The database is opened at the first lookup, and opened again
+    in each new process, as connections must not be shared with
+    forked processes.
+    '''
+    
+    def __init__(self, path, ncbi_tax_id, one, two, lru_size=10000):
+        self.path = path
+        self.ncbi_tax_id = ncbi_tax_id
+        self.one = one
+        self.two = two
+        self.lru_size = lru_size
+        self.lru_cache = OrderedDict()
+        self._con = None
+        self._pid = None
+        self.n = None
+    
+    @property
+    def con(self):
+        if self._con is None or self._pid != os.getpid():
+            # the connection of the parent process is left untouched
+            self._con = self.connect(self.path)
+            self._pid = os.getpid()
+        return self._con
+    
+    @staticmethod
+    def connect(path):
+        con = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        con.execute('CREATE TABLE IF NOT EXISTS mapping ('
+                    'tax INTEGER, one TEXT, two TEXT, key TEXT, value TEXT, '
+                    'stem TEXT, PRIMARY KEY (tax, one, two, key))')
+        con.execute('CREATE TABLE IF NOT EXISTS tables ('
+                    'tax INTEGER, one TEXT, two TEXT, mid TEXT, '
+                    'PRIMARY KEY (tax, one, two))')
+        columns = [row[1] for row in con.execute('PRAGMA table_info(mapping)')]
+        if 'stem' not in columns:
+            # database written before the stems have been stored:
+            # all tables will be written again
+            try:
+                with con:
+                    con.execute('ALTER TABLE mapping ADD COLUMN stem TEXT')
+                    con.execute('DELETE FROM tables')
+            except sqlite3.OperationalError:
+                # added by another process meanwhile
+                pass
+        con.execute('CREATE INDEX IF NOT EXISTS mapping_stem '
+                    'ON mapping (tax, one, two, stem)')
+        return con
+    
+    @classmethod
+    def write(cls, path, ncbi_tax_id, one, two, mapping, mid=None):
+        '''
+        Writes the dict of lists ``mapping`` into the database
+        ``path``, replacing the table with the same organism
+        and ID types if any.
+        '''
+        con = cls.connect(path)
+        with con:
+            con.execute('DELETE FROM mapping WHERE '
+                        'tax = ? AND one = ? AND two = ?',
+                        (ncbi_tax_id, one, two))
+            con.executemany(
+                'INSERT OR REPLACE INTO mapping '
+                '(tax, one, two, key, value, stem) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                ((ncbi_tax_id, one, two, key, '\t'.join(value),
+                  (_refseq_version(key) or (None,))[0])
+                 for key, value in iteritems(mapping)
+                 if type(key) in common.charTypes))
+            con.execute('INSERT OR REPLACE INTO tables VALUES (?, ?, ?, ?)',
+                        (ncbi_tax_id, one, two, mid))
+        con.close()
+    
+    @classmethod
+    def has(cls, path, ncbi_tax_id, one, two, mid=None):
+        '''
+        Tells if the database ``path`` contains the table, and it
+        has been written with the same ``mid``.
+        '''
+        if not os.path.isfile(path):
+            return False
+        con = cls.connect(path)
+        row = con.execute('SELECT mid FROM tables WHERE '
+                          'tax = ? AND one = ? AND two = ?',
+                          (ncbi_tax_id, one, two)).fetchone()
+        con.close()
+        return row is not None and row[0] == mid
+    
+    def _select(self, what, where=''):
+        return self.con.execute(
+            'SELECT %s FROM mapping WHERE tax = ? AND one = ? AND two = ?%s'
+            % (what, where), (self.ncbi_tax_id, self.one, self.two))
+    
+    def _lookup(self, key):
+        if key in self.lru_cache:
+            value = self.lru_cache.pop(key)
+        else:
+            row = self.con.execute(
+                'SELECT value FROM mapping WHERE '
+                'tax = ? AND one = ? AND two = ? AND key = ?',
+                (self.ncbi_tax_id, self.one, self.two, key)
+            ).fetchone() if type(key) in common.charTypes else None
+            value = None if row is None else self._value(row[0])
+            if len(self.lru_cache) >= self.lru_size:
+                self.lru_cache.popitem(last=False)
+        self.lru_cache[key] = value
+        return value
+    
+    @staticmethod
+    def _value(value):
+        return value.split('\t') if len(value) else []
+    
+    def get_many(self, keys):
+        '''
+        Looks up many keys at once. Returns a dict with the keys
+        found and their values.
+        '''
+        result = {}
+        keys = [key for key in keys if type(key) in common.charTypes]
+        for i in xrange(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            result.update(
+                (key, self._value(value))
+                for key, value in self.con.execute(
+                    'SELECT key, value FROM mapping WHERE '
+                    'tax = ? AND one = ? AND two = ? AND key IN (%s)' %
+                    ', '.join(['?'] * len(chunk)),
+                    [self.ncbi_tax_id, self.one, self.two] + chunk))
+        return result
+    
+    def versions(self, stem):
+        '''
+        Returns the keys which are ``stem`` followed by a version
+        number, ordered by version, looked up by the stem column.
+        '''
+        return MappingTable.sort_versions(
+            row[0] for row in self.con.execute(
+                'SELECT key FROM mapping WHERE '
+                'tax = ? AND one = ? AND two = ? AND stem = ?',
+                (self.ncbi_tax_id, self.one, self.two, stem)))
+    
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+    
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+    
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is None else value
+    
+    def __len__(self):
+        if self.n is None:
+            self.n = self._select('COUNT(*)').fetchone()[0]
+        return self.n
+    
+    def keys(self):
+        for row in self._select('key', ' ORDER BY key'):
+            yield row[0]
+    
+    __iter__ = keys
+    iterkeys = keys
+    
+    def values(self):
+        for row in self._select('value', ' ORDER BY key'):
+            yield self._value(row[0])
+    
+    itervalues = values
+    
+    def items(self):
+        for key, value in self._select('key, value', ' ORDER BY key'):
+            yield key, self._value(value)
+    
+    iteritems = items
+    
+    def close(self):
+        if self._con is not None and self._pid == os.getpid():
+            self._con.close()
+        self._con = None
+        self._pid = None
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_con'] = None
+        state['_pid'] = None
+        return state
+
+
+class PrefixIndex(object):
+    '''
+    Sorted array of the keys of one or more mapping tables, to
+    find keys by prefix with binary search. Only the keys are
+    stored, the values are looked up in the tables themselves.
+    '''
+    
+    def __init__(self, *tables):
+        self.tables = tables
+        self.keys = sorted(set(
+            key for tbl in tables for key in tbl
+            if type(key) in common.charTypes
+        ))
+    
+    def prefix(self, prefix, rank=None):
+        '''
+        Returns the keys starting with ``prefix``, ordered by
+        ``rank``, by default the shortest ones first.
+        '''
+        i = j = bisect.bisect_left(self.keys, prefix)
+        while j < len(self.keys) and self.keys[j].startswith(prefix):
+            j += 1
+        return sorted(self.keys[i:j],
+                      key = rank or (lambda key: (len(key), key)))
+    
+    def lookup(self, prefix, rank=None):
+        '''
+        Returns the values of all keys starting with ``prefix``.
+        '''
+        result = []
+        for key in self.prefix(prefix, rank):
+            for tbl in self.tables:
+                result.extend(tbl.get(key, []))
+        return result
+
+
 class MappingTable(object):
     '''
     To initialize ID conversion tables for the first time
     data is downloaded from UniProt and read to dictionaries.
     It takes a couple of seconds. Data is saved to pickle 
     dumps, this way after tables load much faster.
+    With ``use_mmap`` the tables are saved also in the format
+    of ``MmapMapping``, and opened from there next time.
+    With ``sqlite`` (path to a database file) the tables are
+    stored in the database and used as ``SqliteMapping``.
     '''
 
     def __init__(self,
@@ -75,7 +551,9 @@ class MappingTable(object):
                  log=None,
                  cache=False,
                  cachedir='cache',
-                 uniprots = None):
+                 uniprots = None,
+                 use_mmap = False,
+                 sqlite = None):
         self.param = param
         self.one = one
         self.two = two
@@ -85,7 +563,11 @@ class MappingTable(object):
         self.mysql = mysql
         self.cache = cache
         self.cachedir = cachedir
+        self.use_mmap = use_mmap
+        self.sqlite = sqlite
+        self.ncbi_tax_id = ncbi_tax_id
         self.mapping = {"to": {}, "from": {}}
+        self.stems = {}
         if log.__class__.__name__ != 'logw':
             self.session = common.gen_session_id()
             self.ownlog = logn.logw(self.session, 'INFO')
@@ -97,7 +579,13 @@ class MappingTable(object):
             md5param = common.md5(json.dumps(self.param.__dict__))
             self.cachefile = os.path.join(self.cachedir, md5param)
             
-            if self.cache and os.path.isfile(self.cachefile):
+            if self.sqlite and self.has_sqlite():
+                self.load_sqlite()
+            
+            elif self.cache and self.use_mmap and self.has_mmap():
+                self.load_mmap()
+            
+            elif self.cache and os.path.isfile(self.cachefile):
                 self.mapping = pickle.load(open(self.cachefile, 'rb'))
             
             elif len(self.mapping['to']) == 0 or (
@@ -121,6 +609,61 @@ class MappingTable(object):
                 if len(self.mapping['to']) and (
                         not param.bi or len(self.mapping['from'])):
                     pickle.dump(self.mapping, open(self.cachefile, 'wb'))
+            
+            if self.cache and self.use_mmap and len(self.mapping['to']) \
+                    and not self.has_mmap():
+                self.save_mmap()
+            
+            if self.sqlite and len(self.mapping['to']) \
+                    and not self.has_sqlite():
+                self.save_sqlite()
+            
+            self.index_stems()
+
+    def mmap_files(self):
+        return dict((d, '%s-%s.map' % (self.cachefile, d))
+                    for d in ('to', 'from'))
+
+    def has_mmap(self):
+        return all(os.path.isfile(f) for f in self.mmap_files().values())
+
+    def save_mmap(self):
+        '''
+        Writes the tables into ``MmapMapping`` files and replaces
+        the dicts in the memory with the ``MmapMapping`` objects.
+        '''
+        for d, fname in iteritems(self.mmap_files()):
+            MmapMapping.write(fname, self.mapping[d])
+        self.load_mmap()
+
+    def load_mmap(self):
+        for d, fname in iteritems(self.mmap_files()):
+            self.mapping[d] = MmapMapping(fname)
+
+    def has_sqlite(self):
+        return SqliteMapping.has(self.sqlite, self.ncbi_tax_id,
+                                 self.one, self.two, self.mid)
+
+    def save_sqlite(self):
+        '''
+        Writes the tables into the SQLite database and replaces
+        the dicts in the memory with ``SqliteMapping`` objects.
+        The reverse table is written only if it is not empty.
+        '''
+        SqliteMapping.write(self.sqlite, self.ncbi_tax_id, self.one,
+                            self.two, self.mapping['to'], self.mid)
+        if len(self.mapping['from']):
+            SqliteMapping.write(self.sqlite, self.ncbi_tax_id, self.two,
+                                self.one, self.mapping['from'], self.mid)
+        self.load_sqlite()
+
+    def load_sqlite(self):
+        self.mapping['to'] = SqliteMapping(self.sqlite, self.ncbi_tax_id,
+                                           self.one, self.two)
+        self.mapping['from'] = SqliteMapping(
+            self.sqlite, self.ncbi_tax_id, self.two, self.one) \
+            if SqliteMapping.has(self.sqlite, self.ncbi_tax_id,
+                                 self.two, self.one, self.mid) else {}
 
     def reload(self):
         modname = self.__class__.__module__
@@ -129,6 +672,56 @@ class MappingTable(object):
         new = getattr(mod, self.__class__.__name__)
         setattr(self, '__class__', new)
 
+    def refseq_versions(self, stem, direction='to'):
+        '''
+        Returns the keys of the table which are the RefSeq ID ``stem``
+        with a version number, ordered by version. ``MmapMapping``
+        and ``SqliteMapping`` tables look these up by their own
+        index, for dicts an index is built by
+        :py:func:MappingTable.index_stems().
+        '''
+        mapping = self.mapping[direction]
+        if hasattr(mapping, 'versions'):
+            return mapping.versions(stem)
+        if direction not in self.stems or \
+                self.stems[direction][0] is not mapping:
+            self.index_stems(direction)
+        return self.stems[direction][1].get(stem, [])
+
+    def index_stems(self, direction=None):
+        '''
+        Builds the index of the versioned RefSeq keys by their stem
+        for the tables held in dicts. By default for the directions
+        with RefSeq keys, called when the table has been loaded.
+        '''
+        directions = [direction] if direction is not None else [
+            d for d, key_type in (('to', self.one), ('from', self.two))
+            if str(key_type).startswith('refseq')
+        ]
+        for d in directions:
+            mapping = self.mapping[d]
+            if hasattr(mapping, 'versions'):
+                continue
+            stems = {}
+            for key in mapping:
+                version = _refseq_version(key)
+                if version is not None:
+                    stems.setdefault(version[0], []).append(key)
+            self.stems[d] = (mapping, dict(
+                (stem, self.sort_versions(keys))
+                for stem, keys in iteritems(stems)))
+
+    @staticmethod
+    def sort_versions(keys):
+        '''
+        Returns the versioned RefSeq IDs among ``keys`` ordered by
+        version number.
+        '''
+        versions = ((_refseq_version(key), key) for key in keys)
+        return [key for version, key in sorted(
+            (version[1], key) for version, key in versions
+            if version is not None)]
+
     def cleanDict(self, mapping):
         for key, value in iteritems(mapping):
             mapping[key] = common.uniqList(value)
@@ -413,12 +1006,21 @@ class Mapper(object):
                  mysql_conf=(None, 'mapping'),
                  log=None,
                  cache=True,
-                 cachedir='cache'):
+                 cachedir='cache',
+                 lru_size=100000,
+                 use_mmap=False,
+                 sqlite=None,
+                 genesymbol_suffixes=('1',),
+                 genesymbol_prefix=(5, 5),
+                 genesymbol_rank=None,
+                 uniprot_norm_save=None):
         self.reup = re.compile(
             r'[OPQ][0-9][A-Z0-9]{3}[0-9]|[A-NR-Z][0-9]([A-Z][A-Z0-9]{2}[0-9]){1,2}'
         )
         self.cache = cache
         self.cachedir = cachedir
+        self.use_mmap = use_mmap
+        self.sqlite = sqlite
         if self.cache and not os.path.exists(self.cachedir):
             os.mkdir(self.cachedir)
         self.unmapped = []
@@ -426,7 +1028,7 @@ class Mapper(object):
         self.default_ncbi_tax_id = ncbi_tax_id
         self.tables = {}
         self.tables[self.default_ncbi_tax_id] = {}
-        self.uniprot_mapped = []
+        self.uniprot_mapped = deque(maxlen=10000)
         if log.__class__.__name__ != 'logw':
             self.session = common.gen_session_id()
             self.ownlog = logn.logw(self.session, 'INFO')
@@ -450,6 +1052,23 @@ class Mapper(object):
         }
         self.types_name = dict(
             zip(self.name_types.values(), self.name_types.keys()))
+        self.lru_size = lru_size
+        self.lru_cache = OrderedDict()
+        self.lru_hits = 0
+        self.lru_misses = 0
+        self.genesymbol_suffixes = genesymbol_suffixes
+        self.genesymbol_prefix = genesymbol_prefix
+        self.genesymbol_rank = genesymbol_rank
+        self.genesymbol_index = {}
+        self.uniprot_norm = {}
+        self.uniprot_norm_unsaved = Counter()
+        self.uniprot_norm_save = uniprot_norm_save
+        self.uniprots = {}
+        self.stage_counts = Counter()
+        self.stage_time = Counter()
+        self.table_stats = {}
+        self.report = None
+        self.report_samples = 10
 
     def reload(self):
         modname = self.__class__.__module__
@@ -461,6 +1080,37 @@ class Mapper(object):
     def init_mysql(self):
         self.mysql = mysql.MysqlRunner(self.mysql_conf, log=self.ownlog)
 
+    def clear_cache(self, tables=None):
+        '''
+        Empties the cache of :py:func:Mapper.map_name().
+        Called each time a mapping table is loaded or modified.
+        The UniProt normalisation tables are dropped only if any of
+        the ``tables`` (list of name type pairs) is used for the
+        normalisation, or no ``tables`` given.
+        '''
+        with _tables_lock:
+            self.lru_cache.clear()
+            self.genesymbol_index = {}
+            if tables is None or any(
+                    set(tbl) & set(['uniprot-sec', 'uniprot-pri',
+                                    'trembl', 'swissprot'])
+                    for tbl in tables):
+                self.uniprot_norm = {}
+                self.uniprot_norm_unsaved = Counter()
+
+    def cache_info(self):
+        '''
+        Returns a dict with the number of hits and misses and
+        the current and maximum size of the
+        :py:func:Mapper.map_name() cache.
+        '''
+        return {
+            'hits': self.lru_hits,
+            'misses': self.lru_misses,
+            'size': len(self.lru_cache),
+            'maxsize': self.lru_size
+        }
+
     def which_table(self, nameType, targetNameType,
                     load=True, ncbi_tax_id = None):
         '''
@@ -520,7 +1170,7 @@ class Mapper(object):
                         targetNameType = targetNameType,
                         ncbi_tax_id = ncbi_tax_id)
                     
-                    tables[tblName] = MappingTable(
+                    table = MappingTable(
                         nameType,
                         targetNameType,
                         this_param.typ,
@@ -530,8 +1180,15 @@ class Mapper(object):
                         ncbi_tax_id,
                         log=self.ownlog,
                         cache=self.cache,
-                        cachedir=self.cachedir
+                        cachedir=self.cachedir,
+                        uniprots=self.uniprots.get(
+                            (ncbi_tax_id, this_param.swissprot)),
+                        use_mmap=self.use_mmap,
+                        sqlite=self.sqlite
                     )
+                    with _tables_lock:
+                        tables[tblName] = table
+                        self.clear_cache([tblName])
                 
                 tbl = self.which_table(
                         nameType, targetNameType, load=False,
@@ -540,7 +1197,8 @@ class Mapper(object):
             if tbl is None:
                 
                 if nameType in self.name_types:
-                    self.load_uniprot_mappings([nameType])
+                    self.load_uniprot_mappings([nameType],
+                                               ncbi_tax_id = ncbi_tax_id)
                     
                     tbl = self.which_table(
                             nameType, targetNameType, load=False,
@@ -550,6 +1208,104 @@ class Mapper(object):
     def get_tax_id(self, ncbi_tax_id):
         return self.default_ncbi_tax_id if ncbi_tax_id is None else ncbi_tax_id
 
+    def tables_needed(self, nameType, targetNameType, ncbi_tax_id = None):
+        '''
+        Returns the set of mapping tables used by
+        :py:func:Mapper.map_name() to translate from nameType
+        to targetNameType, as tuples of name type, target name
+        type and NCBI Taxonomy ID.
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        tables = set([])
+        if type(nameType) is list:
+            for nt in nameType:
+                tables.update(self.tables_needed(nt, targetNameType,
+                                                 ncbi_tax_id))
+            return tables
+        if nameType != targetNameType:
+            tables.add((nameType, targetNameType, ncbi_tax_id))
+            if nameType == 'genesymbol':
+                tables.add(('genesymbol-syn', targetNameType, ncbi_tax_id))
+        if targetNameType == 'uniprot':
+            tables.add(('uniprot-sec', 'uniprot-pri', 0))
+            tables.add(('trembl', 'genesymbol', ncbi_tax_id))
+            tables.update(self.tables_needed('genesymbol', 'swissprot',
+                                             ncbi_tax_id))
+        return tables
+
+    def load_tables(self, tables, threads = 4):
+        '''
+        Loads the mapping tables in ``tables`` (tuples of name
+        type, target name type and NCBI Taxonomy ID) in a pool
+        of ``threads`` threads, so the downloads and the
+        processing of different tables are done concurrently.
+        Errors are logged, and the table is left to be loaded
+        later by :py:func:Mapper.which_table() as usual.
+        A table and its reverse are loaded by the same thread, as
+        loading one of them might load the other. The list of all
+        UniProt IDs, used by all the tables from the UniProt upload
+        lists service, is downloaded once before.
+        '''
+        tables = sorted(tables, key = lambda t: tuple(map(str, t)))
+        jobs = {}
+        for nameType, targetNameType, ncbi_tax_id in tables:
+            # creating the dicts before, to not race for them
+            if ncbi_tax_id not in self.tables:
+                self.tables[ncbi_tax_id] = {}
+            jobs.setdefault(
+                (tuple(sorted((nameType, targetNameType))), ncbi_tax_id),
+                []).append((nameType, targetNameType, ncbi_tax_id))
+        jobs = list(jobs.values())
+        
+        for nameType, targetNameType, ncbi_tax_id in tables:
+            if self.uniprot_list_table(nameType, targetNameType):
+                key = (ncbi_tax_id, True)
+                if key not in self.uniprots:
+                    try:
+                        self.uniprots[key] = uniprot_input.all_uniprots(
+                            ncbi_tax_id, swissprot = True)
+                    except Exception:
+                        self.ownlog.msg(2, 'Failed to download the list of '
+                                        'UniProt IDs:\n%s' %
+                                        traceback.format_exc(), 'ERROR')
+        
+        def load(job):
+            for table in job:
+                try:
+                    self.which_table(table[0], table[1],
+                                     ncbi_tax_id = table[2])
+                except Exception:
+                    self.ownlog.msg(2, 'Failed to load mapping table '
+                                    '%s:\n%s' %
+                                    (str(table), traceback.format_exc()),
+                                    'ERROR')
+        
+        try:
+            if threads is None or threads < 2 or len(jobs) < 2:
+                for job in jobs:
+                    load(job)
+                return None
+            pool = multiprocessing.pool.ThreadPool(min(threads, len(jobs)))
+            try:
+                pool.map(load, jobs)
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            self.uniprots = {}
+    
+    def uniprot_list_table(self, nameType, targetNameType):
+        '''
+        Tells if :py:func:Mapper.which_table() loads the table
+        from the UniProt upload lists service, i.e. it is not
+        defined in the maps module.
+        '''
+        return nameType in self.name_types and not any(
+            pair in getattr(maps, form)
+            for form in ('mapListUniprot', 'mapListBasic')
+            for pair in ((nameType, targetNameType),
+                         (targetNameType, nameType)))
+
     def map_name(self,
                  name,
                  nameType,
@@ -592,64 +1348,611 @@ class Mapper(object):
             To use other IDs, you need to define the input method
             and load the table before calling :py:func:Mapper.map_name().
 
+        The results, including the empty ones, are kept in a
+        least recently used cache of ``lru_size`` elements, which
+        is cleared each time a mapping table is loaded.
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        depth = getattr(_map_depth, 'depth', 0)
+        _map_depth.depth = depth + 1
+        try:
+            mappedNames, stage = self._map_name_cached(name, nameType,
+                                                       targetNameType,
+                                                       ncbi_tax_id,
+                                                       strict, silent)
+        finally:
+            _map_depth.depth = depth
+        if not depth:
+            with _stats_lock:
+                self.count_stage(stage, mappedNames, name)
+        return list(mappedNames)
+
+    def _map_name_cached(self, name, nameType, targetNameType,
+                         ncbi_tax_id, strict=False, silent=True):
+        '''
+        Looks up the result of :py:func:Mapper.map_name() in the
+        cache, or translates the name if it is not there. Returns
+        the translated names and the fallback stage which yielded
+        them.
+        '''
+        key = (name,
+               tuple(nameType) if type(nameType) is list else nameType,
+               targetNameType, ncbi_tax_id, strict)
+        if key in self.lru_cache:
+            self.lru_hits += 1
+            result = self.lru_cache.pop(key)
+        else:
+            self.lru_misses += 1
+            result = self._map_name_chain(name, nameType, targetNameType,
+                                          ncbi_tax_id, strict, silent)
+            if not self.lru_size:
+                return result
+            if len(self.lru_cache) >= self.lru_size:
+                self.lru_cache.popitem(last=False)
+        self.lru_cache[key] = result
+        return result
+
+    def _map_name_chain(self, name, nameType, targetNameType,
+                        ncbi_tax_id, strict=False, silent=True):
+        '''
+        Does the actual work for :py:func:Mapper.map_name(),
+        without using the cache. Returns the translated names and
+        the fallback stage which yielded them.
         '''
         ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
         if type(nameType) is list:
             mappedNames = []
+            stage = 'unmapped'
             for nt in nameType:
-                mappedNames += self.map_name(name, nt, targetNameType, strict,
-                                             silent)
-            return common.uniqList(mappedNames)
+                mapped, ntstage = self._map_name_cached(name, nt,
+                                                        targetNameType,
+                                                        ncbi_tax_id,
+                                                        strict, silent)
+                if len(mapped) and not len(mappedNames):
+                    stage = ntstage
+                mappedNames += mapped
+            return common.uniqList(mappedNames), stage
+        t = time.time()
         if nameType == targetNameType:
+            stage = 'same'
             if targetNameType != 'uniprot':
-                return [name]
+                return [name], stage
             else:
                 mappedNames = [name]
         elif nameType.startswith('refseq'):
+            stage = 'refseq'
             mappedNames = self.map_refseq(name,
                                           nameType,
                                           targetNameType,
                                           ncbi_tax_id = ncbi_tax_id,
                                           strict=strict)
         else:
+            stage = 'exact'
             mappedNames = self._map_name(name,
                                          nameType,
                                          targetNameType,
                                          ncbi_tax_id)
+        t = self.stage_time_add(stage, t)
         if not len(mappedNames):
+            stage = 'upper'
             mappedNames = self._map_name(name.upper(),
                                          nameType,
                                          targetNameType,
                                          ncbi_tax_id)
+            t = self.stage_time_add(stage, t)
         if not len(mappedNames) and \
             nameType not in set(['uniprot', 'trembl', 'uniprot-sec']):
+            stage = 'lower'
             mappedNames = self._map_name(name.lower(),
                                          nameType,
                                          targetNameType,
                                          ncbi_tax_id)
+            t = self.stage_time_add(stage, t)
         if not len(mappedNames) and nameType == 'genesymbol':
+            stage = 'genesymbol-syn'
             mappedNames = self._map_name(name,
                                          'genesymbol-syn',
                                          targetNameType,
                                          ncbi_tax_id)
-            if not strict and not len(mappedNames):
-                mappedNames = self._map_name('%s1' % name,
-                                             'genesymbol',
-                                             targetNameType,
-                                             ncbi_tax_id)
-                if not len(mappedNames):
-                    mappedNames = self._map_name(name,
-                                                 'genesymbol5',
+            t = self.stage_time_add(stage, t)
+            if not strict:
+                for suffix in self.genesymbol_suffixes:
+                    if len(mappedNames):
+                        break
+                    stage = 'suffix'
+                    mappedNames = self._map_name('%s%s' % (name, suffix),
+                                                 'genesymbol',
                                                  targetNameType,
                                                  ncbi_tax_id)
+                    t = self.stage_time_add(stage, t)
+                if not len(mappedNames):
+                    stage = 'prefix'
+                    mappedNames = self.map_genesymbol_prefix(name,
+                                                             targetNameType,
+                                                             ncbi_tax_id)
+                    t = self.stage_time_add(stage, t)
         if targetNameType == 'uniprot':
             orig = mappedNames
-            mappedNames = self.primary_uniprot(mappedNames)
-            mappedNames = self.trembl_swissprot(mappedNames, ncbi_tax_id)
+            mappedNames = self.normalise_uniprots(mappedNames, ncbi_tax_id)
             if len(set(orig) - set(mappedNames)) > 0:
                 self.uniprot_mapped.append((orig, mappedNames))
             mappedNames = [u for u in mappedNames if self.reup.match(u)]
-        return common.uniqList(mappedNames)
+            self.stage_time_add('uniprot-normalisation', t)
+        return common.uniqList(mappedNames), stage
+
+    def map_names(self,
+                  names,
+                  nameType,
+                  targetNameType,
+                  ncbi_tax_id=None,
+                  strict=False,
+                  silent=True):
+        '''
+        Batch version of :py:func:Mapper.map_name(). Translates
+        all the names in one go: the input is deduplicated, and
+        each step of the fallback chain of ``map_name`` is done
+        for all the names still unmapped at once, looking up
+        the mapping table only once per step.
+        Returns a dict with the original names as keys and the
+        same lists as values as ``map_name`` would return.
+
+        @names : iterable
+            The original names which shall be converted.
+        @nameType : str
+            The type of the names (see :py:func:Mapper.map_name()).
+        @targetNameType : str
+            The name type to convert to.
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        depth = getattr(_map_depth, 'depth', 0)
+        _map_depth.depth = depth + 1
+        try:
+            mappedNames, stages = self._map_names_chain(set(names), nameType,
+                                                        targetNameType,
+                                                        ncbi_tax_id,
+                                                        strict, silent)
+        finally:
+            _map_depth.depth = depth
+        if not depth:
+            with _stats_lock:
+                for name, mapped in iteritems(mappedNames):
+                    self.count_stage(stages.get(name), mapped, name)
+        return mappedNames
+
+    def _map_names_chain(self, names, nameType, targetNameType,
+                         ncbi_tax_id, strict=False, silent=True):
+        '''
+        Does the actual work for :py:func:Mapper.map_names().
+        Returns the dict of translated names and a dict with the
+        fallback stage which yielded them for each name.
+        '''
+        stages = {}
+        if type(nameType) is list:
+            mappedNames = dict((name, []) for name in names)
+            for nt in nameType:
+                ntmapped, ntstages = self._map_names_chain(names, nt,
+                                                           targetNameType,
+                                                           ncbi_tax_id,
+                                                           strict, silent)
+                for name, mapped in iteritems(ntmapped):
+                    if len(mapped) and not len(mappedNames[name]):
+                        stages[name] = ntstages.get(name)
+                    mappedNames[name] += mapped
+            return (dict((name, common.uniqList(mapped))
+                         for name, mapped in iteritems(mappedNames)),
+                    stages)
+        t = time.time()
+        mappedNames = {}
+        if nameType == targetNameType:
+            stages = dict((name, 'same') for name in names)
+            if targetNameType != 'uniprot':
+                return dict((name, [name]) for name in names), stages
+            else:
+                mappedNames = dict((name, [name]) for name in names)
+        elif nameType.startswith('refseq'):
+            for name in names:
+                mappedNames[name] = self.map_refseq(name,
+                                                    nameType,
+                                                    targetNameType,
+                                                    ncbi_tax_id=ncbi_tax_id,
+                                                    strict=strict)
+                stages[name] = 'refseq'
+            t = self.stage_time_add('refseq', t)
+        else:
+            self._map_names(mappedNames, names, nameType,
+                            targetNameType, ncbi_tax_id,
+                            stage='exact', stages=stages)
+            t = self.stage_time_add('exact', t)
+        self._map_names(mappedNames, names, nameType, targetNameType,
+                        ncbi_tax_id, lambda name: name.upper(),
+                        stage='upper', stages=stages)
+        t = self.stage_time_add('upper', t)
+        if nameType not in set(['uniprot', 'trembl', 'uniprot-sec']):
+            self._map_names(mappedNames, names, nameType, targetNameType,
+                            ncbi_tax_id, lambda name: name.lower(),
+                            stage='lower', stages=stages)
+            t = self.stage_time_add('lower', t)
+        if nameType == 'genesymbol':
+            self._map_names(mappedNames, names, 'genesymbol-syn',
+                            targetNameType, ncbi_tax_id,
+                            stage='genesymbol-syn', stages=stages)
+            t = self.stage_time_add('genesymbol-syn', t)
+            if not strict:
+                for suffix in self.genesymbol_suffixes:
+                    self._map_names(mappedNames, names, 'genesymbol',
+                                    targetNameType, ncbi_tax_id,
+                                    lambda name: '%s%s' % (name, suffix),
+                                    stage='suffix', stages=stages)
+                t = self.stage_time_add('suffix', t)
+                for name in names:
+                    if not len(mappedNames.get(name, [])):
+                        mappedNames[name] = self.map_genesymbol_prefix(
+                            name, targetNameType, ncbi_tax_id)
+                        stages[name] = 'prefix'
+                t = self.stage_time_add('prefix', t)
+        if targetNameType == 'uniprot':
+            self.normalise_uniprots(
+                set(u for mapped in mappedNames.values() for u in mapped),
+                ncbi_tax_id)
+            for name, orig in iteritems(mappedNames):
+                mapped = self.normalise_uniprots(orig, ncbi_tax_id)
+                if len(set(orig) - set(mapped)) > 0:
+                    self.uniprot_mapped.append((orig, mapped))
+                mappedNames[name] = [u for u in mapped if self.reup.match(u)]
+            self.stage_time_add('uniprot-normalisation', t)
+        return (dict((name, common.uniqList(mappedNames.get(name, [])))
+                     for name in names),
+                stages)
+
+    def _map_names(self, mappedNames, names, nameType, targetNameType,
+                   ncbi_tax_id, transform=None, stage=None, stages=None):
+        '''
+        One step of the fallback chain in :py:func:Mapper.map_names().
+        Looks up the names not mapped yet in ``mappedNames``,
+        optionally after applying ``transform`` on them, and
+        stores the results in ``mappedNames``, and the ``stage``
+        in ``stages``.
+        '''
+        unmapped = set(name for name in names
+                       if not len(mappedNames.get(name, [])))
+        if not len(unmapped):
+            return None
+        tbl = self.which_table(nameType, targetNameType,
+                               ncbi_tax_id=ncbi_tax_id)
+        if tbl is None:
+            return None
+        t = time.time()
+        keys = {}
+        for name in unmapped:
+            keys.setdefault(
+                name if transform is None else transform(name), []
+            ).append(name)
+        found = tbl.get_many(keys) if hasattr(tbl, 'get_many') else \
+            dict((key, tbl[key]) for key in filter(tbl.__contains__, keys))
+        for key, value in iteritems(found):
+            for name in keys[key]:
+                mappedNames[name] = value
+                if stages is not None and len(value):
+                    stages[name] = stage
+        self.table_stats_add((nameType, targetNameType, ncbi_tax_id),
+                             len(keys), len(found), t)
+
+    def count_stage(self, stage, mappedNames, name=None):
+        '''
+        Counts one translated name by the fallback stage which
+        yielded the result, in the stage counters and in the
+        current report if any (see :py:func:Mapper.start_report()).
+        In the report, the first ``report_samples`` names of each
+        stage other than the exact match are recorded as well.
+        Called with ``_stats_lock`` held.
+        '''
+        stage = stage if len(mappedNames) else 'unmapped'
+        self.stage_counts[stage] += 1
+        if self.report is not None:
+            self.report['names'] += 1
+            self.report['stages'][stage] += 1
+            if stage != 'exact' and name is not None:
+                samples = self.report['samples'].setdefault(stage, [])
+                if len(samples) < self.report_samples:
+                    samples.append(name)
+            if not len(mappedNames):
+                self.report['unmapped'] += 1
+            else:
+                self.report['mapped'] += 1
+                if len(mappedNames) > 1:
+                    self.report['ambiguous'] += 1
+
+    def stage_time_add(self, stage, t):
+        '''
+        Adds the time passed since ``t`` to the time spent in
+        ``stage``, and returns the current time.
+        '''
+        now = time.time()
+        with _stats_lock:
+            self.stage_time[stage] += now - t
+        return now
+
+    def table_stats_add(self, table, lookups, hits, t):
+        '''
+        Adds the number of ``lookups`` and ``hits`` and the time
+        passed since ``t`` to the counters of ``table``.
+        '''
+        t = time.time() - t
+        with _stats_lock:
+            if table not in self.table_stats:
+                self.table_stats[table] = [0, 0, 0.0]
+            stats = self.table_stats[table]
+            stats[0] += lookups
+            stats[1] += hits
+            stats[2] += t
+
+    def start_report(self):
+        '''
+        Starts a new mapping report: from now on, the number of
+        names translated by :py:func:Mapper.map_name() or
+        :py:func:Mapper.map_names(), how many of them have been
+        mapped, unambiguously or not, and the fallback stages
+        which yielded the results are counted in the report,
+        until :py:func:Mapper.end_report() is called. For each
+        stage other than the exact match, and for the unmapped
+        names, up to ``report_samples`` names are recorded under
+        ``samples``.
+        '''
+        report = {
+            'names': 0,
+            'mapped': 0,
+            'ambiguous': 0,
+            'unmapped': 0,
+            'stages': Counter(),
+            'samples': {}
+        }
+        with _stats_lock:
+            self.report = report
+
+    def end_report(self):
+        '''
+        Returns the current mapping report and stops counting.
+        '''
+        with _stats_lock:
+            report, self.report = self.report, None
+        return report
+
+    def report_str(self, report):
+        '''
+        Returns a one line summary of a mapping report.
+        '''
+        return '%u names: %u mapped (%u ambiguously), %u unmapped; '\
+            'by stage: %s' % (
+                report['names'], report['mapped'], report['ambiguous'],
+                report['unmapped'],
+                ', '.join('%s: %u' % (stage, n)
+                          for stage, n in report['stages'].most_common()))
+
+    def mapping_stats(self):
+        '''
+        Returns the counters of the Mapper: number of names by the
+        fallback stage which yielded their translation, time spent
+        in each stage, and the number of lookups, hits and time
+        spent for each table.
+        '''
+        with _stats_lock:
+            stats = {
+                'stages': dict(self.stage_counts),
+                'stage_time': dict(self.stage_time),
+                'tables': dict(
+                    (table, tuple(stats))
+                    for table, stats in iteritems(self.table_stats))
+            }
+        stats['cache'] = self.cache_info()
+        return stats
+
+    def uniprot_normalisation(self, ncbi_tax_id = None):
+        '''
+        Returns the UniProt normalisation table of the organism:
+        a dict with UniProt ACs as keys and tuples of the primary,
+        if possible SwissProt, ACs they translate to as values.
+        Loaded from the cache if it has been saved by
+        :py:func:Mapper.build_uniprot_normalisation() or
+        :py:func:Mapper.normalise_uniprots() from the same mapping
+        tables, and it is newer than the cache files of the tables.
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        if ncbi_tax_id not in self.uniprot_norm:
+            norm = {}
+            if self.cache:
+                # loading the tables might drop the normalisation table,
+                # hence we do this before creating it
+                cachefile = self.uniprot_normalisation_cachefile(ncbi_tax_id)
+                if cachefile is not None and os.path.isfile(cachefile):
+                    if self.uniprot_normalisation_outdated(ncbi_tax_id,
+                                                           cachefile):
+                        os.remove(cachefile)
+                    else:
+                        try:
+                            with open(cachefile, 'rb') as fp:
+                                norm = pickle.load(fp)
+                        except Exception:
+                            # e.g. truncated by a crash, treated as missing
+                            self.ownlog.msg(2, 'Could not read the UniProt '
+                                            'normalisation cache `%s`:\n%s' %
+                                            (cachefile,
+                                             traceback.format_exc()),
+                                            'WARNING')
+            self.uniprot_norm[ncbi_tax_id] = norm
+            self.uniprot_norm_unsaved[ncbi_tax_id] = 0
+        return self.uniprot_norm[ncbi_tax_id]
+
+    def uniprot_normalisation_tables(self, ncbi_tax_id = None):
+        '''
+        Returns the list of the ``MappingTable`` objects the UniProt
+        normalisation table is built from, after loading them if
+        necessary. Tables which could not be loaded are None.
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        result = []
+        for one, two, tax in (('uniprot-sec', 'uniprot-pri', 0),
+                              ('trembl', 'genesymbol', ncbi_tax_id),
+                              ('genesymbol', 'swissprot', ncbi_tax_id),
+                              ('genesymbol-syn', 'swissprot', ncbi_tax_id)):
+            self.which_table(one, two, ncbi_tax_id = tax)
+            tables = self.tables.get(tax, {})
+            result.append(tables.get((one, two), tables.get((two, one))))
+        return result
+
+    def uniprot_normalisation_cachefile(self, ncbi_tax_id):
+        '''
+        Returns the cache file name of the UniProt normalisation table,
+        which depends on the cache files of the mapping tables it is
+        built from. Returns None if any of these tables is not available.
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        sources = [
+            getattr(table, 'cachefile', None)
+            for table in self.uniprot_normalisation_tables(ncbi_tax_id)
+        ]
+        if None in sources:
+            return None
+        return os.path.join(self.cachedir,
+                            common.md5(('uniprot-normalisation',
+                                        ncbi_tax_id,
+                                        tuple(os.path.basename(s)
+                                              for s in sources))))
+
+    def uniprot_normalisation_outdated(self, ncbi_tax_id, cachefile):
+        '''
+        Tells if any of the cache files of the mapping tables the
+        UniProt normalisation table is built from is newer than
+        ``cachefile``, i.e. the tables have been rebuilt meanwhile.
+        '''
+        mtime = os.path.getmtime(cachefile)
+        return any(
+            os.path.getmtime(table.cachefile) > mtime
+            for table in self.uniprot_normalisation_tables(ncbi_tax_id)
+            if table is not None and os.path.isfile(table.cachefile))
+
+    def save_uniprot_normalisation(self, ncbi_tax_id = None):
+        '''
+        Saves the UniProt normalisation table to the cache. The file
+        is written under a temporary name and then renamed, so other
+        processes never read it half written.
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        if not self.cache or ncbi_tax_id not in self.uniprot_norm:
+            return None
+        cachefile = self.uniprot_normalisation_cachefile(ncbi_tax_id)
+        # loading the tables might have dropped it
+        norm = self.uniprot_norm.get(ncbi_tax_id)
+        if cachefile is None or norm is None:
+            return None
+        tmpfile = '%s.%u.%u.tmp' % (cachefile, os.getpid(),
+                                    threading.current_thread().ident)
+        with open(tmpfile, 'wb') as fp:
+            pickle.dump(norm, fp)
+        curl._replace(tmpfile, cachefile)
+        self.uniprot_norm_unsaved[ncbi_tax_id] = 0
+
+    def save_uniprot_normalisations(self):
+        '''
+        Saves the UniProt normalisation tables which have entries
+        not saved yet, e.g. at the end of loading the resources.
+        '''
+        for ncbi_tax_id, unsaved in list(self.uniprot_norm_unsaved.items()):
+            if unsaved:
+                self.save_uniprot_normalisation(ncbi_tax_id)
+
+    def build_uniprot_normalisation(self, ncbi_tax_id = None,
+                                    uniprots = None):
+        '''
+        Builds the UniProt normalisation table for ``uniprots``,
+        by default for all UniProt ACs of the organism and the
+        secondary ACs of them, and saves it to the cache.
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        if uniprots is None:
+            uniprots = set(uniprot_input.all_uniprots(ncbi_tax_id))
+            sec = self.which_table('uniprot-sec', 'uniprot-pri',
+                                   ncbi_tax_id = 0) or {}
+            uniprots.update(
+                s for s, pri in iteritems(sec)
+                if any(p in uniprots for p in pri))
+        norm = self._uniprot_normalisation(uniprots, ncbi_tax_id)
+        self.uniprot_normalisation(ncbi_tax_id).update(norm)
+        self.save_uniprot_normalisation(ncbi_tax_id)
+
+    def normalise_uniprots(self, lst, ncbi_tax_id = None):
+        '''
+        For a list of UniProt ACs returns the list of primary ACs,
+        SwissProt ones instead of TrEMBL where possible. Does the
+        same as :py:func:Mapper.primary_uniprot() followed by
+        :py:func:Mapper.trembl_swissprot(), using the normalisation
+        table. ACs missing from the table are added to it. These are
+        saved to the cache by :py:func:Mapper.save_uniprot_normalisations(),
+        or if ``uniprot_norm_save`` is set, after each ``uniprot_norm_save``
+        new ACs.
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        norm = self.uniprot_normalisation(ncbi_tax_id)
+        missing = set(u for u in lst if u not in norm)
+        if len(missing):
+            norm = self._uniprot_normalisation(missing, ncbi_tax_id)
+            # the table might have been dropped while loading
+            # the mapping tables needed for the normalisation
+            self.uniprot_normalisation(ncbi_tax_id).update(norm)
+            self.uniprot_norm_unsaved[ncbi_tax_id] += len(norm)
+            if self.uniprot_norm_save and \
+                    self.uniprot_norm_unsaved[ncbi_tax_id] >= \
+                    self.uniprot_norm_save:
+                self.save_uniprot_normalisation(ncbi_tax_id)
+            norm = self.uniprot_normalisation(ncbi_tax_id)
+        result = set([])
+        for u in lst:
+            result.update(norm[u])
+        return list(result)
+
+    def _uniprot_normalisation(self, uniprots, ncbi_tax_id):
+        primaries = self.map_names(uniprots, 'uniprot-sec',
+                                   'uniprot-pri', ncbi_tax_id=0)
+        primaries = dict(
+            (u, self._primary_uniprot([u], primaries)) for u in uniprots)
+        gsymbols = self.map_names(
+            set(p for pri in primaries.values() for p in pri),
+            'trembl', 'genesymbol', ncbi_tax_id=ncbi_tax_id)
+        swissprots = self.map_names(
+            set(g for gs in gsymbols.values() for g in gs),
+            'genesymbol', 'swissprot', ncbi_tax_id=ncbi_tax_id)
+        return dict(
+            (u, tuple(self._trembl_swissprot(pri, gsymbols, swissprots)))
+            for u, pri in iteritems(primaries))
+
+    def _primary_uniprot(self, lst, primaries):
+        '''
+        Same as :py:func:Mapper.primary_uniprot() but takes the
+        secondary to primary translations from the dict ``primaries``.
+        '''
+        pri = []
+        for u in lst:
+            pr = primaries.get(u, [])
+            if len(pr) > 0:
+                pri += pr
+            else:
+                pri.append(u)
+        return list(set(pri))
+
+    def _trembl_swissprot(self, lst, gsymbols, swissprots):
+        '''
+        Same as :py:func:Mapper.trembl_swissprot() but takes the
+        translations from the dicts ``gsymbols`` and ``swissprots``.
+        '''
+        sws = []
+        for tr in lst:
+            sw = []
+            for g in gsymbols.get(tr, []):
+                sw = swissprots.get(g, [])
+            if len(sw) == 0:
+                sws.append(tr)
+            else:
+                sws += sw
+        return list(set(sws))
 
     def map_refseq(self, refseq, nameType, targetNameType,
                    ncbi_tax_id, strict=False):
@@ -666,13 +1969,33 @@ class Mapper(object):
                                               ncbi_tax_id)
         if not len(mappedNames) and not strict:
             rstem = refseq.split('.')[0]
-            for n in xrange(49):
-                mappedNames += self._map_name('%s.%u' % (rstem, n),
+            for versioned in self.refseq_versions(rstem, nameType,
+                                                  targetNameType,
+                                                  ncbi_tax_id):
+                mappedNames += self._map_name(versioned,
                                               nameType,
                                               targetNameType,
                                               ncbi_tax_id)
         return mappedNames
 
+    def refseq_versions(self, stem, nameType, targetNameType,
+                        ncbi_tax_id = None):
+        '''
+        Returns the versioned RefSeq IDs with ``stem`` in the table
+        suitable to convert from nameType to targetNameType, ordered
+        by version. See :py:func:MappingTable.refseq_versions().
+        '''
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        if self.which_table(nameType, targetNameType,
+                            ncbi_tax_id = ncbi_tax_id) is None:
+            return []
+        tables = self.tables[ncbi_tax_id]
+        if (nameType, targetNameType) in tables:
+            return tables[(nameType, targetNameType)].refseq_versions(
+                stem, 'to')
+        return tables[(targetNameType, nameType)].refseq_versions(
+            stem, 'from')
+
     def _map_name(self, name, nameType, targetNameType, ncbi_tax_id):
         '''
         Once we have defined the name type and the target name type,
@@ -682,10 +2005,14 @@ class Mapper(object):
         nameTypRe = (targetNameType, nameType)
         tbl = self.which_table(nameType, targetNameType,
                                ncbi_tax_id = ncbi_tax_id)
+        t = time.time()
         if tbl is None or name not in tbl:
             result = []
         elif name in tbl:
             result = tbl[name]
+        if tbl is not None:
+            self.table_stats_add((nameType, targetNameType, ncbi_tax_id),
+                                 1, int(len(result) > 0), t)
         # self.trace.append({'name': name, 'from': nameType, 'to': targetNameType,
         #    'result': result})
         return result
@@ -804,7 +2131,7 @@ class Mapper(object):
                                      (ncbi_tax_id, param.ncbi_tax_id, param.input))
                     return None
             
-            tables[mapName] = \
+            table = \
                 MappingTable(
                     mapName[0],
                     mapName[1],
@@ -815,13 +2142,13 @@ class Mapper(object):
                     mysql=self.mysql,
                     log=self.ownlog,
                     cache=self.cache,
-                    cachedir=self.cachedir
+                    cachedir=self.cachedir,
+                    use_mmap=self.use_mmap,
+                    sqlite=self.sqlite
                 )
-            
-            if ('genesymbol', 'uniprot') in tables \
-                and ('genesymbol-syn', 'swissprot') in tables \
-                and ('genesymbol5', 'uniprot') not in tables:
-                self.genesymbol5(param.ncbi_tax_id)
+            with _tables_lock:
+                tables[mapName] = table
+                self.clear_cache([mapName])
             self.ownlog.msg(2, "Table %s loaded from %s." %
                             (str(mapName), param.__class__.__name__))
 
@@ -832,37 +2159,59 @@ class Mapper(object):
         return swprots
 
     def genesymbol5(self, ncbi_tax_id = None):
+        """
+        Returns the index of gene symbols by prefix for the
+        organism, built over the ``genesymbol`` to ``uniprot`` and
+        ``genesymbol-syn`` to ``swissprot`` tables, or None if any
+        of them is not loaded. The index is built at the first call
+        and dropped each time a mapping table is loaded.
+        """
         ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
-        tables = self.tables[ncbi_tax_id]
-        tables[('genesymbol5', 'uniprot')] = MappingTable(
-            'genesymbol5',
-            'uniprot',
-            'protein',
-            'genesymbol5',
-            None,
-            ncbi_tax_id,
-            None,
-            log=self.ownlog)
-        tbl_gs5 = tables[('genesymbol5', 'uniprot')].mapping['to']
-        tbls = [
-            tables[('genesymbol', 'uniprot')].mapping['to'],
-            tables[('genesymbol-syn', 'swissprot')].mapping['to']
-        ]
-        for tbl in tbls:
-            for gs, u in iteritems(tbl):
-                if len(gs) >= 5:
-                    gs5 = gs[:5]
-                    if gs5 not in tbl_gs5:
-                        tbl_gs5[gs5] = []
-                    tbl_gs5[gs5] += u
-        tables[('genesymbol5', 'uniprot')].mapping['to'] = tbl_gs5
+        if ncbi_tax_id not in self.genesymbol_index:
+            tables = self.tables.get(ncbi_tax_id, {})
+            if ('genesymbol', 'uniprot') not in tables \
+                    or ('genesymbol-syn', 'swissprot') not in tables:
+                return None
+            self.genesymbol_index[ncbi_tax_id] = PrefixIndex(
+                tables[('genesymbol', 'uniprot')].mapping['to'],
+                tables[('genesymbol-syn', 'swissprot')].mapping['to'])
+        return self.genesymbol_index[ncbi_tax_id]
 
-    def load_uniprot_mappings(self, ac_types=None, bi=False,
+    def map_genesymbol_prefix(self, name, targetNameType,
                               ncbi_tax_id = None):
-        
+        """
+        Last attempt to translate a gene symbol to UniProt:
+        looks up all gene symbols starting with ``name``, if the
+        length of ``name`` is within the range ``genesymbol_prefix``
+        (by default only names of 5 characters). The matching
+        symbols are ranked by ``genesymbol_rank``, by default the
+        shortest ones come first.
+        """
+        index = self.genesymbol5(ncbi_tax_id) \
+            if targetNameType == 'uniprot' else None
+        if index is None or not (self.genesymbol_prefix[0] <= len(name)
+                                 <= self.genesymbol_prefix[1]):
+            return []
+        return index.lookup(name, self.genesymbol_rank)
+
+    def load_uniprot_mappings(self, ac_types=None, bi=False,
+                              ncbi_tax_id = None, nproc = None):
+        """
+        Loads the mapping tables from ID types in ``ac_types`` to
+        UniProt from the UniProt ID mapping file. The tables are
+        loaded from the cache if available, the remaining ones
+        are built in one pass over the file: it is cut into chunks
+        which are processed by ``nproc`` worker processes (by
+        default as many as CPUs), and only the entries of the
+        organism are kept.
+        """
         ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        if ncbi_tax_id not in self.tables:
+            self.tables[ncbi_tax_id] = {}
         tables = self.tables[ncbi_tax_id]
-        ac_types = ac_types if ac_types is not None else self.name_types.keys()
+        ac_types = list(ac_types if ac_types is not None
+                        else self.name_types.keys())
+        self.clear_cache([(ac_typ, 'uniprot') for ac_typ in ac_types])
         # creating empty MappingTable objects:
         for ac_typ in ac_types:
             tables[(ac_typ, 'uniprot')] = MappingTable(
@@ -874,50 +2223,93 @@ class Mapper(object):
                 ncbi_tax_id,
                 None,
                 log=self.ownlog)
-        # attempting to load them from Pickle
-        i = 0
+            tables[(ac_typ, 'uniprot')].mid = \
+                common.md5((ac_typ, 'uniprot', bi, ncbi_tax_id))
+            tables[(ac_typ, 'uniprot')].cachefile = os.path.join(
+                self.cachedir, tables[(ac_typ, 'uniprot')].mid)
+        # attempting to load them from the cache:
+        to_load = []
         for ac_typ in ac_types:
-            md5ac = common.md5((ac_typ, 'uniprot', bi, ncbi_tax_id))
-            cachefile = os.path.join('cache', md5ac)
-            if self.cache and os.path.isfile(cachefile):
-                tables[(ac_typ, 'uniprot')].mapping = \
-                    pickle.load(open(cachefile, 'rb'))
-                ac_types.remove(ac_typ)
-                tables[(ac_typ, 'uniprot')].mid = md5ac
+            table = tables[(ac_typ, 'uniprot')]
+            table.sqlite = self.sqlite
+            if self.sqlite and table.has_sqlite():
+                table.load_sqlite()
+            elif self.cache and self.use_mmap and table.has_mmap():
+                table.load_mmap()
+            elif self.cache and os.path.isfile(table.cachefile):
+                table.mapping = pickle.load(open(table.cachefile, 'rb'))
+                if self.use_mmap:
+                    table.save_mmap()
+                if self.sqlite:
+                    table.save_sqlite()
+            else:
+                to_load.append(ac_typ)
+                continue
+            table.index_stems()
         # loading the remaining from the big UniProt mapping file:
-        if len(ac_types) > 0:
-            url = urls.urls['uniprot_idmap_ftp']['url']
-            c = curl.Curl(url, silent=False, large=True)
-
-            prg = progress.Progress(c.size, "Processing ID conversion list",
-                                    99)
-            for l in c.result:
-                prg.step(len(l))
-                l = l.decode('ascii').strip().split('\t')
-                for ac_typ in ac_types:
-                    if len(l) > 2 and self.name_types[ac_typ] == l[1]:
-                        other = l[2].split('.')[0]
-                        if l[2] not in tables[(ac_typ, 'uniprot'
-                                                    )].mapping['to']:
-                            tables[(
-                                ac_typ, 'uniprot')].mapping['to'][other] = []
-                        tables[(ac_typ, 'uniprot')].mapping['to'][other].\
-                            append(l[0].split('-')[0])
-                        if bi:
-                            uniprot = l[0].split('-')[0]
-                            if uniprot not in tables[(ac_typ, 'uniprot')].\
-                                    mapping['from']:
-                                tables[(ac_typ, 'uniprot')].\
-                                    mapping['from'][uniprot] = []
-                            tables[(ac_typ, 'uniprot')].mapping['from'][uniprot].\
-                                append(other)
-            prg.terminate()
-            if self.cache:
-                for ac_typ in ac_types:
-                    md5ac = common.md5((ac_typ, bi))
-                    cachefile = os.path.join('cache', md5ac)
-                    pickle.dump(tables[(ac_typ, 'uniprot')].mapping,
-                                open(cachefile, 'wb'))
+        if len(to_load) > 0:
+            mappings = self.read_uniprot_idmapping(to_load, bi,
+                                                   ncbi_tax_id, nproc)
+            for ac_typ in to_load:
+                table = tables[(ac_typ, 'uniprot')]
+                table.mapping = mappings[ac_typ]
+                if self.cache:
+                    pickle.dump(table.mapping, open(table.cachefile, 'wb'))
+                    if self.use_mmap:
+                        table.save_mmap()
+                if self.sqlite:
+                    table.save_sqlite()
+                table.index_stems()
+    
+    def read_uniprot_idmapping(self, ac_types, bi=False,
+                               ncbi_tax_id = None, nproc = None):
+        """
+        Reads the UniProt ID mapping file and returns a dict with
+        the mapping dicts of the ID types in ``ac_types``.
+        """
+        ncbi_tax_id = self.get_tax_id(ncbi_tax_id)
+        nproc = multiprocessing.cpu_count() if nproc is None else nproc
+        types = dict((self.name_types[ac_typ], ac_typ) for ac_typ in ac_types)
+        mappings = dict((ac_typ, {'to': {}, 'from': {}})
+                        for ac_typ in ac_types)
+        url = urls.urls['uniprot_idmap_ftp']['url']
+        c = curl.Curl(url, silent=False, large=True)
+        prg = progress.Progress(c.size, "Processing ID conversion list",
+                                99)
+        
+        def merge(result):
+            for ac_typ, mapping in iteritems(result):
+                for d in ('to', 'from'):
+                    for key, value in iteritems(mapping[d]):
+                        mappings[ac_typ][d].setdefault(key, []).extend(value)
+        
+        # at most 2 chunks per process are waiting at a time,
+        # not to read the whole file into the memory
+        pool = multiprocessing.Pool(nproc) if nproc > 1 else None
+        pending = deque()
+        try:
+            for chunk in _uniprot_idmapping_chunks(c.result):
+                prg.step(len(chunk))
+                args = (chunk, types, ncbi_tax_id, bi)
+                if pool is None:
+                    merge(_uniprot_idmapping_worker(args))
+                    continue
+                pending.append(
+                    pool.apply_async(_uniprot_idmapping_worker, (args,)))
+                if len(pending) >= 2 * nproc:
+                    merge(pending.popleft().get())
+            while pending:
+                merge(pending.popleft().get())
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        prg.terminate()
+        for mapping in mappings.values():
+            for d in ('to', 'from'):
+                for key, value in iteritems(mapping[d]):
+                    mapping[d][key] = common.uniqList(value)
+        return mappings
     
     def save_all_mappings(self):
         self.ownlog.msg(1, "Saving all mapping tables...")
@@ -939,6 +2331,7 @@ class Mapper(object):
                                          self.ownlog)
         for key, value in iteritems(umap):
             tables[key] = value
+        self.clear_cache()
 
     def read_mapping_uniprot_mysql(self, filename, ncbi_tax_id, log, bi=False):
         if not os.path.isfile(filename):
@@ -32,11 +32,48 @@ import pypath.dataio as dataio
 
 
 class Reference(object):
-    def __init__(self, pmid):
-        self.pmid = str(pmid).strip()
+    """
+    One literature reference. Instances are interned: calling
+    `Reference` with the same PubMed ID returns the same object,
+    so each reference exists only once in the process, however many
+    edges and attributes it belongs to.
+
+    The pool of instances (`Reference._pool`) is not limited in size,
+    and never cleared: it holds every reference created in the process,
+    even after the networks using them are deleted.
+    Objects pickled by earlier versions are not interned when loaded,
+    use `intern_references()` on them.
+    """
+
+    __slots__ = ['pmid']
+
+    _pool = {}
+
+    def __new__(cls, pmid=None):
+        if pmid is None:
+            # for unpickling objects saved by earlier versions
+            return object.__new__(cls)
+        pmid = str(pmid).strip()
+        ref = cls._pool.get(pmid)
+        if ref is None:
+            ref = object.__new__(cls)
+            ref.pmid = pmid
+            cls._pool[pmid] = ref
+        return ref
+
+    def __reduce__(self):
+        return (self.__class__, (self.pmid, ))
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = state[0] or state[1]
+        self.pmid = state['pmid']
 
     def __eq__(self, other):
-        return self.pmid == other.pmid
+        return self is other or self.pmid == other.pmid
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     def __hash__(self):
         return hash(self.pmid)
@@ -51,6 +88,22 @@ class Reference(object):
         return dataio.get_pubmeds([self.pmid])
 
 
+def intern_references(obj):
+    """
+    Returns ``obj`` with each `Reference` in it replaced by the interned
+    instance with the same PubMed ID. Lists, sets, tuples and the values
+    of dicts are processed recursively, other objects are returned as
+    they are.
+    """
+    if isinstance(obj, Reference):
+        return Reference._pool.setdefault(obj.pmid, obj)
+    if isinstance(obj, dict):
+        return dict((k, intern_references(v)) for k, v in iteritems(obj))
+    if isinstance(obj, (list, set, tuple)):
+        return type(obj)(intern_references(o) for o in obj)
+    return obj
+
+
 def open_pubmed(pmid):
     '''
     Opens PubMed record in web browser.
@@ -150,12 +203,10 @@ def get_pubmed_data(pp,
     if htp_threshold is not None:
         pp.htp_stats()
 
-    pubmeds = common.uniqList(
-        common.flatList([[r.pmid for r in e['references']]
-                         for e in pp.graph.es]))
+    pubmeds = set(r.pmid for refs in pp.graph.es['references'] for r in refs)
 
     if htp_threshold is not None:
-        pubmeds = set(pubmeds) - pp.htp[htp_threshold]['htrefs']
+        pubmeds = pubmeds - pp.htp[htp_threshold]['htrefs']
 
     notpmid = [i for i in pubmeds if not i.isdigit()]
 
@@ -168,7 +219,7 @@ def get_pubmed_data(pp,
                          'from PubMed, from file `%s`\n' % cachefile)
         pmdata = pickle.load(open(cachefile, 'rb'))
 
-    missing = list(set(pubmeds) - set(pmdata.keys()))
+    missing = list(pubmeds - set(pmdata.keys()))
     sys.stdout.write('\t:: Downloading data from PubMed about %s papers\n' %
                      len(missing))
     cached_pubmeds_len = len(pmdata)
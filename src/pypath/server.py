@@ -251,26 +251,27 @@ class RestResource(resource.Resource):
             'database', 'proteins', 'interactions', 'directions',
             'stimulations', 'inhibitions', 'signs'
         ]
+        bits = self.p.source_registry.bits
+        nodes = self.p.source_matrix('nodes').sum(axis=0)
+        edges = self.p.source_matrix().sum(axis=0)
+        dirs = self.p.sources_dirs_counts()
+        count = lambda a, s: int(a[bits[s]]) if bits.get(s, len(a)) < len(a) \
+            else 0
         res = [[
             # database name
             s,
             # number of proteins
-            len([1 for v in self.g.vs if s in v['sources']]),
+            count(nodes, s),
             # number of interacting pairs
-            len([1 for e in self.g.es if s in e['sources']]),
+            count(edges, s),
             # number of directions
-            sum([s in e['dirs'].sources[d] \
-                 for e in self.g.es for d in e['dirs'].which_dirs()]),
+            count(dirs['directions'], s),
             # number of stimulations
-            sum([s in e['dirs'].positive_sources[d] \
-                 for e in self.g.es for d in e['dirs'].which_dirs()]),
+            count(dirs['stimulations'], s),
             # number of inhibitions
-            sum([s in e['dirs'].negative_sources[d] \
-                 for e in self.g.es for d in e['dirs'].which_dirs()]),
+            count(dirs['inhibitions'], s),
             # number of signs
-            sum([s in sg for e in self.g.es for d in e['dirs'].which_dirs() \
-                 for sg in [e['dirs'].positive_sources[d],
-                            e['dirs'].negative_sources[d]]]),
+            count(dirs['stimulations'], s) + count(dirs['inhibitions'], s),
         ]
             for s in self.p.sources]
         if b'format' in req.args and req.args[b'format'] == b'json':
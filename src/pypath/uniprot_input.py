@@ -20,6 +20,7 @@ from future.utils import iteritems
 import re
 
 import pypath.urls as urls
+import pypath.common as common
 import pypath.curl as curl
 import pypath.seq as se
 
@@ -69,9 +70,8 @@ def get_isoforms(organism='Homo sapiens'):
     reorg = re.compile(r'OS=([A-Z][a-z]+\s[a-z]+)')
     result = {}
     url = urls.urls['unip_iso']['url']
-    c = curl.Curl(url, silent=False)
-    data = c.result
-    data = read_fasta(data)
+    c = curl.Curl(url, silent=False, large=True)
+    data = read_fasta(c.iterlines())
     for header, seq in iteritems(data):
         org = reorg.findall(header)
         if len(org) > 0 and org[0] == organism:
@@ -85,11 +85,25 @@ def get_isoforms(organism='Homo sapiens'):
 
 
 def read_fasta(fasta):
+    '''
+    Reads FASTA sequences from a string, or from an iterable
+    of lines, e.g. `curl.Curl.iterlines()`.
+    Returns dict of labels and sequences.
+    '''
     result = {}
-    fasta = re.split(r'\n>', fasta)
-    for section in fasta:
-        section = section.strip().split('\n')
-        label = section.pop(0)
-        seq = ''.join(section)
-        result[label] = seq
+    label = None
+    seq = []
+    if type(fasta) in common.charTypes:
+        fasta = fasta.split('\n')
+    for line in fasta:
+        line = line.strip()
+        if line.startswith('>'):
+            if label is not None:
+                result[label] = ''.join(seq)
+            label = line[1:]
+            seq = []
+        elif label is not None:
+            seq.append(line)
+    if label is not None:
+        result[label] = ''.join(seq)
     return result
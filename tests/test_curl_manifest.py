@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  This file is part of the `pypath` python module
+#
+#  Tests for the index of the cache directory of pypath.curl.Curl().
+#
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import pypath.curl as curl
+
+
+def write(cache_dir, name, size):
+    with open(os.path.join(cache_dir, name), 'wb') as fp:
+        fp.write(b'x' * size)
+
+
+def accessed(manifest, name):
+    with closing(sqlite3.connect(manifest.path)) as con:
+        return con.execute('SELECT accessed FROM files WHERE name = ?',
+                           (name, )).fetchone()[0]
+
+
+def test_manifest_shared_and_touch_batched(tmp_path):
+    cache_dir = str(tmp_path)
+    manifest = curl.cache_manifest(cache_dir)
+    assert curl.get_manifest(cache_dir) is manifest
+    name = '%s-a.txt' % ('0' * 32)
+    write(cache_dir, name, 10)
+    manifest.sync()
+    before = accessed(manifest, name)
+    manifest.touch(name)
+    # not written yet
+    assert accessed(manifest, name) == before
+    entry, = manifest.entries()
+    # written before the query
+    assert entry['accessed'] > before
+    for i in range(manifest.touch_batch):
+        manifest.touch(name)
+    assert not manifest.touched
+
+
+def test_evict_skips_locked_files(tmp_path):
+    cache_dir = str(tmp_path)
+    names = ['%s-%u.txt' % ('0' * 32, i) for i in range(3)]
+    for name in names:
+        write(cache_dir, name, 100)
+    manifest = curl.cache_manifest(cache_dir)
+    for name in names:
+        manifest.touch(name)
+    manifest.flush()
+    # the least recently used file is being read by another thread
+    locked = threading.Event()
+    done = threading.Event()
+
+    def hold():
+        with curl.CacheLock(os.path.join(manifest.cache_dir, names[0])):
+            locked.set()
+            done.wait(10)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    locked.wait(10)
+    try:
+        deleted = manifest.evict(100)
+    finally:
+        done.set()
+        thread.join()
+    assert deleted == names[1:]
+    assert os.path.exists(os.path.join(cache_dir, names[0]))
+    assert not any(os.path.exists(os.path.join(cache_dir, name))
+                   for name in names[1:])
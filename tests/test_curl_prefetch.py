@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  This file is part of the `pypath` python module
+#
+#  Tests for downloading many files in parallel
+#  by pypath.curl.prefetch(), against a local HTTP server.
+#
+
+import os
+import threading
+import time
+
+try:
+    import http.server as http_server
+    import socketserver
+except ImportError:
+    import BaseHTTPServer as http_server
+    import SocketServer as socketserver
+
+import pytest
+
+import pypath.curl as curl
+
+
+class Handler(http_server.BaseHTTPRequestHandler):
+    '''
+    Serves ``/file<n>`` with a small delay, so the transfers overlap,
+    and ``/broken`` always with an error.
+    '''
+
+    protocol_version = 'HTTP/1.0'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits.append(self.path)
+            server.overrides.append(
+                len(self.headers.get_all('X-HTTP-Method-Override') or [])
+                if hasattr(self.headers, 'get_all') else
+                len(self.headers.getheaders('X-HTTP-Method-Override')))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(0.2)
+            if self.path == '/broken':
+                self.send_response(500)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = ('%s\n' % self.path).encode('ascii') * 1000
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(socketserver.ThreadingMixIn, http_server.HTTPServer):
+
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    srv = Server(('127.0.0.1', 0), Handler)
+    srv.lock = threading.Lock()
+    srv.hits = []
+    srv.overrides = []
+    srv.active = 0
+    srv.max_active = 0
+    thread = threading.Thread(target=srv.serve_forever)
+    thread.daemon = True
+    thread.start()
+    srv.url = 'http://127.0.0.1:%u' % srv.server_address[1]
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_prefetch_max_per_host(server, tmp_path):
+    cache_dir = str(tmp_path)
+    urls = ['%s/file%u' % (server.url, i) for i in range(6)]
+    curls = curl.prefetch(urls, max_parallel=8, max_per_host=2,
+                          cache_dir=cache_dir)
+    assert server.max_active == 2
+    assert sorted(server.hits) == sorted('/file%u' % i for i in range(6))
+    for c in curls:
+        assert c.status == 200
+        assert not c.download_failed
+        assert os.path.exists(c.cache_file_name)
+        assert not os.path.exists(c.target_file_name)
+
+
+def test_prefetch_then_cache_hits(server, tmp_path):
+    cache_dir = str(tmp_path)
+    urls = ['%s/file%u' % (server.url, i) for i in range(3)]
+    # the same file twice: downloaded once
+    curls = curl.prefetch(urls + urls[:1], cache_dir=cache_dir)
+    assert len(server.hits) == 3
+    assert curls[3].status == 200
+    assert not curls[3].download_failed
+    for url in urls:
+        c = curl.Curl(url, cache_dir=cache_dir)
+        assert c.use_cache
+        assert c.result.startswith(url[len(server.url):])
+    # nothing reached the server
+    assert len(server.hits) == 3
+
+
+def test_prefetch_retries_then_fails(server, tmp_path):
+    cache_dir = str(tmp_path)
+    url = '%s/broken' % server.url
+    c, = curl.prefetch([{'url': url, 'retries': 3, 'override_post': True}],
+                       cache_dir=cache_dir)
+    assert server.hits == ['/broken'] * 3
+    # the headers are not added again by the retries
+    assert server.overrides == [1] * 3
+    assert c.download_failed
+    assert c.status == 500
+    assert not os.path.exists(c.cache_file_name)
+    assert not os.path.exists(c.target_file_name)
+
+
+def test_prefetch_releases_locks(server, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path)
+    urls = ['%s/file%u' % (server.url, i) for i in range(2)]
+
+    def transcode(self):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(curl.Curl, 'transcode', transcode)
+    with pytest.raises(KeyboardInterrupt):
+        curl.prefetch(urls, cache_dir=cache_dir)
+    monkeypatch.undo()
+    # would wait forever if the locks of the files had not been released
+    result = []
+    thread = threading.Thread(target=lambda: result.extend(
+        curl.Curl(url, cache_dir=cache_dir) for url in urls))
+    thread.daemon = True
+    thread.start()
+    thread.join(10)
+    assert len(result) == 2
+    assert result[1].result.startswith('/file1')
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  This file is part of the `pypath` python module
+#
+#  Tests for continuing interrupted downloads by pypath.curl.Curl(),
+#  against a local HTTP server supporting ranges.
+#
+
+import os
+import json
+import hashlib
+import threading
+
+try:
+    import http.server as http_server
+    import socketserver
+except ImportError:
+    import BaseHTTPServer as http_server
+    import SocketServer as socketserver
+
+import pytest
+
+import pypath.curl as curl
+
+
+VERSIONS = [
+    b''.join(('%07u\n' % i).encode('ascii') for i in range(150000)),
+    b''.join(('%07u\n' % i).encode('ascii')
+             for i in reversed(range(150000))),
+]
+
+
+class Handler(http_server.BaseHTTPRequestHandler):
+    '''
+    Serves the current version of the data at any path.
+    Paths containing ``noval`` are served without validators,
+    ``norange`` ignores the Range header. The first ``drops``
+    responses are interrupted in the middle of the body.
+    '''
+
+    protocol_version = 'HTTP/1.0'
+
+    def do_GET(self):
+        server = self.server
+        data = VERSIONS[server.version]
+        etag = '"v%u"' % server.version
+        rng = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        server.requests.append((self.path, rng, if_range))
+        start = 0
+        if (rng and 'norange' not in self.path and
+                (if_range is None or if_range == etag)):
+            start = int(rng.split('=')[1].split('-')[0])
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %u-%u/%u' %
+                             (start, len(data) - 1, len(data)))
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        if 'noval' not in self.path:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified',
+                             'Mon, 0%u Jan 2018 00:00:00 GMT' %
+                             (server.version + 1))
+        self.end_headers()
+        if server.drops > 0:
+            server.drops -= 1
+            self.wfile.write(body[:len(body) // 3])
+            self.wfile.flush()
+            self.connection.shutdown(2)
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(socketserver.ThreadingMixIn, http_server.HTTPServer):
+
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    srv = Server(('127.0.0.1', 0), Handler)
+    srv.version = 0
+    srv.drops = 0
+    srv.requests = []
+    thread = threading.Thread(target=srv.serve_forever)
+    thread.daemon = True
+    thread.start()
+    srv.url = 'http://127.0.0.1:%u' % srv.server_address[1]
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def cached(c):
+    with open(c.cache_file_name, 'rb') as fp:
+        return fp.read()
+
+
+def no_partial(c):
+    return not any(
+        os.path.exists(path)
+        for path in (c.target_file_name, c.partial_info_file_name))
+
+
+def test_resume_after_drops(server, tmp_path):
+    server.drops = 2
+    c = curl.Curl('%s/data.txt' % server.url, cache_dir=str(tmp_path),
+                  retries=3, process=False)
+    assert c.status == 200
+    assert cached(c) == VERSIONS[0]
+    assert no_partial(c)
+    # the 2nd and 3rd requests continued the download
+    assert [r[1] is not None for r in server.requests] == [False, True, True]
+
+
+def test_resume_in_next_run(server, tmp_path):
+    url = '%s/data.txt' % server.url
+    server.drops = 1
+    c = curl.Curl(url, cache_dir=str(tmp_path), retries=1, process=False)
+    assert c.download_failed
+    assert os.path.exists(c.target_file_name)
+    assert os.path.exists(c.partial_info_file_name)
+    c = curl.Curl(url, cache_dir=str(tmp_path), process=False)
+    assert cached(c) == VERSIONS[0]
+    assert no_partial(c)
+    assert server.requests[-1][1] is not None
+    assert server.requests[-1][2] == '"v0"'
+
+
+@pytest.mark.parametrize('path', ['data.txt', 'norange.txt'])
+def test_restart_if_changed(server, tmp_path, path):
+    url = '%s/%s' % (server.url, path)
+    server.drops = 1
+    c = curl.Curl(url, cache_dir=str(tmp_path), retries=1, process=False)
+    assert c.download_failed
+    # the file changes on the server before the next run
+    server.version = 1
+    c = curl.Curl(url, cache_dir=str(tmp_path), process=False)
+    assert c.status == 200
+    # not the head of the old and the tail of the new version
+    assert cached(c) == VERSIONS[1]
+    assert no_partial(c)
+
+
+def test_partial_without_validators(server, tmp_path):
+    url = '%s/noval.txt' % server.url
+    c = curl.Curl(url, cache_dir=str(tmp_path), call=False, process=False)
+    with open(c.target_file_name, 'wb') as fp:
+        fp.write(b'left by an earlier run')
+    c = curl.Curl(url, cache_dir=str(tmp_path), process=False)
+    assert cached(c) == VERSIONS[0]
+    assert no_partial(c)
+    assert server.requests[-1][1] is None
+
+
+def test_range_not_satisfiable(server, tmp_path):
+    url = '%s/data.txt' % server.url
+    c = curl.Curl(url, cache_dir=str(tmp_path), call=False, process=False)
+    with open(c.target_file_name, 'wb') as fp:
+        fp.write(VERSIONS[0] + b'garbage')
+    with open(c.partial_info_file_name, 'w') as fp:
+        json.dump({'etag': '"v0"', 'last_modified': None, 'size': None}, fp)
+    c = curl.Curl(url, cache_dir=str(tmp_path), process=False)
+    assert c.status == 200
+    assert cached(c) == VERSIONS[0]
+    assert no_partial(c)
+    assert server.requests[0][1] is not None
+    assert server.requests[-1][1] is None
+
+
+def test_expected_checksum(server, tmp_path):
+    url = '%s/data.txt' % server.url
+    c = curl.Curl(url, cache_dir=str(tmp_path), process=False,
+                  expected_size=len(VERSIONS[0]) + 1)
+    assert c.download_failed
+    assert not os.path.exists(c.cache_file_name)
+    assert no_partial(c)
+    c = curl.Curl(url, cache_dir=str(tmp_path), process=False,
+                  expected_md5='0' * 32)
+    assert c.download_failed
+    assert not os.path.exists(c.cache_file_name)
+    assert no_partial(c)
+    c = curl.Curl(url, cache_dir=str(tmp_path), process=False,
+                  expected_size=len(VERSIONS[0]),
+                  expected_md5=hashlib.md5(VERSIONS[0]).hexdigest())
+    assert c.status == 200
+    assert cached(c) == VERSIONS[0]
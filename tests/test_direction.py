@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  This file is part of the `pypath` python module
+#
+#  Tests for the Direction objects storing the directions
+#  and signs of interactions.
+#
+
+try:
+    import copyreg
+except ImportError:
+    import copy_reg as copyreg
+
+import pickle
+
+import pypath.main as main
+
+A, B = 'P00001', 'P00002'
+AB, BA = (A, B), (B, A)
+
+
+class OldDirection(object):
+    '''
+    Pickles like the `Direction` objects of earlier versions,
+    which kept everything in dicts in their ``__dict__``.
+    '''
+
+    def __reduce__(self):
+        return (copyreg._reconstructor, (main.Direction, object, None), {
+            'nodes': [A, B],
+            'straight': AB,
+            'reverse': BA,
+            'dirs': {AB: True, BA: False, 'undirected': True},
+            'sources': {
+                AB: set(['Signor', 'SPIKE']),
+                BA: set([]),
+                'undirected': set(['HPRD']),
+            },
+            'positive': {AB: True, BA: False},
+            'negative': {AB: False, BA: False},
+            'positive_sources': {AB: set(['Signor']), BA: set([])},
+            'negative_sources': {AB: set([]), BA: set([])},
+            'mechanisms': {},
+            'methods': {},
+        })
+
+
+def direction():
+    d = main.Direction(B, A)
+    d.set_dir(AB, 'Signor')
+    d.set_dir('undirected', 'HPRD')
+    d.set_sign(AB, 'positive', 'Signor')
+    d.set_sign(BA, 'negative', set(['SPIKE', 'Signor']))
+    return d
+
+
+def test_dicts():
+    d = direction()
+    assert d.straight == AB and d.reverse == BA
+    assert d.dirs == {AB: True, BA: True, 'undirected': True}
+    assert d.sources == {
+        AB: set(['Signor']),
+        BA: set(['SPIKE', 'Signor']),
+        'undirected': set(['HPRD']),
+    }
+    assert d.positive == {AB: True, BA: False}
+    assert d.negative == {AB: False, BA: True}
+    assert d.positive_sources == {AB: set(['Signor']), BA: set([])}
+    assert d.negative_sources == {AB: set([]), BA: set(['SPIKE', 'Signor'])}
+    assert d.majority_dir() == BA
+    assert sorted(d.which_dirs()) == [AB, BA]
+
+
+def test_pickle():
+    d = direction()
+    loaded = pickle.loads(pickle.dumps(d))
+    for attr in ('dirs', 'sources', 'positive', 'negative',
+                 'positive_sources', 'negative_sources'):
+        assert getattr(loaded, attr) == getattr(d, attr)
+
+
+def test_old_pickle():
+    d = pickle.loads(pickle.dumps(OldDirection(), protocol=2))
+    assert isinstance(d, main.Direction)
+    assert d.straight == AB
+    assert d.dirs == {AB: True, BA: False, 'undirected': True}
+    assert d.sources_straight() == set(['Signor', 'SPIKE'])
+    assert d.sources_undirected() == set(['HPRD'])
+    assert d.positive_straight() and not d.negative_straight()
+    assert d.positive_sources_straight() == set(['Signor'])
+
+
+def test_unset():
+    d = direction()
+    d.unset_dir(BA, 'Signor')
+    assert d.get_dir(BA) and d.sources_reverse() == set(['SPIKE'])
+    d.unset_dir(BA, 'NotARegisteredResource')
+    assert d.get_dir(BA)
+    d.unset_dir(BA, 'SPIKE')
+    assert not d.get_dir(BA) and d.sources_reverse() == set([])
+    d.unset_dir('undirected')
+    assert not d.get_dir('undirected')
+    d.unset_sign(BA, 'negative', 'SPIKE')
+    assert d.negative_reverse()
+    d.unset_sign(BA, 'negative')
+    assert not d.negative_reverse()
+    assert d.negative_sources_reverse() == set([])
+    assert d.positive_straight()
+
+
+def test_merge():
+    d = main.Direction(A, B)
+    d.set_dir(AB, 'HPRD')
+    other = direction()
+    d.merge(other)
+    assert d.dirs == other.dirs
+    assert d.sources_straight() == set(['HPRD', 'Signor'])
+    assert d.sources_reverse() == set(['SPIKE', 'Signor'])
+    assert d.positive_sources_straight() == set(['Signor'])
+    assert d.negative_sources_reverse() == set(['SPIKE', 'Signor'])
+    # interactions between other nodes are ignored
+    d.merge(main.Direction(A, 'P00003'))
+    assert d.dirs == other.dirs
+
+
+def test_translate():
+    d = direction()
+    new = d.translate({A: 'Q00002', B: 'Q00001'})
+    Q1, Q2 = 'Q00001', 'Q00002'
+    assert new.straight == (Q1, Q2)
+    assert new.sources == {
+        (Q2, Q1): set(['Signor']),
+        (Q1, Q2): set(['SPIKE', 'Signor']),
+        'undirected': set(['HPRD']),
+    }
+    assert new.positive_sources_reverse() == set(['Signor'])
+    assert new.negative_sources_straight() == set(['SPIKE', 'Signor'])
+
+
+def test_loop():
+    d = main.Direction(A, A)
+    d.set_dir((A, A), 'Signor')
+    assert d.dirs == {(A, A): True, 'undirected': False}
+    assert d.which_dirs() == [(A, A)]
+    assert d.majority_dir() is None
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  This file is part of the `pypath` python module
+#
+#  Tests for loading mapping tables in threads
+#  by Mapper.load_tables().
+#
+
+import threading
+import time
+
+import pytest
+
+import pypath.mapping as mapping
+import pypath.uniprot_input as uniprot_input
+
+
+class StubTable(object):
+    '''
+    Stands for a MappingTable, records the loading of the table
+    and the pairs of tables being loaded concurrently.
+    '''
+
+    lock = threading.Lock()
+    active = {}
+    loaded = []
+    overlaps = []
+
+    def __init__(self, one, two, typ, source, param, ncbi_tax_id,
+                 uniprots=None, **kwargs):
+        pair = (frozenset((one, two)), ncbi_tax_id)
+        with self.lock:
+            if self.active.get(pair):
+                self.overlaps.append(pair)
+            self.active[pair] = self.active.get(pair, 0) + 1
+            self.loaded.append((one, two, ncbi_tax_id, uniprots))
+        time.sleep(0.05)
+        self.mapping = {
+            'to': {'a': ['b']},
+            'from': {'b': ['a']}
+        }
+        with self.lock:
+            self.active[pair] -= 1
+
+
+@pytest.fixture
+def stub_downloads(monkeypatch):
+    calls = []
+
+    def all_uniprots(organism=9606, swissprot=None):
+        calls.append((organism, swissprot))
+        time.sleep(0.05)
+        return ['P00533', 'P04637']
+
+    StubTable.active = {}
+    StubTable.loaded = []
+    StubTable.overlaps = []
+    monkeypatch.setattr(mapping, 'MappingTable', StubTable)
+    monkeypatch.setattr(uniprot_input, 'all_uniprots', all_uniprots)
+    return calls
+
+
+def test_load_tables_threads(stub_downloads):
+    m = mapping.Mapper(cache=False)
+    tables = [
+        ('ensp', 'uniprot', 9606),
+        ('uniprot', 'ensp', 9606),
+        ('ensg', 'uniprot', 9606),
+        ('ensp', 'uniprot', 10090),
+        ('genesymbol', 'uniprot', 9606),
+        ('uniprot', 'genesymbol', 9606),
+    ]
+    m.load_tables(tables, threads=4)
+    # the list of UniProt IDs downloaded once for each organism
+    assert sorted(stub_downloads) == [(9606, True), (10090, True)]
+    # a table and its reverse never loaded at the same time
+    assert StubTable.overlaps == []
+    for one, two, tax, uniprots in StubTable.loaded:
+        if m.uniprot_list_table(one, two):
+            assert uniprots == ['P00533', 'P04637']
+    for one, two, tax in tables:
+        assert m.which_table(one, two, load=False, ncbi_tax_id=tax) \
+            is not None
+    assert m.uniprots == {}
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  This file is part of the `pypath` python module
+#
+#  Tests for Mapper.map_names(), which should give the same
+#  results as calling Mapper.map_name() for each name.
+#
+
+import random
+
+import pytest
+
+import pypath.mapping as mapping
+
+
+class FakeTable(object):
+    '''
+    Stands for a `MappingTable` with the given `to` and `from` dicts.
+    '''
+
+    refseq_versions = mapping.MappingTable.refseq_versions
+    index_stems = mapping.MappingTable.index_stems
+    sort_versions = staticmethod(mapping.MappingTable.sort_versions)
+
+    def __init__(self, to, frm=None):
+        self.mapping = {'to': to, 'from': frm or {}}
+        self.stems = {}
+
+
+@pytest.fixture
+def mapper(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rnd = random.Random(3)
+
+    def uniprots(n):
+        return [
+            '%s%05u' % (rnd.choice('POQ'), rnd.randrange(300))
+            for _ in range(n)
+        ]
+
+    genes = ['GENE%u' % i for i in range(150)] + \
+        ['ab%u' % i for i in range(20)]
+    syns = ['SYN%u' % i for i in range(40)]
+    refseqs = ['NP_%u.%u' % (i, i % 3) for i in range(50)] + \
+        ['NP_%u.%u' % (i, i % 5 + 10) for i in range(0, 50, 4)] + \
+        ['NP_%u' % i for i in range(60, 70)]
+    m = mapping.Mapper(cache=False)
+    m.tables[9606] = {
+        ('genesymbol', 'uniprot'): FakeTable(
+            dict((g, uniprots(rnd.randrange(3))) for g in genes)),
+        ('genesymbol', 'swissprot'): FakeTable(
+            dict((g, uniprots(1)) for g in genes[::3])),
+        ('genesymbol-syn', 'uniprot'): FakeTable(
+            dict((s, uniprots(1)) for s in syns)),
+        ('genesymbol-syn', 'swissprot'): FakeTable(
+            dict((s, uniprots(1)) for s in syns)),
+        ('genesymbol5', 'uniprot'): FakeTable(
+            dict((g, uniprots(1)) for g in genes[10:30])),
+        ('genesymbol5', 'swissprot'): FakeTable({}),
+        ('trembl', 'genesymbol'): FakeTable(
+            dict((u, [rnd.choice(genes)]) for u in uniprots(150))),
+        ('refseqp', 'uniprot'): FakeTable(
+            dict((r, uniprots(1)) for r in refseqs)),
+        ('entrez', 'genesymbol'): FakeTable(
+            dict((str(i), [rnd.choice(genes)]) for i in range(100))),
+    }
+    m.tables[0] = {
+        ('uniprot-sec', 'uniprot-pri'): FakeTable(
+            dict((u, uniprots(1 + rnd.randrange(2)))
+                 for u in uniprots(200))),
+    }
+    queries = [
+        (genes + ['gene%u' % i for i in range(50)] +
+         ['AB%u' % i for i in range(20)] + ['SYN%u' % i for i in range(50)] +
+         ['GENE%uX' % i for i in range(10, 40)] + ['nope', ''],
+         'genesymbol', 'uniprot'),
+        (['NP_%u' % i for i in range(75)] +
+         ['NP_%u.1' % i for i in range(75)] +
+         ['NP_%u.x' % i for i in range(75)],
+         'refseqp', 'uniprot'),
+        (uniprots(300) + [u.lower() for u in uniprots(50)],
+         'uniprot', 'uniprot'),
+        ([str(i) for i in range(130)], 'entrez', 'genesymbol'),
+        (genes, 'genesymbol', 'swissprot'),
+    ]
+    return m, queries
+
+
+@pytest.mark.parametrize('strict', [False, True])
+@pytest.mark.parametrize('query', range(5))
+def test_map_names(mapper, strict, query):
+    mapper, queries = mapper
+    names, name_type, target_type = queries[query]
+    mapper.uniprot_mapped = []
+    single = dict(
+        (name, sorted(mapper.map_name(name, name_type, target_type,
+                                      strict=strict)))
+        for name in set(names))
+    single_mapped = sorted(map(str, mapper.uniprot_mapped))
+    mapper.uniprot_mapped = []
+    batch = mapper.map_names(names, name_type, target_type, strict=strict)
+    assert sorted(batch) == sorted(set(names))
+    assert dict((k, sorted(v)) for k, v in batch.items()) == single
+    assert sorted(map(str, mapper.uniprot_mapped)) == single_mapped
+    assert any(single.values())
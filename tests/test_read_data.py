@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  This file is part of the `pypath` python module
+#
+#  Tests for the columnar reader of PyPath.read_data_file(),
+#  which should give the same records and counts as the
+#  row by row reader.
+#
+
+import codecs
+import io
+
+import pytest
+
+import pypath.main as main
+import pypath.input_formats as input_formats
+
+# columns: names, references, direction, sign,
+# category (positive filter), tags (negative filter)
+HEADER = b'a\tb\trefs\tdir\tsign\tcat\ttags\n'
+ROWS = (
+    b'P00001\tP00002\t123;456\t1\t+\tkeep\tx,y\n'
+    b'\n'
+    b'P00003\tP00004\t\t0\t-\tkeep\tz\n'
+    b'P00005\tP00006\t789\t1\t+;-\tdrop\tz\n'
+    b'P00007\tP00008\t11; 12\t0\t?\tkeep\tbad,z\n'
+    b'P00009\tP00010\t13;13\t0\t-\tkeep\t\n'
+    b'P00011\tP00012\n'
+    b'P00013\tP00014\t14\t1\t-;+\tkeep\tz\r\n'
+    b'x\n'
+    b'P00015\tP00016\t15\t1\t+\tkeep,other\tz'
+)
+DATA = {
+    'plain': HEADER + ROWS,
+    'leading_empty': b'\n' + HEADER + ROWS,
+}
+
+
+@pytest.fixture
+def pa(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return main.PyPath()
+
+
+def settings(header=True):
+    return input_formats.ReadSettings(
+        name='Test',
+        separator='\t',
+        nameColA=0,
+        nameColB=1,
+        references=(2, ';'),
+        isDirected=(3, '1'),
+        sign=(4, '+', '-', ';'),
+        positiveFilters=[(5, 'keep', ',')],
+        negativeFilters=[(6, 'bad', ',')],
+        extraEdgeAttrs={'tags': (6, ',')},
+        header=header,
+        ncbiTaxId=9606)
+
+
+def normalize(records):
+    return [
+        dict(rec, references=sorted(rec['references']))
+        for rec in records
+    ]
+
+
+@pytest.mark.parametrize('block_size', [7, 1 << 24])
+@pytest.mark.parametrize('header', [True, False])
+@pytest.mark.parametrize('data', sorted(DATA))
+def test_file(pa, tmp_path, data, header, block_size):
+    path = tmp_path / 'data.tsv'
+    path.write_bytes(DATA[data])
+    row_stats = {}
+    col_stats = {}
+    rows = list(pa.read_data_records(
+        settings(header),
+        codecs.open(str(path), encoding='utf-8', mode='r'),
+        row_stats))
+    with open(str(path), 'rb') as fp:
+        cols = pa.read_data_columns(settings(header), fp, col_stats,
+                                    block_size=block_size)
+    assert cols is not None
+    assert normalize(cols) == normalize(rows)
+    assert col_stats == row_stats
+
+
+@pytest.mark.parametrize('block_size', [7, 1 << 24])
+@pytest.mark.parametrize('header', [True, False])
+@pytest.mark.parametrize('data', sorted(DATA))
+def test_url(pa, data, header, block_size):
+    row_stats = {}
+    col_stats = {}
+    rows = list(pa.read_data_records(
+        settings(header),
+        list(pa.iter_lines(io.BytesIO(DATA[data]))),
+        row_stats))
+    cols = pa.read_data_columns(settings(header), io.BytesIO(DATA[data]),
+                                col_stats, nonempty=True,
+                                block_size=block_size)
+    assert cols is not None
+    assert normalize(cols) == normalize(rows)
+    assert col_stats == row_stats
+
+
+def test_fallback(pa):
+    # a column out of range in some line: left to the row reader
+    data = HEADER + b'P00001\tP00002\t123\t1\t+\tkeep\n'
+    stats = {}
+    assert pa.read_data_columns(settings(), io.BytesIO(data), stats) is None
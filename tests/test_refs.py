@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#
+#  This file is part of the `pypath` python module
+#
+#  Tests for the interned literature references.
+#
+
+try:
+    import copyreg
+except ImportError:
+    import copy_reg as copyreg
+
+import pickle
+
+import pypath.refs as refs
+
+
+class OldReference(object):
+    '''
+    Pickles like the `Reference` objects of earlier versions,
+    which had a ``__dict__`` instead of ``__slots__``.
+    '''
+
+    def __init__(self, pmid):
+        self.pmid = pmid
+
+    def __reduce__(self):
+        return (copyreg._reconstructor, (refs.Reference, object, None),
+                {'pmid': self.pmid})
+
+
+def test_interned():
+    assert refs.Reference('12345') is refs.Reference(12345)
+    ref = refs.Reference('12345')
+    assert pickle.loads(pickle.dumps(ref)) is ref
+
+
+def test_intern_old_pickles():
+    ref = refs.Reference('23456')
+    data = pickle.dumps({
+        'references': [OldReference('23456'), OldReference('34567')],
+        'refs_by_source': {'Signor': set([OldReference('23456')])},
+    }, protocol=2)
+    loaded = pickle.loads(data)
+    assert loaded['references'][0] is not ref
+    loaded = refs.intern_references(loaded)
+    assert loaded['references'][0] is ref
+    assert list(loaded['refs_by_source']['Signor'])[0] is ref
+    assert loaded['references'][1] is refs.Reference('34567')